@@ -1,4 +1,4 @@
-from flask import Flask
+from flask import Flask, Response
 from flask_cors import CORS
 from flask_migrate import Migrate
 from flasgger import Swagger
@@ -7,11 +7,19 @@ from dotenv import load_dotenv
 
 from app.config import config
 from app.models import db
+from app.models.routing import REPLICA_BIND_PREFIX
+from app.services.search_index import include_object, init_search_index
+from app.utils.compression import init_compression
+from app.utils.database import configure_engines, engine_options, primary_engine_options
+from app.utils.json_provider import configure_json_provider
+from app.utils.metrics import init_metrics, render_prometheus
+from app.utils.slow_queries import init_slow_query_log
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
-migrate = Migrate()
+# O autogenerate ignora a tabela FTS5 da busca local, criada fora dos modelos
+migrate = Migrate(include_object=include_object)
 
 
 
@@ -25,10 +33,27 @@ def create_app(config_name=None):
     
     # Carregar configurações
     app.config.from_object(config.get(config_name, config['default']))
+    configure_json_provider(app)
+    
+    # Opções do engine conforme o banco
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = primary_engine_options(app.config)
+    
+    # Réplicas de leitura como binds extras, usadas pela RoutingSession
+    app.config['SQLALCHEMY_BINDS'] = {
+        **app.config.get('SQLALCHEMY_BINDS', {}),
+        **{
+            f'{REPLICA_BIND_PREFIX}{index}': {'url': url, **engine_options(app.config, url)}
+            for index, url in enumerate(app.config['DATABASE_REPLICA_URLS'])
+        }
+    }
     
     # Inicializar extensões
     db.init_app(app)
+    configure_engines(app, db)
     migrate.init_app(app, db)
+    init_metrics(app, db)
+    init_slow_query_log(app, db)
+    init_compression(app)
     
     # Configurar CORS com mais detalhes
     cors_origins = app.config['CORS_ORIGINS']
@@ -62,14 +87,29 @@ def create_app(config_name=None):
     from app.controllers.user_controller import user_bp
     from app.controllers.anime_controller import anime_bp
     from app.controllers.diary_controller import diary_bp
+    from app.controllers.admin_controller import admin_bp
     
     app.register_blueprint(user_bp, url_prefix='/api/users')
     app.register_blueprint(anime_bp, url_prefix='/api/animes')
     app.register_blueprint(diary_bp, url_prefix='/api/diary')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    
+    # Registrar comandos de linha de comando (flask anime ..., flask diary ...)
+    from app.cli import anime_cli, diary_cli
+    app.cli.add_command(anime_cli)
+    app.cli.add_command(diary_cli)
     
-    # Criar tabelas
+    # Criar tabelas (só no primário: as réplicas recebem o schema pela replicação)
     with app.app_context():
-        db.create_all()
+        db.create_all(bind_key=None)
+    
+    # Índice de busca local (a criação da tabela FTS5 não cai na transação de uma requisição)
+    init_search_index(app)
+    
+    # Atualização do catálogo em segundo plano
+    if app.config['CATALOGUE_REFRESH_ENABLED'] and not app.testing:
+        from app.services.refresh_service import start_background_refresher
+        start_background_refresher(app)
     
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
@@ -77,4 +117,13 @@ def create_app(config_name=None):
         """Health check endpoint"""
         return {'status': 'ok', 'message': 'MyAnimeDiary API is running'}, 200
     
+    # Métricas no formato texto do Prometheus, somadas entre os workers
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        """Metrics endpoint"""
+        store = app.extensions.get('metrics')
+        if store is None:
+            return {'error': 'Metrics are disabled'}, 404
+        return Response(render_prometheus(store.collect()), mimetype='text/plain; version=0.0.4')
+    
     return app
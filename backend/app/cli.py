@@ -0,0 +1,100 @@
+import json
+import os
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.models import db
+from app.services.anime_service import AnimeService
+from app.services.diary_service import DiaryService
+from app.services.refresh_service import CatalogueRefresher
+from app.services.search_index import get_search_index
+from app.utils.json_stream import iter_json_records
+
+anime_cli = AppGroup('anime', help='Comandos de manutenção do catálogo de animes')
+diary_cli = AppGroup('diary', help='Comandos de manutenção do diário')
+
+
+@anime_cli.command('reindex')
+def reindex():
+    """Reconstruir o índice de busca local a partir da tabela anime"""
+    index = get_search_index()
+    index.reindex()
+    db.session.commit()
+    click.echo(f'Rebuilt {type(index).__name__}')
+
+
+@anime_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=5000, show_default=True, help='Registros por transação')
+@click.option('--resume', is_flag=True, help='Continuar a partir do último lote gravado')
+def import_animes(path, batch_size, resume):
+    """Importar um dump de animes da Jikan (NDJSON ou array JSON, opcionalmente .gz)"""
+    checkpoint = f'{path}.checkpoint'
+    skip = 0
+    
+    if resume and os.path.exists(checkpoint):
+        with open(checkpoint) as f:
+            skip = json.load(f)['records']
+        click.echo(f'Resuming after {skip} records')
+    
+    started = time.monotonic()
+    
+    def on_batch(processed):
+        # O checkpoint só avança depois do commit do lote
+        with open(checkpoint, 'w') as f:
+            json.dump({'records': processed}, f)
+        
+        elapsed = time.monotonic() - started
+        rate = (processed - skip) / elapsed * 60 if elapsed else 0
+        click.echo(f'{processed} records imported ({rate:.0f} records/min)')
+    
+    total = AnimeService().import_animes(iter_json_records(path), batch_size, skip, on_batch)
+    
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    click.echo(f'Done: {total} records in {time.monotonic() - started:.1f}s')
+
+
+@anime_cli.command('refresh')
+@click.option('--limit', type=int, default=None, help='Máximo de animes por rodada')
+@click.option('--loop', is_flag=True, help='Rodar continuamente (worker dedicado)')
+def refresh(limit, loop):
+    """Atualizar score/episodes/status dos animes mais acompanhados a partir da Jikan"""
+    refresher = CatalogueRefresher()
+    
+    while True:
+        summary = refresher.run_once(limit)
+        click.echo(
+            f"Refreshed {summary['refreshed']}/{summary['candidates']} animes "
+            f"({summary['failed']} failed, {summary['missing']} not found), lag {summary['lag_seconds']}s, "
+            f"{summary['stale_tracked_animes']} stale tracked animes"
+        )
+        
+        if not loop:
+            break
+        db.session.remove()
+        time.sleep(current_app.config['CATALOGUE_REFRESH_INTERVAL'])
+
+
+@diary_cli.command('rebuild-stats')
+@click.option('--verify', is_flag=True, help='Apenas reportar divergências, sem corrigir a tabela')
+def rebuild_stats(verify):
+    """Recalcular user_diary_stats a partir de diary_entry"""
+    drift = DiaryService().rebuild_stats(fix=not verify)
+    
+    for item in drift:
+        click.echo(
+            f"user {item['user_id']}: {item['field']} stored={item['stored']} expected={item['expected']}"
+        )
+    
+    users = len({item['user_id'] for item in drift})
+    if verify:
+        click.echo(f'{len(drift)} divergent counters across {users} users')
+    else:
+        click.echo(f'Rebuilt stats, fixed {len(drift)} divergent counters across {users} users')
+    
+    if verify and drift:
+        raise SystemExit(1)
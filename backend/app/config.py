@@ -12,7 +12,24 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///anime_diary.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = os.getenv('SQLALCHEMY_TRACK_MODIFICATIONS', False)
     
-
+    # Réplicas de leitura (URLs separadas por vírgula; vazio = tudo no primário).
+    # Depois de uma escrita, o cliente lê do primário por REPLICA_STICKY_SECONDS
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+    
+    # SQLite: pragmas de cada conexão (WAL deixa leituras rodarem durante escritas;
+    # busy_timeout em ms espera o lock em vez de falhar com "database is locked")
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 268435456))
+    
+    # PostgreSQL/MySQL: pool de conexões por worker (pool_recycle em segundos)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
     
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173,http://localhost:3000').split(',')
@@ -21,9 +38,111 @@ class Config:
     API_PORT = int(os.getenv('API_PORT', 5000))
     API_HOST = os.getenv('API_HOST', '0.0.0.0')
     
+    # Paginação por cursor (opcional nos endpoints de listagem)
+    PAGINATION_DEFAULT_LIMIT = int(os.getenv('PAGINATION_DEFAULT_LIMIT', 50))
+    PAGINATION_MAX_LIMIT = int(os.getenv('PAGINATION_MAX_LIMIT', 200))
+    
+    # Máximo de operações por chamada de POST /api/diary/batch
+    DIARY_BATCH_MAX_OPERATIONS = int(os.getenv('DIARY_BATCH_MAX_OPERATIONS', 500))
+    
+    # Serialização JSON: 'default' (json da stdlib) ou 'orjson' (requer o pacote orjson)
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'default')
+    
+    # Métricas em /api/metrics; com METRICS_DIR cada worker grava um arquivo ali e a
+    # leitura soma todos (limpe o diretório a cada deploy). Vazio = só o processo atual
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.getenv('METRICS_DIR', '')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1))
+    
+    # Log de consultas lentas (em /api/admin/slow-queries, um buffer por worker) com o plano
+    # de execução; EXPLAIN ANALYZE (PostgreSQL/MySQL) executa a consulta de novo
+    SLOW_QUERY_LOG_ENABLED = os.getenv('SLOW_QUERY_LOG_ENABLED', 'false').lower() == 'true'
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 100))
+    SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+    SLOW_QUERY_EXPLAIN_ANALYZE = os.getenv('SLOW_QUERY_EXPLAIN_ANALYZE', 'false').lower() == 'true'
+    SLOW_QUERY_BUFFER_SIZE = int(os.getenv('SLOW_QUERY_BUFFER_SIZE', 100))
+    
+    # Hash de senhas: 'scrypt', 'pbkdf2' ou 'bcrypt', com o custo de cada um (hashes com
+    # outros parâmetros são refeitos no login). Calculado em um pool de PASSWORD_HASH_WORKERS
+    # processos por worker (0 = na thread da requisição); com o gunicorn, use --threads
+    # para que o worker atenda outras requisições enquanto espera o pool
+    PASSWORD_HASH_ALGORITHM = os.getenv('PASSWORD_HASH_ALGORITHM', 'scrypt')
+    PASSWORD_HASH_BCRYPT_ROUNDS = int(os.getenv('PASSWORD_HASH_BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_HASH_PBKDF2_ITERATIONS', 600000))
+    PASSWORD_HASH_SCRYPT_N = int(os.getenv('PASSWORD_HASH_SCRYPT_N', 32768))
+    PASSWORD_HASH_SCRYPT_R = int(os.getenv('PASSWORD_HASH_SCRYPT_R', 8))
+    PASSWORD_HASH_SCRYPT_P = int(os.getenv('PASSWORD_HASH_SCRYPT_P', 1))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 30))
+    
+    # Token das rotas /api/admin (Authorization: Bearer <token>); vazio desativa as rotas
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+    
+    # Compressão de respostas acima de COMPRESSION_MIN_SIZE bytes (br requer o pacote brotli)
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+    
+    # Exportações em streaming (linhas lidas do banco por lote)
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+    
     # Jikan API
     JIKAN_API_URL = os.getenv('JIKAN_API_URL', 'https://api.jikan.moe/v4')
     JIKAN_API_TIMEOUT = int(os.getenv('JIKAN_API_TIMEOUT', 10))
+    JIKAN_MAX_CONCURRENCY = int(os.getenv('JIKAN_MAX_CONCURRENCY', 4))
+    JIKAN_POOL_SIZE = int(os.getenv('JIKAN_POOL_SIZE', 10))
+    
+    # Limite de requisições por segundo à Jikan (0 desativa); com JIKAN_RATE_LIMIT_PATH
+    # o token bucket fica em um arquivo SQLite compartilhado por todos os workers
+    JIKAN_RATE_LIMIT = float(os.getenv('JIKAN_RATE_LIMIT', 3))
+    JIKAN_RATE_LIMIT_BURST = int(os.getenv('JIKAN_RATE_LIMIT_BURST', 3))
+    JIKAN_RATE_LIMIT_PATH = os.getenv('JIKAN_RATE_LIMIT_PATH', '')
+    JIKAN_MAX_RETRIES = int(os.getenv('JIKAN_MAX_RETRIES', 3))
+    JIKAN_MAX_RETRY_DELAY = int(os.getenv('JIKAN_MAX_RETRY_DELAY', 10))
+    
+    # Atualização do catálogo em segundo plano (ou via `flask anime refresh`)
+    CATALOGUE_REFRESH_ENABLED = os.getenv('CATALOGUE_REFRESH_ENABLED', 'false').lower() == 'true'
+    CATALOGUE_REFRESH_INTERVAL = int(os.getenv('CATALOGUE_REFRESH_INTERVAL', 600))
+    CATALOGUE_REFRESH_MAX_AGE = int(os.getenv('CATALOGUE_REFRESH_MAX_AGE', 86400))
+    CATALOGUE_REFRESH_LIMIT = int(os.getenv('CATALOGUE_REFRESH_LIMIT', 200))
+    CATALOGUE_REFRESH_BATCH_SIZE = int(os.getenv('CATALOGUE_REFRESH_BATCH_SIZE', 50))
+    CATALOGUE_REFRESH_WORKERS = int(os.getenv('CATALOGUE_REFRESH_WORKERS', 4))
+    CATALOGUE_REFRESH_LOCK_PATH = os.getenv('CATALOGUE_REFRESH_LOCK_PATH', 'instance/catalogue_refresh.lock')
+    # Espera antes de tentar de novo um anime que falhou ou que a Jikan não encontrou
+    CATALOGUE_REFRESH_RETRY_AFTER = int(os.getenv('CATALOGUE_REFRESH_RETRY_AFTER', 21600))
+    
+    # Busca local (FTS5 no SQLite, índice invertido em memória nos demais bancos):
+    # a Jikan só é consultada quando o catálogo local tem menos resultados que o mínimo
+    LOCAL_SEARCH_ENABLED = os.getenv('LOCAL_SEARCH_ENABLED', 'true').lower() == 'true'
+    LOCAL_SEARCH_MIN_RESULTS = int(os.getenv('LOCAL_SEARCH_MIN_RESULTS', 5))
+    LOCAL_SEARCH_REBUILD_INTERVAL = int(os.getenv('LOCAL_SEARCH_REBUILD_INTERVAL', 300))
+    
+    # Sugestões de títulos por trigramas (/api/animes/suggest)
+    SUGGEST_MIN_SIMILARITY = float(os.getenv('SUGGEST_MIN_SIMILARITY', 0.3))
+    SUGGEST_INDEX_REBUILD_INTERVAL = int(os.getenv('SUGGEST_INDEX_REBUILD_INTERVAL', 300))
+    
+    # Mapa mal_id <-> id em memória (validade das entradas e das ausências, em segundos)
+    ANIME_RESOLVER_MAX_ENTRIES = int(os.getenv('ANIME_RESOLVER_MAX_ENTRIES', 20000))
+    ANIME_RESOLVER_TTL = int(os.getenv('ANIME_RESOLVER_TTL', 300))
+    ANIME_RESOLVER_MISS_TTL = int(os.getenv('ANIME_RESOLVER_MISS_TTL', 30))
+    
+    # Cache de leituras do banco (usuário, anime, listas e resumo do diário), invalidado
+    # por tags a cada commit: 'memory' (só para um único processo), 'sqlite' (arquivo
+    # compartilhado em READ_CACHE_PATH), 'redis' (requer o pacote redis) ou vazio (desativado)
+    READ_CACHE_BACKEND = os.getenv('READ_CACHE_BACKEND', '')
+    READ_CACHE_TTL = int(os.getenv('READ_CACHE_TTL', 300))
+    READ_CACHE_MAX_ENTRIES = int(os.getenv('READ_CACHE_MAX_ENTRIES', 10000))
+    READ_CACHE_PATH = os.getenv('READ_CACHE_PATH', '')
+    READ_CACHE_REDIS_URL = os.getenv('READ_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    
+    # Cache de buscas na Jikan (LRU por processo + nível compartilhado opcional em SQLite)
+    SEARCH_CACHE_ENABLED = os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'true'
+    SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 3600))
+    SEARCH_CACHE_STALE_TTL = int(os.getenv('SEARCH_CACHE_STALE_TTL', 86400))
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', 1024))
+    SEARCH_CACHE_SHARED_PATH = os.getenv('SEARCH_CACHE_SHARED_PATH', '')
+    SEARCH_CACHE_SHARED_MAX_ENTRIES = int(os.getenv('SEARCH_CACHE_SHARED_MAX_ENTRIES', 10000))
 
 
 class DevelopmentConfig(Config):
@@ -47,6 +166,12 @@ class TestingConfig(Config):
     """Configuração para testes"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    DATABASE_REPLICA_URLS = []
+    SEARCH_CACHE_SHARED_PATH = ''
+    JIKAN_RATE_LIMIT_PATH = ''
+    READ_CACHE_BACKEND = 'memory'
+    PASSWORD_HASH_WORKERS = 0
+    PASSWORD_HASH_SCRYPT_N = 1024
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)
 
 
@@ -0,0 +1,169 @@
+import hmac
+from functools import wraps
+
+from flask import Blueprint, current_app, request
+
+from app.services.read_cache import get_read_cache, get_read_cache_stats
+
+admin_bp = Blueprint('admin', __name__)
+
+
+def handle_errors(f):
+    """Decorador para tratamento de erros"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        except Exception as e:
+            return {'error': 'Internal server error', 'details': str(e)}, 500
+    return decorated_function
+
+
+def require_admin_token(f):
+    """Exigir `Authorization: Bearer <ADMIN_TOKEN>` (rotas desativadas sem ADMIN_TOKEN)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = current_app.config['ADMIN_TOKEN']
+        if not token:
+            return {'error': 'Admin endpoints are disabled'}, 404
+
+        scheme, _, provided = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(provided.strip().encode(), token.encode()):
+            return {'error': 'Invalid admin token'}, 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _slow_query_log():
+    return current_app.extensions.get('slow_queries')
+
+
+@admin_bp.route('/slow-queries', methods=['GET'])
+@require_admin_token
+@handle_errors
+def list_slow_queries():
+    """
+    Listar as consultas lentas recentes deste worker
+    ---
+    tags:
+      - Admin
+    parameters:
+      - in: header
+        name: Authorization
+        type: string
+        required: true
+        description: "Bearer <ADMIN_TOKEN>"
+      - in: query
+        name: limit
+        type: integer
+        description: Máximo de entradas (mais recentes primeiro)
+    responses:
+      200:
+        description: Consultas acima de SLOW_QUERY_THRESHOLD_MS, com parâmetros, endpoint e plano
+      401:
+        description: Token inválido
+      404:
+        description: Log de consultas lentas desativado
+    """
+    log = _slow_query_log()
+    if log is None:
+        return {'error': 'Slow query log is disabled'}, 404
+
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        raise ValueError('limit must be a positive integer')
+
+    entries = log.entries(limit)
+    return {
+        'threshold_ms': current_app.config['SLOW_QUERY_THRESHOLD_MS'],
+        'count': len(entries),
+        'queries': entries
+    }, 200
+
+
+@admin_bp.route('/slow-queries', methods=['DELETE'])
+@require_admin_token
+@handle_errors
+def clear_slow_queries():
+    """
+    Limpar o buffer de consultas lentas deste worker
+    ---
+    tags:
+      - Admin
+    parameters:
+      - in: header
+        name: Authorization
+        type: string
+        required: true
+        description: "Bearer <ADMIN_TOKEN>"
+    responses:
+      200:
+        description: Buffer limpo
+      401:
+        description: Token inválido
+      404:
+        description: Log de consultas lentas desativado
+    """
+    log = _slow_query_log()
+    if log is None:
+        return {'error': 'Slow query log is disabled'}, 404
+
+    log.clear()
+    return {'message': 'Slow query log cleared'}, 200
+
+
+@admin_bp.route('/cache', methods=['GET'])
+@require_admin_token
+@handle_errors
+def read_cache_stats():
+    """
+    Contadores do cache de leituras deste worker
+    ---
+    tags:
+      - Admin
+    parameters:
+      - in: header
+        name: Authorization
+        type: string
+        required: true
+        description: "Bearer <ADMIN_TOKEN>"
+    responses:
+      200:
+        description: Hits, misses, invalidações e backend do cache de leituras
+      401:
+        description: Token inválido
+    """
+    return {'cache': get_read_cache_stats()}, 200
+
+
+@admin_bp.route('/cache', methods=['DELETE'])
+@require_admin_token
+@handle_errors
+def clear_read_cache():
+    """
+    Invalidar todo o cache de leituras (em todos os workers, num backend compartilhado)
+    ---
+    tags:
+      - Admin
+    parameters:
+      - in: header
+        name: Authorization
+        type: string
+        required: true
+        description: "Bearer <ADMIN_TOKEN>"
+    responses:
+      200:
+        description: Cache invalidado
+      401:
+        description: Token inválido
+      404:
+        description: Cache de leituras desativado
+    """
+    cache = get_read_cache()
+    if cache is None:
+        return {'error': 'Read cache is disabled'}, 404
+
+    cache.clear()
+    return {'message': 'Read cache cleared'}, 200
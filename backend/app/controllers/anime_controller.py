@@ -1,6 +1,12 @@
 from flask import Blueprint, request, jsonify
 from app.models import db, Anime
 from app.services.anime_service import AnimeService
+from app.services.refresh_service import CatalogueRefresher
+from app.utils.conditional import conditional_response, make_etag
+from app.utils.fieldsets import get_fieldset, get_serializer, load_options, select_fields
+from app.utils.pagination import get_page_params, keyset_paginate
+from app.utils.streaming import export_response
+from datetime import datetime
 from functools import wraps
 
 anime_bp = Blueprint('animes', __name__)
@@ -39,6 +45,10 @@ def search_animes():
         type: integer
         default: 12
         description: Número máximo de resultados
+      - in: query
+        name: fields
+        type: string
+        description: Campos do anime, separados por vírgula (ex. id,title,score)
     responses:
       200:
         description: Lista de animes encontrados
@@ -51,8 +61,77 @@ def search_animes():
     if not query:
         return {'error': 'Search query is required'}, 400
     
+    serialize = get_serializer(Anime, get_fieldset(Anime))
+    
     animes = anime_service.search_animes(query, limit)
-    return {'animes': [a.to_dict() for a in animes]}, 200
+    return {'animes': [serialize(a) for a in animes]}, 200
+
+
+@anime_bp.route('/suggest', methods=['GET'])
+@handle_errors
+def suggest_animes():
+    """
+    Sugerir títulos (autocomplete tolerante a erros de digitação)
+    ---
+    tags:
+      - Animes
+    parameters:
+      - in: query
+        name: q
+        type: string
+        required: true
+        description: Texto digitado
+      - in: query
+        name: limit
+        type: integer
+        default: 10
+        description: Número máximo de sugestões
+    responses:
+      200:
+        description: Títulos mais parecidos com o texto digitado
+      400:
+        description: Parâmetro de busca inválido
+    """
+    query = request.args.get('q', '').strip()
+    limit = request.args.get('limit', 10, type=int)
+    
+    if not query:
+        return {'error': 'Search query is required'}, 400
+    
+    return {'suggestions': anime_service.suggest_animes(query, min(max(limit, 1), 50))}, 200
+
+
+@anime_bp.route('/search/stats', methods=['GET'])
+@handle_errors
+def search_stats():
+    """
+    Estatísticas do cache de buscas e do cliente Jikan
+    ---
+    tags:
+      - Animes
+    responses:
+      200:
+        description: Contadores do cache de buscas e das chamadas à Jikan
+    """
+    return {
+        'cache': anime_service.get_search_cache_stats(),
+        'jikan': anime_service.get_jikan_stats()
+    }, 200
+
+
+@anime_bp.route('/refresh/stats', methods=['GET'])
+@handle_errors
+def refresh_stats():
+    """
+    Atraso da atualização do catálogo
+    ---
+    tags:
+      - Animes
+    responses:
+      200:
+        description: Idade do anime acompanhado mais desatualizado e número de animes pendentes
+    """
+    return {'refresh': CatalogueRefresher().lag()}, 200
 
 
 @anime_bp.route('', methods=['GET'])
@@ -63,12 +142,66 @@ def list_animes():
     ---
     tags:
       - Animes
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        description: Tamanho da página (ativa a paginação por cursor)
+      - in: query
+        name: cursor
+        type: string
+        description: Valor de next_cursor da página anterior
+      - in: query
+        name: fields
+        type: string
+        description: Campos do anime, separados por vírgula (ex. id,title,score)
     responses:
       200:
         description: Lista de animes
     """
-    animes = Anime.query.all()
-    return {'animes': [a.to_dict() for a in animes]}, 200
+    page = get_page_params()
+    fieldset = get_fieldset(Anime)
+    serialize = get_serializer(Anime, fieldset)
+    query = Anime.query.options(*load_options(Anime, fieldset)) if fieldset else Anime.query
+    
+    if page:
+        limit, cursor = page
+        animes, next_cursor = keyset_paginate(query, Anime.id, Anime.id, 'asc', limit, cursor)
+        return {'animes': [serialize(a) for a in animes], 'next_cursor': next_cursor}, 200
+    
+    animes = query.all()
+    return {'animes': [serialize(a) for a in animes]}, 200
+
+
+@anime_bp.route('/export', methods=['GET'])
+@handle_errors
+def export_animes():
+    """
+    Exportar o catálogo completo em streaming
+    ---
+    tags:
+      - Animes
+    parameters:
+      - in: query
+        name: format
+        type: string
+        default: ndjson
+        description: ndjson (um anime por linha) ou json (array)
+      - in: query
+        name: fields
+        type: string
+        description: Campos do anime, separados por vírgula (ex. id,title,score)
+    responses:
+      200:
+        description: Catálogo de animes
+      400:
+        description: Formato inválido
+    """
+    fmt = request.args.get('format', 'ndjson')
+    fieldset = get_fieldset(Anime)
+    
+    query = Anime.query.options(*load_options(Anime, fieldset)) if fieldset else Anime.query
+    return export_response(query.order_by(Anime.id), get_serializer(Anime, fieldset), fmt)
 
 
 @anime_bp.route('/<int:anime_id>', methods=['GET'])
@@ -84,23 +217,33 @@ def get_anime(anime_id):
         name: anime_id
         type: integer
         required: true
+      - in: query
+        name: by
+        type: string
+        enum: [mal_id, id]
+        description: Tipo do id no caminho (sem by, tenta mal_id e depois id do banco)
+      - in: query
+        name: fields
+        type: string
+        description: Campos do anime, separados por vírgula (ex. id,title,score)
     responses:
       200:
         description: Detalhes do anime
+      304:
+        description: Não modificado desde a versão do cliente (If-None-Match / If-Modified-Since)
       404:
         description: Anime não encontrado
     """
-    # Tentar buscar por mal_id primeiro (MyAnimeList ID)
-    anime = anime_service.get_anime_by_mal_id(anime_id)
-    
-    # Se nao encontrar, tentar por id do banco
-    if not anime:
-        anime = anime_service.get_anime(anime_id)
+    fieldset = get_fieldset(Anime)
+    anime = anime_service.get_anime_data(anime_id, request.args.get('by'), fieldset)
     
     if not anime:
         return {'error': 'Anime not found'}, 404
     
-    return {'anime': anime.to_dict()}, 200
+    updated_at = datetime.fromisoformat(anime['updated_at'])
+    # ?fields= muda o corpo: uma ETag por combinação de parâmetros, como no diário
+    etag = make_etag('anime', anime['id'], updated_at, request.query_string)
+    return conditional_response(etag, updated_at, lambda: ({'anime': select_fields(anime, fieldset)}, 200))
 
 
 @anime_bp.route('', methods=['POST'])
@@ -1,6 +1,11 @@
-from flask import Blueprint, request, jsonify
-from app.models import db, DiaryEntry
+from flask import Blueprint, current_app, request, jsonify
+from app.models import db, DiaryEntry, User
 from app.services.diary_service import DiaryService
+from app.services.read_cache import cached, diary_tag
+from app.utils.conditional import conditional_response, make_etag
+from app.utils.fieldsets import get_fieldset, get_serializer
+from app.utils.pagination import get_page_params
+from app.utils.streaming import export_response
 from functools import wraps
 
 diary_bp = Blueprint('diary', __name__)
@@ -41,22 +46,110 @@ def get_diary(user_id):
         name: sort_by
         type: string
         default: created_at
+        enum: [created_at, updated_at, user_score]
         description: Campo para ordenação
       - in: query
         name: order
         type: string
         default: desc
         description: Ordem (asc ou desc)
+      - in: query
+        name: limit
+        type: integer
+        description: Tamanho da página (ativa a paginação por cursor)
+      - in: query
+        name: cursor
+        type: string
+        description: Valor de next_cursor da página anterior
+      - in: query
+        name: fields
+        type: string
+        description: Campos do registro, separados por vírgula (ex. id,status,user_score)
+      - in: query
+        name: fields[anime]
+        type: string
+        description: Campos do anime embutido (ex. id,title,image_url)
+      - in: query
+        name: include
+        type: string
+        description: Relacionamentos embutidos (padrão anime; vazio para nenhum)
     responses:
       200:
         description: Diário do usuário
+      304:
+        description: Não modificado desde a versão do cliente (If-None-Match / If-Modified-Since)
     """
     status = request.args.get('status')
     sort_by = request.args.get('sort_by', 'created_at')
     order = request.args.get('order', 'desc')
+    page = get_page_params()
+    fieldset = get_fieldset(DiaryEntry)
+    serialize = get_serializer(DiaryEntry, fieldset)
+    
+    def load():
+        if page:
+            limit, cursor = page
+            entries, next_cursor = diary_service.get_user_diary_page(
+                user_id, status, sort_by, order, limit, cursor, fieldset=fieldset
+            )
+            return {'entries': [serialize(e) for e in entries], 'next_cursor': next_cursor}
+        
+        entries = diary_service.get_user_diary(user_id, status, sort_by, order, fieldset=fieldset)
+        return {'entries': [serialize(e) for e in entries]}
+    
+    def build():
+        # Um corpo por combinação de parâmetros, todos sob a tag do diário
+        return cached(f'diary:{user_id}:{request.query_string.decode()}', [diary_tag(user_id)], load), 200
+    
+    # Remoções mudam a contagem e, como toda escrita, a última alteração (pelo resumo do diário)
+    count, last_modified = diary_service.get_diary_version(user_id, status)
+    etag = make_etag('diary', user_id, count, last_modified, request.query_string)
+    return conditional_response(etag, last_modified, build)
+
+
+@diary_bp.route('/export', methods=['GET'])
+@handle_errors
+def export_diaries():
+    """
+    Exportar os registros de diário em streaming
+    ---
+    tags:
+      - Diary
+    parameters:
+      - in: query
+        name: user_id
+        type: integer
+        description: Exportar apenas o diário deste usuário
+      - in: query
+        name: format
+        type: string
+        default: ndjson
+        description: ndjson (um registro por linha) ou json (array)
+      - in: query
+        name: fields
+        type: string
+        description: Campos do registro, separados por vírgula (ex. id,status,user_score)
+      - in: query
+        name: fields[anime]
+        type: string
+        description: Campos do anime embutido (ex. id,title,image_url)
+      - in: query
+        name: include
+        type: string
+        description: Relacionamentos embutidos (padrão anime; vazio para nenhum)
+    responses:
+      200:
+        description: Registros de diário
+      400:
+        description: Formato inválido
+    """
+    fmt = request.args.get('format', 'ndjson')
+    user_id = request.args.get('user_id', type=int)
+    
+    fieldset = get_fieldset(DiaryEntry)
     
-    entries = diary_service.get_user_diary(user_id, status, sort_by, order)
-    return {'entries': [e.to_dict() for e in entries]}, 200
+    query = diary_service.get_export_query(user_id, fieldset)
+    return export_response(query, get_serializer(DiaryEntry, fieldset), fmt)
 
 
 @diary_bp.route('/<int:entry_id>', methods=['GET'])
@@ -78,7 +171,7 @@ def get_diary_entry(entry_id):
       404:
         description: Registro não encontrado
     """
-    entry = DiaryEntry.query.get(entry_id)
+    entry = db.session.get(DiaryEntry, entry_id)
     
     if not entry:
         return {'error': 'Diary entry not found'}, 404
@@ -95,6 +188,11 @@ def add_to_diary():
     tags:
       - Diary
     parameters:
+      - in: query
+        name: by
+        type: string
+        enum: [mal_id, id]
+        description: Tipo de anime_id (sem by, tenta mal_id e depois id do banco)
       - in: body
         name: body
         required: true
@@ -127,10 +225,80 @@ def add_to_diary():
     if not data or 'user_id' not in data or 'anime_id' not in data or 'user_score' not in data:
         return {'error': 'Missing required fields'}, 400
     
-    entry = diary_service.add_to_diary(data['user_id'], data)
+    entry = diary_service.add_to_diary(data['user_id'], data, request.args.get('by'))
     return {'message': 'Anime added to diary', 'entry': entry.to_dict()}, 201
 
 
+@diary_bp.route('/batch', methods=['POST'])
+@handle_errors
+def apply_diary_batch():
+    """
+    Aplicar várias operações no diário de uma vez (sincronização offline)
+    ---
+    tags:
+      - Diary
+    parameters:
+      - in: query
+        name: by
+        type: string
+        enum: [mal_id, id]
+        description: Tipo de anime_id (sem by, tenta mal_id e depois id do banco)
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            user_id:
+              type: integer
+            operations:
+              type: array
+              items:
+                type: object
+                properties:
+                  op:
+                    type: string
+                    enum: [add, update, delete]
+                  anime_id:
+                    type: integer
+                    description: Obrigatório em add (mal_id ou id do banco)
+                  entry_id:
+                    type: integer
+                    description: Obrigatório em update e delete
+                  user_score:
+                    type: integer
+                  status:
+                    type: string
+                  episodes_watched:
+                    type: integer
+                  notes:
+                    type: string
+    responses:
+      200:
+        description: Resultado de cada operação, na ordem enviada
+      400:
+        description: Dados inválidos
+      404:
+        description: Usuário não encontrado
+    """
+    data = request.get_json()
+    
+    if not data or 'user_id' not in data or not isinstance(data.get('operations'), list):
+        return {'error': 'Missing required fields'}, 400
+    
+    max_operations = current_app.config['DIARY_BATCH_MAX_OPERATIONS']
+    if len(data['operations']) > max_operations:
+        return {'error': f'Too many operations. Maximum is {max_operations}'}, 400
+    
+    if not db.session.get(User, data['user_id']):
+        return {'error': 'User not found'}, 404
+    
+    results = diary_service.apply_batch(data['user_id'], data['operations'], request.args.get('by'))
+    failed = sum(1 for result in results if result['status'] == 'error')
+    
+    return {'results': results, 'applied': len(results) - failed, 'failed': failed}, 200
+
+
 @diary_bp.route('/<int:entry_id>', methods=['PUT'])
 @handle_errors
 def update_diary_entry(entry_id):
@@ -164,7 +332,7 @@ def update_diary_entry(entry_id):
         description: Registro não encontrado
     """
     data = request.get_json()
-    entry = DiaryEntry.query.get(entry_id)
+    entry = db.session.get(DiaryEntry, entry_id)
     
     if not entry:
         return {'error': 'Diary entry not found'}, 404
@@ -193,7 +361,7 @@ def remove_from_diary(entry_id):
       404:
         description: Registro não encontrado
     """
-    entry = DiaryEntry.query.get(entry_id)
+    entry = db.session.get(DiaryEntry, entry_id)
     
     if not entry:
         return {'error': 'Diary entry not found'}, 404
@@ -222,6 +390,16 @@ def get_diary_stats(user_id):
     responses:
       200:
         description: Estatísticas do diário
+      304:
+        description: Não modificado desde a versão do cliente (If-None-Match / If-Modified-Since)
     """
-    stats = diary_service.get_stats(user_id)
-    return {'stats': stats}, 200
+    last_modified = diary_service.get_stats_last_modified(user_id)
+    
+    def build():
+        return {'stats': diary_service.get_stats(user_id)}, 200
+    
+    # Resumo ainda não materializado: sem versão para comparar
+    if last_modified is None:
+        return build()
+    
+    return conditional_response(make_etag('stats', user_id, last_modified), last_modified, build)
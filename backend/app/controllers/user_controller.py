@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from app.models import db, User
 from app.services.user_service import UserService
+from app.utils.pagination import get_page_params, keyset_paginate
 from functools import wraps
 
 user_bp = Blueprint('users', __name__)
@@ -64,6 +65,47 @@ def register():
     return {'message': 'User created successfully', 'user': user.to_dict()}, 201
 
 
+@user_bp.route('/login', methods=['POST'])
+@handle_errors
+def login():
+    """
+    Autenticar usuário
+    ---
+    tags:
+      - Users
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            username:
+              type: string
+              example: "john_doe"
+            password:
+              type: string
+              example: "password123"
+    responses:
+      200:
+        description: Credenciais válidas
+      400:
+        description: Dados inválidos
+      401:
+        description: Usuário ou senha incorretos
+    """
+    data = request.get_json()
+    
+    if not data or not all(k in data for k in ['username', 'password']):
+        return {'error': 'Missing required fields'}, 400
+    
+    user = user_service.authenticate_user(data['username'], data['password'])
+    if not user:
+        return {'error': 'Invalid username or password'}, 401
+    
+    return {'message': 'Login successful', 'user': user.to_dict()}, 200
+
+
 @user_bp.route('', methods=['GET'])
 @handle_errors
 def list_users():
@@ -72,10 +114,26 @@ def list_users():
     ---
     tags:
       - Users
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        description: Tamanho da página (ativa a paginação por cursor)
+      - in: query
+        name: cursor
+        type: string
+        description: Valor de next_cursor da página anterior
     responses:
       200:
         description: Lista de usuários
     """
+    page = get_page_params()
+    
+    if page:
+        limit, cursor = page
+        users, next_cursor = keyset_paginate(User.query, User.id, User.id, 'asc', limit, cursor)
+        return {'users': [u.to_dict() for u in users], 'next_cursor': next_cursor}, 200
+    
     users = User.query.all()
     return {'users': [u.to_dict() for u in users]}, 200
 
@@ -99,12 +157,12 @@ def get_user(user_id):
       404:
         description: Usuário não encontrado
     """
-    user = user_service.get_user(user_id)
+    user = user_service.get_user_data(user_id)
     
     if not user:
         return {'error': 'User not found'}, 404
     
-    return {'user': user.to_dict()}, 200
+    return {'user': user}, 200
 
 
 @user_bp.route('/<int:user_id>', methods=['PUT'])
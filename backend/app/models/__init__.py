@@ -1,9 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from app.models.routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 from app.models.user import User
 from app.models.anime import Anime
 from app.models.diary_entry import DiaryEntry
+from app.models.user_diary_stats import UserDiaryStats
 
-__all__ = ['User', 'Anime', 'DiaryEntry', 'db']
+__all__ = ['User', 'Anime', 'DiaryEntry', 'UserDiaryStats', 'db']
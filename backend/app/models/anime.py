@@ -1,5 +1,6 @@
 from datetime import datetime
 from app.models import db
+from app.utils.serialization import compile_serializer
 
 
 class Anime(db.Model):
@@ -16,24 +17,25 @@ class Anime(db.Model):
     status = db.Column(db.String(50), nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Última tentativa de atualização pela Jikan que falhou ou não achou o anime (ver CatalogueRefresher)
+    refresh_failed_at = db.Column(db.DateTime, nullable=True)
     
     # Relacionamentos
     diary_entries = db.relationship('DiaryEntry', backref='anime', lazy=True)
     
+    # Campos expostos pela API, na ordem de to_dict
+    SERIALIZED_FIELDS = (
+        'id', 'mal_id', 'title', 'synopsis', 'score', 'episodes',
+        'image_url', 'status', 'created_at', 'updated_at'
+    )
+    DATETIME_FIELDS = ('created_at', 'updated_at')
+    
     def to_dict(self):
         """Converte o modelo para dicionário"""
-        return {
-            'id': self.id,
-            'mal_id': self.mal_id,
-            'title': self.title,
-            'synopsis': self.synopsis,
-            'score': self.score,
-            'episodes': self.episodes,
-            'image_url': self.image_url,
-            'status': self.status,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+        return _serialize(self)
     
     def __repr__(self):
         return f'<Anime {self.title}>'
+
+
+_serialize = compile_serializer(Anime.SERIALIZED_FIELDS, Anime.DATETIME_FIELDS, name='serialize_anime')
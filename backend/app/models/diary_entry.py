@@ -1,23 +1,29 @@
 from datetime import datetime
-from sqlalchemy import UniqueConstraint, CheckConstraint
+from sqlalchemy import UniqueConstraint, CheckConstraint, Index
 from app.models import db
+from app.utils.serialization import compile_serializer
 
 
 class DiaryEntry(db.Model):
     """Modelo de entrada no diário de animes"""
     __tablename__ = 'diary_entry'
     
-    # Constraints
+    # Constraints e índices do diário (filtro por user_id e status, ordenação por
+    # SORT_KEYS com o id de desempate da paginação por cursor)
     __table_args__ = (
         UniqueConstraint('user_id', 'anime_id', name='unique_user_anime'),
         CheckConstraint('user_score >= 1 AND user_score <= 10', name='check_user_score'),
+        Index('ix_diary_entry_user_created', 'user_id', 'created_at', 'id'),
+        Index('ix_diary_entry_user_updated', 'user_id', 'updated_at', 'id'),
+        Index('ix_diary_entry_user_score', 'user_id', 'user_score', 'id'),
+        Index('ix_diary_entry_user_status_created', 'user_id', 'status', 'created_at', 'id'),
     )
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     anime_id = db.Column(db.Integer, db.ForeignKey('anime.id', ondelete='RESTRICT'), nullable=False, index=True)
     user_score = db.Column(db.Integer, nullable=False)
-    status = db.Column(db.String(50), nullable=False, default='watching', index=True)
+    status = db.Column(db.String(50), nullable=False, default='watching')
     episodes_watched = db.Column(db.Integer, nullable=True, default=0)
     notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -26,20 +32,30 @@ class DiaryEntry(db.Model):
     # Status válidos
     VALID_STATUSES = ['watching', 'completed', 'planned', 'dropped']
     
+    # Colunas aceitas em sort_by (todas cobertas por um índice com user_id)
+    SORT_KEYS = ('created_at', 'updated_at', 'user_score')
+    
+    # Campos expostos pela API, na ordem de to_dict
+    SERIALIZED_FIELDS = (
+        'id', 'user_id', 'anime_id', 'anime', 'user_score', 'status',
+        'episodes_watched', 'notes', 'created_at', 'updated_at'
+    )
+    DATETIME_FIELDS = ('created_at', 'updated_at')
+    
+    # Relacionamentos serializados, opcionais via ?include=
+    INCLUDABLE = ('anime',)
+    
     def to_dict(self):
         """Converte o modelo para dicionário"""
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'anime_id': self.anime_id,
-            'anime': self.anime.to_dict() if self.anime else None,
-            'user_score': self.user_score,
-            'status': self.status,
-            'episodes_watched': self.episodes_watched,
-            'notes': self.notes,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+        return _serialize(self)
     
     def __repr__(self):
         return f'<DiaryEntry user_id={self.user_id} anime_id={self.anime_id}>'
+
+
+_serialize = compile_serializer(
+    DiaryEntry.SERIALIZED_FIELDS,
+    DiaryEntry.DATETIME_FIELDS,
+    nested={'anime': lambda anime: anime.to_dict()},
+    name='serialize_diary_entry'
+)
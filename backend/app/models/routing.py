@@ -0,0 +1,95 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from flask import current_app, has_request_context, session as http_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# Prefixo das binds de réplica em SQLALCHEMY_BINDS (ver create_app)
+REPLICA_BIND_PREFIX = 'replica_'
+
+# Momento da última escrita do cliente, no cookie de sessão do Flask
+LAST_WRITE_KEY = 'db_last_write'
+
+_read_only = ContextVar('read_only', default=False)
+_use_primary = ContextVar('use_primary', default=False)
+
+
+def read_only(f):
+    """Marcar um método de leitura cujas consultas podem ir para uma réplica"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return decorated_function
+
+
+@contextmanager
+def use_primary():
+    """Ler do primário mesmo dentro de métodos @read_only
+
+    Usado para valores que vão para o cache de leituras: lidos de uma réplica
+    atrasada, ficariam guardados sob a versão já invalidada pela escrita.
+    """
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+class RoutingSession(Session):
+    """Sessão que envia leituras de métodos @read_only para uma réplica
+
+    Escritas (flush e DML) vão sempre para o primário. Depois de uma escrita,
+    as leituras voltam ao primário até o fim da requisição e, pelo cookie de
+    sessão, por REPLICA_STICKY_SECONDS nas requisições seguintes do mesmo
+    cliente (read-your-writes apesar do atraso de replicação).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info['has_writes'] = True
+            elif _read_only.get() and not _use_primary.get() and not self.info.get('has_writes') \
+                    and not _recently_wrote():
+                replica = self._replica()
+                if replica is not None:
+                    return replica
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica(self):
+        """Réplica desta sessão (sorteada uma vez, para leituras consistentes entre si)"""
+        keys = replica_keys(self._db.engines)
+        if not keys:
+            return None
+
+        key = self.info.get('replica')
+        if key not in keys:
+            key = self.info['replica'] = random.choice(keys)
+        return self._db.engines[key]
+
+
+def replica_keys(engines):
+    return [key for key in engines if key and key.startswith(REPLICA_BIND_PREFIX)]
+
+
+def _recently_wrote():
+    if not has_request_context():
+        return False
+    last_write = http_session.get(LAST_WRITE_KEY)
+    return last_write is not None and time.time() - last_write < current_app.config['REPLICA_STICKY_SECONDS']
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_write(session):
+    """Registrar no cookie que este cliente acabou de escrever (só com réplicas)"""
+    if session.info.get('has_writes') and has_request_context() and replica_keys(session._db.engines):
+        http_session[LAST_WRITE_KEY] = time.time()
@@ -1,6 +1,7 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from app.models import db
+from app.services.password_hasher import get_password_hasher
+from app.utils.serialization import compile_serializer
 
 
 class User(db.Model):
@@ -16,24 +17,26 @@ class User(db.Model):
     
     # Relacionamentos
     diary_entries = db.relationship('DiaryEntry', backref='user', lazy=True, cascade='all, delete-orphan')
+    diary_stats = db.relationship('UserDiaryStats', uselist=False, lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        """Hash a senha e armazena"""
-        self.password_hash = generate_password_hash(password)
+        """Hash a senha (no pool de PASSWORD_HASH_WORKERS) e armazena"""
+        self.password_hash = get_password_hasher().hash(password)
     
     def check_password(self, password):
         """Verifica se a senha está correta"""
-        return check_password_hash(self.password_hash, password)
+        return get_password_hasher().verify(self.password_hash, password)
+    
+    # Campos expostos pela API, na ordem de to_dict (nunca inclui password_hash)
+    SERIALIZED_FIELDS = ('id', 'username', 'email', 'created_at', 'updated_at')
+    DATETIME_FIELDS = ('created_at', 'updated_at')
     
     def to_dict(self):
         """Converte o modelo para dicionário"""
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+        return _serialize(self)
     
     def __repr__(self):
         return f'<User {self.username}>'
+
+
+_serialize = compile_serializer(User.SERIALIZED_FIELDS, User.DATETIME_FIELDS, name='serialize_user')
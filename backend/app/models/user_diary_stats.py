@@ -0,0 +1,37 @@
+from datetime import datetime
+from app.models import db
+
+
+class UserDiaryStats(db.Model):
+    """Estatísticas materializadas do diário de um usuário"""
+    __tablename__ = 'user_diary_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    total_animes = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    total_episodes = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    watching = db.Column(db.Integer, nullable=False, default=0)
+    planned = db.Column(db.Integer, nullable=False, default=0)
+    dropped = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Contadores mantidos por delta a cada alteração no diário
+    COUNTERS = ['total_animes', 'score_sum', 'total_episodes', 'completed', 'watching', 'planned', 'dropped']
+    
+    def to_dict(self):
+        """Converte o modelo para dicionário (mesmo formato de /api/diary/stats)"""
+        total_animes = self.total_animes or 0
+        
+        return {
+            'total_animes': total_animes,
+            'average_score': round(self.score_sum / total_animes, 2) if total_animes else 0,
+            'completed': self.completed or 0,
+            'watching': self.watching or 0,
+            'planned': self.planned or 0,
+            'dropped': self.dropped or 0,
+            'total_episodes': self.total_episodes or 0
+        }
+    
+    def __repr__(self):
+        return f'<UserDiaryStats user_id={self.user_id}>'
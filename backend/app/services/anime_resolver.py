@@ -0,0 +1,122 @@
+import time
+
+from flask import current_app
+from sqlalchemy import or_, select
+
+from app.models import db, Anime
+from app.utils.cache import LRUCache
+
+# Chaves aceitas em ?by= (sem by: mal_id primeiro, depois id do banco)
+RESOLVE_KEYS = ('mal_id', 'id')
+
+
+class AnimeIdResolver:
+    """Mapa bidirecional mal_id ↔ id em memória, carregado sob demanda
+
+    O mal_id de um anime não muda, então uma entrada só fica errada quando o
+    anime é removido (ou criado, no caso das ausências conhecidas). Escritas
+    deste processo atualizam o mapa na hora; as de outros workers aparecem
+    quando a entrada expira (`ttl`, ou `miss_ttl` para ausências). Sem `by`,
+    ausências de mal_id são sempre confirmadas no banco antes de o valor ser
+    tratado como id.
+    """
+
+    def __init__(self, max_entries=20000, ttl=300, miss_ttl=30):
+        self._maps = {key: LRUCache(max_entries) for key in RESOLVE_KEYS}
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+
+    def resolve(self, value, by=None):
+        """Anime.id para `value` (mal_id ou id, conforme `by`), ou None"""
+        return self.resolve_many([value], by).get(value)
+
+    def resolve_many(self, values, by=None):
+        """Mapear vários valores para Anime.id com no máximo uma consulta"""
+        if by is not None and by not in RESOLVE_KEYS:
+            raise ValueError(f'Invalid by. Must be one of: {", ".join(RESOLVE_KEYS)}')
+        keys = RESOLVE_KEYS if by is None else (by,)
+
+        # Só inteiros são ids válidos (e chaves estáveis no mapa)
+        values = {v for v in values if isinstance(v, int) and not isinstance(v, bool)}
+
+        # valor -> contraparte (None = ausência conhecida)
+        known = {key: {} for key in keys}
+        pending = {key: set() for key in keys}
+        for key in keys:
+            for value in values:
+                entry = self._maps[key].get(value)
+                # Sem `by`, uma ausência de mal_id em cache não autoriza cair no id do banco:
+                # outro worker pode ter criado o anime depois (e o id seria de outro anime)
+                if entry is None or (by is None and key == 'mal_id' and entry[0] is None):
+                    pending[key].add(value)
+                else:
+                    known[key][value] = entry[0]
+
+        if any(pending.values()):
+            for key, loaded in self._load(pending).items():
+                known[key].update(loaded)
+
+        resolved = {}
+        for value in values:
+            for key in keys:
+                counterpart = known[key].get(value)
+                if counterpart is not None:
+                    resolved[value] = counterpart if key == 'mal_id' else value
+                    break
+        return resolved
+
+    def _load(self, pending):
+        """Buscar os valores desconhecidos de todas as chaves em um único SELECT"""
+        conditions = [getattr(Anime, key).in_(values) for key, values in pending.items() if values]
+        rows = db.session.execute(select(Anime.mal_id, Anime.id).where(or_(*conditions))).all()
+        self.remember(rows)
+
+        loaded = {key: dict.fromkeys(values) for key, values in pending.items()}
+        for mal_id, anime_id in rows:
+            if mal_id in loaded.get('mal_id', ()):
+                loaded['mal_id'][mal_id] = anime_id
+            if anime_id in loaded.get('id', ()):
+                loaded['id'][anime_id] = mal_id
+
+        for key, values in loaded.items():
+            for value, counterpart in values.items():
+                if counterpart is None:
+                    self._set(key, value, None, self.miss_ttl)
+        return loaded
+
+    def remember(self, pairs):
+        """Registrar pares (mal_id, id) conhecidos (ex.: animes recém-salvos)"""
+        for mal_id, anime_id in pairs:
+            self._set('mal_id', mal_id, anime_id, self.ttl)
+            self._set('id', anime_id, mal_id, self.ttl)
+
+    def forget(self, mal_id, anime_id):
+        """Marcar um anime removido como ausente nas duas direções"""
+        self._set('mal_id', mal_id, None, self.miss_ttl)
+        self._set('id', anime_id, None, self.miss_ttl)
+
+    def _set(self, key, value, counterpart, ttl):
+        expires_at = time.time() + ttl
+        self._maps[key].set(value, counterpart, expires_at, expires_at)
+
+    def clear(self):
+        for mapping in self._maps.values():
+            mapping.clear()
+
+    def __len__(self):
+        return len(self._maps['mal_id'])
+
+
+def get_anime_resolver():
+    """Resolvedor de ids de anime da aplicação atual"""
+    resolver = current_app.extensions.get('anime_resolver')
+
+    if resolver is None:
+        resolver = AnimeIdResolver(
+            max_entries=current_app.config['ANIME_RESOLVER_MAX_ENTRIES'],
+            ttl=current_app.config['ANIME_RESOLVER_TTL'],
+            miss_ttl=current_app.config['ANIME_RESOLVER_MISS_TTL']
+        )
+        current_app.extensions['anime_resolver'] = resolver
+
+    return resolver
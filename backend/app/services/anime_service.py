@@ -1,75 +1,413 @@
 from app.models import db, Anime
+from app.models.routing import read_only
+from app.services.anime_resolver import get_anime_resolver
+from app.services.jikan_client import get_jikan_client
+from app.services.read_cache import anime_tag, cached
+from app.services.search_index import get_search_index
+from app.services.suggest_index import get_suggest_index
+from app.utils.cache import LRUCache, SQLiteCache, TieredCache
+from app.utils.fieldsets import get_serializer, load_options
+from app.utils.json_stream import batched
 import requests
+import threading
+from itertools import islice
+from datetime import datetime
 from flask import current_app
+from sqlalchemy import func, insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
 
 
 class AnimeService:
     """Serviço para operações de anime"""
     
+    # Bancos com INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE
+    UPSERT_DIALECTS = ('sqlite', 'postgresql', 'mysql', 'mariadb')
+    
+    def __init__(self):
+        self._search_cache = None
+        self._cache_lock = threading.Lock()
+        self._revalidating = set()
+    
     def search_animes(self, query, limit=12):
+        """Buscar animes (cache, depois índice local, depois API Jikan) e salvar no banco"""
+        query = self._normalize_query(query)
+        cache = self.get_search_cache()
+        key = f'search:{limit}:{query}'
+        
+        if cache is not None:
+            cached = cache.get(key)
+            
+            if cached is not None:
+                mal_ids, is_fresh = cached
+                animes = self._load_cached_animes(mal_ids)
+                
+                if animes is not None:
+                    # Entrada velha: responde imediatamente e revalida em segundo plano
+                    if not is_fresh:
+                        self._revalidate_in_background(key, query, limit)
+                    return animes
+        
+        # Responder do catálogo local quando ele já tem resultados suficientes
+        animes = self._search_local(query, limit)
+        if animes is not None:
+            return animes
+        
+        animes = self._fetch_and_save(query, limit)
+        if cache is not None:
+            cache.set(key, [a.mal_id for a in animes])
+        return animes
+    
+    def _search_local(self, query, limit):
+        """Buscar no índice local; None quando os resultados são poucos"""
+        config = current_app.config
+        if not config['LOCAL_SEARCH_ENABLED']:
+            return None
+        
+        anime_ids = get_search_index().search(query, limit)
+        if not anime_ids or len(anime_ids) < min(limit, config['LOCAL_SEARCH_MIN_RESULTS']):
+            return None
+        
+        animes = {a.id: a for a in Anime.query.filter(Anime.id.in_(anime_ids)).all()}
+        return [animes[anime_id] for anime_id in anime_ids if anime_id in animes]
+    
+    def suggest_animes(self, query, limit=10):
+        """Sugestões de títulos tolerantes a erros de digitação (autocomplete)"""
+        return get_suggest_index().suggest(
+            query, limit, current_app.config['SUGGEST_MIN_SIMILARITY']
+        )
+    
+    def _index_animes(self, condition):
+        """Atualizar o índice FTS5 (na transação atual) para os animes que satisfazem `condition`"""
+        db.session.flush()
+        
+        if current_app.config['LOCAL_SEARCH_ENABLED']:
+            index = get_search_index()
+            if index.transactional:
+                index.reindex(condition)
+    
+    def _index_committed_animes(self, condition):
+        """Atualizar os índices em memória, só depois do commit (um rollback não os desfaz)"""
+        if current_app.config['LOCAL_SEARCH_ENABLED']:
+            index = get_search_index()
+            if not index.transactional:
+                index.reindex(condition)
+        
+        # O índice de sugestões só é atualizado se já foi construído neste processo
+        if 'suggest_index' in current_app.extensions:
+            current_app.extensions['suggest_index'].reindex(condition)
+    
+    def _unindex_animes(self, anime_ids):
+        """Remover animes do índice FTS5, na transação atual"""
+        if current_app.config['LOCAL_SEARCH_ENABLED']:
+            index = get_search_index()
+            if index.transactional:
+                index.remove(anime_ids)
+    
+    def _unindex_committed_animes(self, anime_ids):
+        """Remover animes dos índices em memória, só depois do commit"""
+        if current_app.config['LOCAL_SEARCH_ENABLED']:
+            index = get_search_index()
+            if not index.transactional:
+                index.remove(anime_ids)
+        
+        if 'suggest_index' in current_app.extensions:
+            current_app.extensions['suggest_index'].remove(anime_ids)
+    
+    def get_search_cache(self):
+        """Obter (criando sob demanda) o cache de buscas configurado"""
+        if not current_app.config['SEARCH_CACHE_ENABLED']:
+            return None
+        
+        if self._search_cache is None:
+            with self._cache_lock:
+                if self._search_cache is None:
+                    config = current_app.config
+                    shared = None
+                    if config['SEARCH_CACHE_SHARED_PATH']:
+                        shared = SQLiteCache(
+                            config['SEARCH_CACHE_SHARED_PATH'],
+                            max_entries=config['SEARCH_CACHE_SHARED_MAX_ENTRIES'],
+                            table='search_cache'
+                        )
+                    self._search_cache = TieredCache(
+                        LRUCache(config['SEARCH_CACHE_MAX_ENTRIES']),
+                        shared,
+                        ttl=config['SEARCH_CACHE_TTL'],
+                        stale_ttl=config['SEARCH_CACHE_STALE_TTL']
+                    )
+        return self._search_cache
+    
+    def get_search_cache_stats(self):
+        """Contadores do cache de buscas"""
+        cache = self.get_search_cache()
+        return cache.stats() if cache else {'enabled': False}
+    
+    def get_jikan_stats(self):
+        """Contadores do cliente Jikan (chamadas agrupadas, limitadas e repetidas)"""
+        return get_jikan_client().stats()
+    
+    @staticmethod
+    def _normalize_query(query):
+        """Normaliza a busca para que variações triviais usem a mesma chave"""
+        return ' '.join(query.lower().split())
+    
+    def _load_cached_animes(self, mal_ids):
+        """Carregar do banco os animes de um resultado em cache, na mesma ordem"""
+        if not mal_ids:
+            return []
+        
+        animes = Anime.query.filter(Anime.mal_id.in_(mal_ids)).all()
+        by_mal_id = {a.mal_id: a for a in animes}
+        
+        # Algum anime foi removido do banco: tratar como miss
+        if len(by_mal_id) != len(set(mal_ids)):
+            return None
+        
+        return [by_mal_id[mal_id] for mal_id in mal_ids]
+    
+    def _revalidate_in_background(self, key, query, limit):
+        """Atualiza uma entrada velha do cache sem bloquear a requisição"""
+        with self._cache_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+        
+        app = current_app._get_current_object()
+        
+        def revalidate():
+            try:
+                with app.app_context():
+                    animes = self._fetch_and_save(query, limit)
+                    self._search_cache.set(key, [a.mal_id for a in animes])
+            except ValueError as e:
+                app.logger.warning('Search cache revalidation failed for %r: %s', query, e)
+            finally:
+                with self._cache_lock:
+                    self._revalidating.discard(key)
+        
+        threading.Thread(target=revalidate, daemon=True).start()
+    
+    def _fetch_and_save(self, query, limit):
         """Buscar animes na API Jikan e salvar no banco"""
         try:
             # Buscar na API Jikan
-            url = f"{current_app.config['JIKAN_API_URL']}/anime"
-            params = {'q': query, 'limit': limit}
-            timeout = current_app.config['JIKAN_API_TIMEOUT']
-            
-            response = requests.get(url, params=params, timeout=timeout)
-            response.raise_for_status()
-            
-            data = response.json()
-            animes = []
+            results = get_jikan_client().search(query, limit)
             
-            # Salvar animes no banco
-            for anime_data in data.get('data', []):
-                anime = self._save_or_update_anime(anime_data)
-                if anime:
-                    animes.append(anime)
-            
-            return animes
+            # Salvar animes no banco em uma única transação
+            return self._save_or_update_animes(results)
         except requests.RequestException as e:
             raise ValueError(f'Error fetching from Jikan API: {str(e)}')
     
+    @staticmethod
+    def _anime_fields(anime_data):
+        """Mapear um objeto da API Jikan para as colunas de Anime"""
+        return {
+            'mal_id': anime_data.get('mal_id'),
+            'title': anime_data.get('title', ''),
+            'synopsis': anime_data.get('synopsis'),
+            'score': anime_data.get('score'),
+            'episodes': anime_data.get('episodes'),
+            'image_url': (anime_data.get('images') or {}).get('jpg', {}).get('image_url'),
+            'status': anime_data.get('status')
+        }
+    
+    @staticmethod
+    def _apply_jikan_update(anime, anime_data):
+        """Atualizar informações de um anime existente (título e sinopse não são sobrescritos)"""
+        anime.score = anime_data.get('score', anime.score)
+        anime.episodes = anime_data.get('episodes', anime.episodes)
+        anime.status = anime_data.get('status', anime.status)
+    
     def _save_or_update_anime(self, anime_data):
         """Salvar ou atualizar anime no banco"""
+        animes = self._save_or_update_animes([anime_data])
+        return animes[0] if animes else None
+    
+    def _save_or_update_animes(self, items):
+        """Salvar ou atualizar vários animes no banco em uma única transação"""
+        # A Jikan pode repetir o mesmo anime em uma página de resultados
+        payloads = {}
+        for anime_data in items:
+            if anime_data.get('mal_id') is not None:
+                payloads.setdefault(anime_data['mal_id'], anime_data)
+        
+        if not payloads:
+            return []
+        
+        mal_ids = list(payloads)
+        
         try:
-            mal_id = anime_data.get('mal_id')
+            # Resolver todos os mal_ids com uma única consulta
+            existing = {a.mal_id: a for a in Anime.query.filter(Anime.mal_id.in_(mal_ids)).all()}
             
-            # Verificar se anime já existe
-            anime = Anime.query.filter_by(mal_id=mal_id).first()
+            new_rows = []
+            for mal_id, anime_data in payloads.items():
+                anime = existing.get(mal_id)
+                if anime:
+                    self._apply_jikan_update(anime, anime_data)
+                else:
+                    new_rows.append(self._anime_fields(anime_data))
             
-            if not anime:
-                anime = Anime(
-                    mal_id=mal_id,
-                    title=anime_data.get('title', ''),
-                    synopsis=anime_data.get('synopsis'),
-                    score=anime_data.get('score'),
-                    episodes=anime_data.get('episodes'),
-                    image_url=anime_data.get('images', {}).get('jpg', {}).get('image_url'),
-                    status=anime_data.get('status')
-                )
-                db.session.add(anime)
-            else:
-                # Atualizar informações
-                anime.score = anime_data.get('score', anime.score)
-                anime.episodes = anime_data.get('episodes', anime.episodes)
-                anime.status = anime_data.get('status', anime.status)
+            new_animes = Anime.mal_id.in_([row['mal_id'] for row in new_rows])
+            if new_rows:
+                db.session.flush()
+                self._insert_animes(new_rows)
+                self._index_animes(new_animes)
             
             db.session.commit()
-            return anime
         except Exception as e:
             db.session.rollback()
             raise ValueError(f'Error saving anime: {str(e)}')
+        
+        if new_rows:
+            self._index_committed_animes(new_animes)
+        
+        # Recarregar todos (novos e expirados pelo commit) com uma única consulta
+        animes = {a.mal_id: a for a in Anime.query.filter(Anime.mal_id.in_(mal_ids)).all()}
+        get_anime_resolver().remember((a.mal_id, a.id) for a in animes.values())
+        return [animes[mal_id] for mal_id in mal_ids if mal_id in animes]
+    
+    def import_animes(self, records, batch_size=1000, skip=0, on_batch=None):
+        """Importar objetos de anime no formato da Jikan (ex.: um dump), em lotes
+
+        Cada lote é gravado em uma transação, com o mesmo mapeamento de campos
+        de _save_or_update_animes. `skip` pula registros já importados (retomada)
+        e `on_batch` recebe o total processado após cada commit.
+        """
+        processed = skip
+        
+        for batch in batched(islice(records, skip, None), batch_size):
+            self._import_batch(batch)
+            processed += len(batch)
+            if on_batch:
+                on_batch(processed)
+        
+        # Índice local reconstruído uma única vez no fim
+        if current_app.config['LOCAL_SEARCH_ENABLED']:
+            get_search_index().reindex()
+            db.session.commit()
+        
+        # Ausências conhecidas podem ter sido importadas
+        get_anime_resolver().clear()
+        
+        return processed
     
-    def get_anime(self, anime_id):
-        """Obter anime por ID do banco"""
-        return Anime.query.get(anime_id)
+    def _import_batch(self, items):
+        """Gravar um lote da importação em uma única transação"""
+        if db.session.get_bind().dialect.name not in self.UPSERT_DIALECTS:
+            self._save_or_update_animes(items)
+            return
+        
+        # Um único INSERT ... ON CONFLICT por lote; o último registro de um mal_id vence
+        rows = {}
+        for anime_data in items:
+            if anime_data.get('mal_id') is not None:
+                rows[anime_data['mal_id']] = self._anime_fields(anime_data)
+        
+        if not rows:
+            return
+        
+        try:
+            self._insert_animes(list(rows.values()))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise ValueError(f'Error importing animes: {str(e)}')
     
+    def _insert_animes(self, rows):
+        """Inserir animes em lote, usando upsert quando o banco suporta"""
+        dialect = db.session.get_bind().dialect.name
+        
+        if dialect in ('sqlite', 'postgresql'):
+            insert_fn = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+            stmt = insert_fn(Anime)
+            # Outro worker pode ter inserido o mesmo anime entre o SELECT e o INSERT
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Anime.mal_id],
+                set_=self._upsert_columns(stmt.excluded)
+            )
+        elif dialect in ('mysql', 'mariadb'):
+            stmt = mysql_insert(Anime)
+            stmt = stmt.on_duplicate_key_update(self._upsert_columns(stmt.inserted))
+        else:
+            stmt = insert(Anime)
+        
+        db.session.execute(stmt, rows)
+    
+    @staticmethod
+    def _upsert_columns(incoming):
+        """Colunas atualizadas quando o anime já existe (igual a _save_or_update_animes)"""
+        # Registro sem o campo (NULL) mantém o valor atual, como em _apply_jikan_update
+        columns = {
+            name: func.coalesce(getattr(incoming, name), getattr(Anime, name))
+            for name in ('score', 'episodes', 'status')
+        }
+        columns['updated_at'] = datetime.utcnow()
+        return columns
+    
+    @read_only
+    def get_anime(self, anime_id, fieldset=None):
+        """Obter anime por ID do banco (com um Fieldset, só as colunas pedidas)"""
+        return db.session.get(Anime, anime_id, options=load_options(Anime, fieldset) if fieldset else ())
+    
+    @read_only
     def get_anime_by_mal_id(self, mal_id):
         """Obter anime por mal_id (MyAnimeList ID)"""
         return Anime.query.filter_by(mal_id=mal_id).first()
     
+    @read_only
+    def find_anime(self, anime_ref, by=None):
+        """Obter anime por mal_id ou id do banco (`by`); sem `by`, mal_id tem precedência"""
+        # Por id não há ambiguidade: a chave primária já é a busca mais barata
+        if by == 'id':
+            return db.session.get(Anime, anime_ref)
+        
+        resolver = get_anime_resolver()
+        anime_id = resolver.resolve(anime_ref, by)
+        anime = db.session.get(Anime, anime_id) if anime_id is not None else None
+        
+        # Removido por outro worker depois de entrar no mapa: resolver de novo pelo banco
+        if anime_id is not None and anime is None:
+            resolver.clear()
+            anime_id = resolver.resolve(anime_ref, by)
+            anime = db.session.get(Anime, anime_id) if anime_id is not None else None
+        
+        return anime
+    
+    def get_anime_data(self, anime_ref, by=None, fieldset=None):
+        """to_dict() do anime por mal_id ou id do banco (`by`), pelo cache de leituras
+
+        Com um Fieldset, só as colunas pedidas (e updated_at, usado na ETag) são
+        lidas e guardadas, em uma entrada do cache por combinação de campos.
+        """
+        anime_id = anime_ref if by == 'id' else get_anime_resolver().resolve(anime_ref, by)
+        if anime_id is None:
+            return None
+        
+        key = f'anime:{anime_id}'
+        if fieldset is not None:
+            fieldset = fieldset._replace(fields=tuple(
+                field for field in Anime.SERIALIZED_FIELDS if field in {*fieldset.fields, 'updated_at'}
+            ))
+            key = f'{key}:{",".join(fieldset.fields)}'
+        serialize = get_serializer(Anime, fieldset)
+        
+        def load():
+            anime = db.session.get(Anime, anime_id, options=load_options(Anime, fieldset) if fieldset else ())
+            return serialize(anime) if anime else None
+        
+        data = cached(key, [anime_tag(anime_id)], load)
+        
+        # Mapa desatualizado (anime removido por outro worker): find_anime resolve de novo
+        if data is None and by != 'id':
+            anime = self.find_anime(anime_ref, by)
+            data = serialize(anime) if anime else None
+        
+        return data
+    
     def create_anime(self, data):
         """Criar novo anime manualmente"""
         if not data.get('mal_id') or not data.get('title'):
@@ -90,15 +428,20 @@ class AnimeService:
                 status=data.get('status')
             )
             db.session.add(anime)
+            self._index_animes(Anime.mal_id == anime.mal_id)
+            pair = (anime.mal_id, anime.id)
             db.session.commit()
-            return anime
         except IntegrityError:
             db.session.rollback()
             raise ValueError('Error creating anime')
+        
+        get_anime_resolver().remember([pair])
+        self._index_committed_animes(Anime.id == pair[1])
+        return anime
     
     def update_anime(self, anime_id, data):
         """Atualizar anime"""
-        anime = Anime.query.get(anime_id)
+        anime = db.session.get(Anime, anime_id)
         
         if not anime:
             return None
@@ -117,23 +460,35 @@ class AnimeService:
             if 'status' in data:
                 anime.status = data['status']
             
+            reindex = 'title' in data or 'synopsis' in data
+            if reindex:
+                self._index_animes(Anime.id == anime_id)
+            
             db.session.commit()
-            return anime
         except Exception:
             db.session.rollback()
             raise ValueError('Error updating anime')
+        
+        if reindex:
+            self._index_committed_animes(Anime.id == anime_id)
+        return anime
     
     def delete_anime(self, anime_id):
         """Deletar anime"""
-        anime = Anime.query.get(anime_id)
+        anime = db.session.get(Anime, anime_id)
         
         if not anime:
             return False
         
         try:
+            mal_id = anime.mal_id
             db.session.delete(anime)
+            self._unindex_animes([anime_id])
             db.session.commit()
-            return True
         except Exception:
             db.session.rollback()
             return False
+        
+        get_anime_resolver().forget(mal_id, anime_id)
+        self._unindex_committed_animes([anime_id])
+        return True
@@ -1,21 +1,31 @@
-from app.models import db, DiaryEntry, Anime, User
-from sqlalchemy import func
+from app.models import db, DiaryEntry, Anime, User, UserDiaryStats
+from app.models.routing import read_only
+from app.services.anime_resolver import get_anime_resolver
+from app.services.read_cache import cached, diary_tag, stats_tag
+from app.utils.fieldsets import load_options
+from app.utils.pagination import keyset_paginate
+from datetime import datetime
+from sqlalchemy import func, insert, or_, select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 
 
 class DiaryService:
     """Serviço para operações de diário"""
     
-    def get_user_diary(self, user_id, status=None, sort_by='created_at', order='desc'):
+    # Operações aceitas por apply_batch
+    BATCH_OPERATIONS = ('add', 'update', 'delete')
+    
+    # Colunas enviadas no INSERT em bloco de apply_batch
+    INSERT_FIELDS = ('user_id', 'anime_id', 'user_score', 'status', 'episodes_watched', 'notes')
+    
+    @read_only
+    def get_user_diary(self, user_id, status=None, sort_by='created_at', order='desc', fieldset=None):
         """Obter diário completo do usuário"""
-        query = DiaryEntry.query.filter_by(user_id=user_id)
-        
-        # Filtrar por status se fornecido
-        if status and status in DiaryEntry.VALID_STATUSES:
-            query = query.filter_by(status=status)
+        sort_column = self._sort_column(sort_by)
+        query = self._user_diary_query(user_id, status, fieldset, sort_by)
         
         # Ordenar
-        sort_column = getattr(DiaryEntry, sort_by, DiaryEntry.created_at)
         if order.lower() == 'asc':
             query = query.order_by(sort_column.asc())
         else:
@@ -23,54 +33,110 @@ class DiaryService:
         
         return query.all()
     
-    def get_entry(self, entry_id, user_id):
-        """Obter um registro do diário"""
-        return DiaryEntry.query.filter_by(id=entry_id, user_id=user_id).first()
+    @read_only
+    def get_user_diary_page(self, user_id, status=None, sort_by='created_at', order='desc', limit=50, cursor=None,
+                            fieldset=None):
+        """Obter uma página do diário do usuário (paginação por cursor)"""
+        sort_column = self._sort_column(sort_by)
+        query = self._user_diary_query(user_id, status, fieldset, sort_by)
+        
+        return keyset_paginate(query, sort_column, DiaryEntry.id, order, limit, cursor)
     
-    def add_to_diary(self, user_id, data):
-        """Adicionar anime ao diário"""
-        # Validar dados
-        if not data.get('anime_id') or not data.get('user_score'):
-            raise ValueError('Missing required fields')
+    @staticmethod
+    def _sort_column(sort_by):
+        """Coluna de ordenação do diário (só SORT_KEYS, que têm índice com user_id)"""
+        if sort_by not in DiaryEntry.SORT_KEYS:
+            raise ValueError(f'Invalid sort_by. Must be one of: {", ".join(DiaryEntry.SORT_KEYS)}')
+        return getattr(DiaryEntry, sort_by)
+    
+    def _user_diary_query(self, user_id, status=None, fieldset=None, sort_by=None):
+        """Consulta base do diário do usuário, com filtro opcional de status"""
+        query = self._with_fieldset(DiaryEntry.query, fieldset, sort_by).filter_by(user_id=user_id)
+        
+        # Filtrar por status se fornecido
+        if status and status in DiaryEntry.VALID_STATUSES:
+            query = query.filter_by(status=status)
         
-        user_score = data.get('user_score')
-        if not isinstance(user_score, int) or user_score < 1 or user_score > 10:
-            raise ValueError('user_score must be between 1 and 10')
+        return query
+    
+    @read_only
+    def get_diary_version(self, user_id, status=None):
+        """(quantidade, última alteração) do diário, incluindo os animes embutidos em to_dict
         
-        status = data.get('status', 'watching')
+        Remoções não deixam updated_at em diary_entry: a última alteração também
+        considera o resumo materializado, que toda escrita no diário atualiza.
+        """
         if status not in DiaryEntry.VALID_STATUSES:
-            raise ValueError(f'Invalid status. Must be one of: {", ".join(DiaryEntry.VALID_STATUSES)}')
+            status = None
+        
+        def load():
+            stats_modified = select(UserDiaryStats.updated_at).where(
+                UserDiaryStats.user_id == user_id
+            ).scalar_subquery()
+            query = db.session.query(
+                func.count(DiaryEntry.id),
+                func.max(DiaryEntry.updated_at),
+                func.max(Anime.updated_at),
+                stats_modified
+            ).join(DiaryEntry.anime).filter(DiaryEntry.user_id == user_id)
+            
+            if status:
+                query = query.filter(DiaryEntry.status == status)
+            
+            count, *modified = query.one()
+            last_modified = max(filter(None, modified), default=None)
+            return [count, last_modified.isoformat() if last_modified else None]
+        
+        count, last_modified = cached(
+            f'diary-version:{user_id}:{status}', [diary_tag(user_id), stats_tag(user_id)], load
+        )
+        return count, datetime.fromisoformat(last_modified) if last_modified else None
+    
+    @staticmethod
+    def _with_fieldset(query, fieldset, sort_by=None):
+        """Selecionar só as colunas do Fieldset (tudo, com o anime, se None)"""
+        if fieldset is None:
+            # Carregar o anime de cada registro no mesmo SELECT (evita N+1 em to_dict)
+            return query.options(joinedload(DiaryEntry.anime))
+        return query.options(*load_options(DiaryEntry, fieldset, required=(sort_by,) if sort_by else ()))
+    
+    def get_export_query(self, user_id=None, fieldset=None):
+        """Consulta de exportação de todos os diários (ou de um usuário), em ordem de id"""
+        query = self._with_fieldset(DiaryEntry.query, fieldset)
+        
+        if user_id is not None:
+            query = query.filter_by(user_id=user_id)
         
-        # Verificar se anime existe
-        # Tentar buscar por mal_id primeiro (MyAnimeList ID)
-        anime = Anime.query.filter_by(mal_id=data['anime_id']).first()
+        return query.order_by(DiaryEntry.id)
+    
+    def get_entry(self, entry_id, user_id):
+        """Obter um registro do diário"""
+        return DiaryEntry.query.filter_by(id=entry_id, user_id=user_id).first()
+    
+    def add_to_diary(self, user_id, data, by=None):
+        """Adicionar anime ao diário (`by`: tipo de anime_id, mal_id ou id)"""
+        # Validar dados
+        self._validate_new_entry(data)
         
-        # Se nao encontrar, tentar por id do banco
-        if not anime:
-            anime = Anime.query.get(data['anime_id'])
+        # Verificar se anime existe (sem `by`, mal_id tem precedência sobre o id do banco)
+        anime_id = get_anime_resolver().resolve(data['anime_id'], by)
         
-        if not anime:
+        if anime_id is None:
             raise ValueError('Anime not found')
         
         # Verificar se já existe no diário
         existing = DiaryEntry.query.filter_by(
             user_id=user_id,
-            anime_id=anime.id
+            anime_id=anime_id
         ).first()
         
         if existing:
             raise ValueError('Anime already in diary')
         
         try:
-            entry = DiaryEntry(
-                user_id=user_id,
-                anime_id=anime.id,
-                user_score=user_score,
-                status=status,
-                episodes_watched=data.get('episodes_watched', 0),
-                notes=data.get('notes')
-            )
+            entry = self._new_entry(user_id, anime_id, data)
             db.session.add(entry)
+            self._apply_stats_delta(user_id, new=self._stats_snapshot(entry))
             db.session.commit()
             return entry
         except IntegrityError:
@@ -85,23 +151,10 @@ class DiaryService:
             return None
         
         try:
-            if 'user_score' in data:
-                score = data['user_score']
-                if not isinstance(score, int) or score < 1 or score > 10:
-                    raise ValueError('user_score must be between 1 and 10')
-                entry.user_score = score
-            
-            if 'status' in data:
-                if data['status'] not in DiaryEntry.VALID_STATUSES:
-                    raise ValueError(f'Invalid status. Must be one of: {", ".join(DiaryEntry.VALID_STATUSES)}')
-                entry.status = data['status']
-            
-            if 'episodes_watched' in data:
-                entry.episodes_watched = data['episodes_watched']
-            
-            if 'notes' in data:
-                entry.notes = data['notes']
-            
+            old = self._stats_snapshot(entry)
+            self._validate_entry_fields(data)
+            self._set_entry_fields(entry, data)
+            self._apply_stats_delta(user_id, old=old, new=self._stats_snapshot(entry))
             db.session.commit()
             return entry
         except Exception as e:
@@ -116,46 +169,308 @@ class DiaryService:
             return False
         
         try:
+            old = self._stats_snapshot(entry)
             db.session.delete(entry)
+            self._apply_stats_delta(user_id, old=old)
             db.session.commit()
             return True
         except Exception:
             db.session.rollback()
             return False
     
+    def apply_batch(self, user_id, operations, by=None):
+        """Aplicar várias operações (add/update/delete) em uma única transação
+        
+        Ids de anime e registros existentes são resolvidos com poucas consultas
+        por conjunto e cada operação é validada em memória. Operações inválidas
+        recebem um erro no seu resultado sem impedir as demais. `by` indica o
+        tipo de anime_id nos adds, como em add_to_diary.
+        """
+        adds = [op for op in operations if isinstance(op, dict) and op.get('op') == 'add']
+        changes = [op for op in operations if isinstance(op, dict) and op.get('op') in ('update', 'delete')]
+        
+        anime_ids = get_anime_resolver().resolve_many([op.get('anime_id') for op in adds], by)
+        entry_ids = {op.get('entry_id') for op in changes if self._is_id(op.get('entry_id'))}
+        
+        # Registros alvo de update/delete e os que tornariam um add duplicado, em um único SELECT
+        existing = []
+        if entry_ids or anime_ids:
+            existing = DiaryEntry.query.filter(
+                DiaryEntry.user_id == user_id,
+                or_(DiaryEntry.id.in_(entry_ids), DiaryEntry.anime_id.in_(set(anime_ids.values())))
+            ).all()
+        by_id = {entry.id: entry for entry in existing}
+        by_anime = {entry.anime_id: entry for entry in existing}
+        
+        delta = dict.fromkeys(UserDiaryStats.COUNTERS, 0)
+        results = []
+        created = {}
+        updated = {}
+        
+        for index, op in enumerate(operations):
+            try:
+                action, entry = self._apply_batch_operation(user_id, op, anime_ids, by_id, by_anime, delta)
+            except ValueError as e:
+                results.append({'index': index, 'status': 'error', 'error': str(e)})
+                continue
+            
+            result = {'index': index, 'status': action}
+            if action == 'created':
+                created[entry.anime_id] = (result, entry)
+            elif action == 'updated':
+                updated.setdefault(entry.id, []).append(result)
+            else:
+                result['entry_id'] = entry.id
+            results.append(result)
+        
+        try:
+            # Um único executemany (o INSERT do ORM seria linha a linha no SQLite);
+            # o autoflush antes dele envia updates e deletes pendentes
+            if created:
+                db.session.execute(insert(DiaryEntry), [
+                    {field: getattr(entry, field) for field in self.INSERT_FIELDS}
+                    for _, entry in created.values()
+                ])
+            self._write_stats_delta(user_id, delta)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            raise ValueError('Error applying diary batch')
+        
+        # Recarregar criados e alterados (com o anime) em um único SELECT
+        if created or updated:
+            entries = DiaryEntry.query.options(joinedload(DiaryEntry.anime)).filter(
+                DiaryEntry.user_id == user_id,
+                or_(DiaryEntry.id.in_(updated), DiaryEntry.anime_id.in_(created))
+            )
+            for entry in entries:
+                for result in updated.get(entry.id, ()):
+                    result['entry'] = entry.to_dict()
+                if entry.anime_id in created and entry.id not in updated:
+                    created[entry.anime_id][0]['entry'] = entry.to_dict()
+        
+        return results
+    
+    def _apply_batch_operation(self, user_id, op, anime_ids, by_id, by_anime, delta):
+        """Validar e aplicar uma operação do lote; retorna (ação, registro)"""
+        if not isinstance(op, dict) or op.get('op') not in self.BATCH_OPERATIONS:
+            raise ValueError(f'Invalid operation. Must be one of: {", ".join(self.BATCH_OPERATIONS)}')
+        
+        if op['op'] == 'add':
+            self._validate_new_entry(op)
+            
+            anime_id = anime_ids.get(op['anime_id']) if self._is_id(op['anime_id']) else None
+            if anime_id is None:
+                raise ValueError('Anime not found')
+            if by_anime.get(anime_id) is not None:
+                raise ValueError('Anime already in diary')
+            
+            # Inserido em bloco por apply_batch, fora da sessão
+            entry = self._new_entry(user_id, anime_id, op)
+            self._add_stats_delta(delta, new=self._stats_snapshot(entry))
+            by_anime[anime_id] = entry
+            return 'created', entry
+        
+        entry = by_id.get(op.get('entry_id')) if self._is_id(op.get('entry_id')) else None
+        if entry is None:
+            raise ValueError('Diary entry not found')
+        
+        old = self._stats_snapshot(entry)
+        
+        if op['op'] == 'delete':
+            db.session.delete(entry)
+            del by_id[entry.id]
+            by_anime[entry.anime_id] = None
+            self._add_stats_delta(delta, old=old)
+            return 'deleted', entry
+        
+        # Validar tudo antes de alterar: o registro está na sessão e vai no commit do lote
+        self._validate_entry_fields(op)
+        self._set_entry_fields(entry, op)
+        self._add_stats_delta(delta, old=old, new=self._stats_snapshot(entry))
+        return 'updated', entry
+    
+    @read_only
+    def get_stats_last_modified(self, user_id):
+        """Última alteração do resumo materializado (None se ainda não existe)"""
+        def load():
+            stats = db.session.get(UserDiaryStats, user_id)
+            return stats.updated_at.isoformat() if stats else None
+        
+        last_modified = cached(f'stats-modified:{user_id}', [stats_tag(user_id)], load)
+        return datetime.fromisoformat(last_modified) if last_modified else None
+    
+    @read_only
     def get_stats(self, user_id):
         """Obter estatísticas do diário do usuário"""
-        entries = DiaryEntry.query.filter_by(user_id=user_id).all()
-        
-        if not entries:
-            return {
-                'total_animes': 0,
-                'average_score': 0,
-                'completed': 0,
-                'watching': 0,
-                'planned': 0,
-                'dropped': 0,
-                'total_episodes': 0
-            }
-        
-        total_animes = len(entries)
-        average_score = sum(e.user_score for e in entries) / total_animes if entries else 0
-        
-        status_counts = {
-            'completed': sum(1 for e in entries if e.status == 'completed'),
-            'watching': sum(1 for e in entries if e.status == 'watching'),
-            'planned': sum(1 for e in entries if e.status == 'planned'),
-            'dropped': sum(1 for e in entries if e.status == 'dropped')
-        }
+        def load():
+            # Leitura por chave primária do resumo materializado
+            stats = db.session.get(UserDiaryStats, user_id)
+            
+            # Resumo ainda não materializado (ex.: diário anterior à tabela)
+            if stats is None:
+                stats = UserDiaryStats(user_id=user_id, **self._aggregate_stats(user_id))
+            
+            return stats.to_dict()
+        
+        return cached(f'stats:{user_id}', [stats_tag(user_id)], load)
+    
+    def rebuild_stats(self, fix=True):
+        """Recalcular os resumos a partir de diary_entry e reportar divergências"""
+        rows = db.session.query(
+            DiaryEntry.user_id,
+            DiaryEntry.status,
+            func.count(DiaryEntry.id),
+            func.sum(DiaryEntry.user_score),
+            func.sum(func.coalesce(DiaryEntry.episodes_watched, 0))
+        ).group_by(DiaryEntry.user_id, DiaryEntry.status).all()
         
-        total_episodes = sum(e.episodes_watched or 0 for e in entries)
+        expected = {}
+        for user_id, *aggregate in rows:
+            counters = expected.setdefault(user_id, dict.fromkeys(UserDiaryStats.COUNTERS, 0))
+            self._fold_aggregate_row(counters, *aggregate)
         
-        return {
-            'total_animes': total_animes,
-            'average_score': round(average_score, 2),
-            'completed': status_counts['completed'],
-            'watching': status_counts['watching'],
-            'planned': status_counts['planned'],
-            'dropped': status_counts['dropped'],
-            'total_episodes': total_episodes
+        stored = {s.user_id: s for s in UserDiaryStats.query.all()}
+        drift = []
+        
+        for user_id in sorted(set(expected) | set(stored)):
+            counters = expected.get(user_id, dict.fromkeys(UserDiaryStats.COUNTERS, 0))
+            stats = stored.get(user_id)
+            
+            for field in UserDiaryStats.COUNTERS:
+                current = getattr(stats, field) if stats else None
+                if current != counters[field]:
+                    drift.append({
+                        'user_id': user_id,
+                        'field': field,
+                        'stored': current,
+                        'expected': counters[field]
+                    })
+            
+            if fix:
+                if stats is None:
+                    db.session.add(UserDiaryStats(user_id=user_id, **counters))
+                else:
+                    for field, value in counters.items():
+                        setattr(stats, field, value)
+        
+        if fix:
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise ValueError(f'Error rebuilding stats: {str(e)}')
+        
+        return drift
+    
+    def _aggregate_stats(self, user_id):
+        """Calcular os contadores do diário com uma única consulta agregada por status"""
+        rows = db.session.query(
+            DiaryEntry.status,
+            func.count(DiaryEntry.id),
+            func.sum(DiaryEntry.user_score),
+            func.sum(func.coalesce(DiaryEntry.episodes_watched, 0))
+        ).filter(DiaryEntry.user_id == user_id).group_by(DiaryEntry.status).all()
+        
+        counters = dict.fromkeys(UserDiaryStats.COUNTERS, 0)
+        for row in rows:
+            self._fold_aggregate_row(counters, *row)
+        return counters
+    
+    @staticmethod
+    def _fold_aggregate_row(counters, status, count, score_sum, episodes):
+        """Somar uma linha (status, count, soma das notas, soma dos episódios) aos contadores"""
+        # int() normaliza os Decimal que alguns bancos retornam para SUM
+        if status in DiaryEntry.VALID_STATUSES:
+            counters[status] += int(count)
+        counters['total_animes'] += int(count)
+        counters['score_sum'] += int(score_sum or 0)
+        counters['total_episodes'] += int(episodes or 0)
+    
+    @staticmethod
+    def _is_id(value):
+        """Ids válidos para consultas IN (inteiros, exceto bool)"""
+        return isinstance(value, int) and not isinstance(value, bool)
+    
+    @classmethod
+    def _validate_new_entry(cls, data):
+        """Validar os dados de um novo registro (mesmas regras de add_to_diary)"""
+        if not data.get('anime_id') or not data.get('user_score'):
+            raise ValueError('Missing required fields')
+        cls._validate_entry_fields(data)
+    
+    @classmethod
+    def _validate_entry_fields(cls, data):
+        """Validar nota, status e episódios, se presentes, antes de alterar o registro"""
+        if 'user_score' in data:
+            score = data['user_score']
+            if not cls._is_id(score) or score < 1 or score > 10:
+                raise ValueError('user_score must be between 1 and 10')
+        
+        if 'status' in data and data['status'] not in DiaryEntry.VALID_STATUSES:
+            raise ValueError(f'Invalid status. Must be one of: {", ".join(DiaryEntry.VALID_STATUSES)}')
+        
+        # Nulo conta como 0 no resumo (a coluna aceita NULL)
+        episodes = data.get('episodes_watched')
+        if episodes is not None and (not cls._is_id(episodes) or episodes < 0):
+            raise ValueError('episodes_watched must be a non-negative integer')
+    
+    @staticmethod
+    def _new_entry(user_id, anime_id, data):
+        return DiaryEntry(
+            user_id=user_id,
+            anime_id=anime_id,
+            user_score=data['user_score'],
+            status=data.get('status', 'watching'),
+            episodes_watched=data.get('episodes_watched', 0),
+            notes=data.get('notes')
+        )
+    
+    @staticmethod
+    def _set_entry_fields(entry, data):
+        for field in ('user_score', 'status', 'episodes_watched', 'notes'):
+            if field in data:
+                setattr(entry, field, data[field])
+    
+    @staticmethod
+    def _stats_snapshot(entry):
+        """Valores de um registro que contribuem para o resumo do diário"""
+        return entry.status, entry.user_score, int(entry.episodes_watched or 0)
+    
+    def _apply_stats_delta(self, user_id, old=None, new=None):
+        """Atualizar o resumo materializado na mesma transação, por delta"""
+        delta = dict.fromkeys(UserDiaryStats.COUNTERS, 0)
+        self._add_stats_delta(delta, old, new)
+        self._write_stats_delta(user_id, delta)
+    
+    @staticmethod
+    def _add_stats_delta(delta, old=None, new=None):
+        """Somar a `delta` a troca do snapshot `old` pelo `new`"""
+        for snapshot, sign in ((old, -1), (new, 1)):
+            if snapshot is None:
+                continue
+            status, score, episodes = snapshot
+            delta['total_animes'] += sign
+            delta['score_sum'] += sign * score
+            delta['total_episodes'] += sign * episodes
+            if status in DiaryEntry.VALID_STATUSES:
+                delta[status] += sign
+    
+    def _write_stats_delta(self, user_id, delta):
+        """Aplicar os contadores acumulados em `delta` com um único UPDATE"""
+        changes = {
+            getattr(UserDiaryStats, field): getattr(UserDiaryStats, field) + value
+            for field, value in delta.items() if value
         }
+        
+        # Ex.: apenas as notas mudaram
+        if not changes:
+            return
+        
+        changes[UserDiaryStats.updated_at] = datetime.utcnow()
+        db.session.flush()
+        updated = UserDiaryStats.query.filter_by(user_id=user_id).update(changes)
+        
+        # Primeiro registro do resumo: calcular do zero (o flush já inclui esta alteração)
+        if not updated:
+            db.session.add(UserDiaryStats(user_id=user_id, **self._aggregate_stats(user_id)))
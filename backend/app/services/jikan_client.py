@@ -0,0 +1,228 @@
+import asyncio
+import contextvars
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+
+from app.utils.metrics import record_jikan_call
+from app.utils.rate_limit import SQLiteTokenBucket, TokenBucket
+from app.utils.single_flight import SingleFlight
+
+
+class JikanClient:
+    """Cliente HTTP da API Jikan com sessão persistente e concorrência limitada"""
+    
+    def __init__(self, base_url, timeout=10, max_concurrency=4, pool_size=10,
+                 rate_limiter=None, max_retries=3, backoff=0.5, max_retry_delay=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_retry_delay = max_retry_delay
+        
+        # Sessão única: conexões keep-alive reaproveitadas entre requisições
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._single_flight = SingleFlight()
+        self._stats_lock = threading.Lock()
+        self._counters = {'requests': 0, 'throttled': 0, 'retried': 0, 'throttle_wait_seconds': 0.0}
+    
+    @classmethod
+    def from_config(cls, config):
+        rate_limiter = None
+        if config['JIKAN_RATE_LIMIT'] > 0:
+            if config['JIKAN_RATE_LIMIT_PATH']:
+                # Limite compartilhado por todos os workers
+                rate_limiter = SQLiteTokenBucket(
+                    config['JIKAN_RATE_LIMIT_PATH'],
+                    config['JIKAN_RATE_LIMIT'],
+                    config['JIKAN_RATE_LIMIT_BURST'],
+                    name='jikan'
+                )
+            else:
+                rate_limiter = TokenBucket(config['JIKAN_RATE_LIMIT'], config['JIKAN_RATE_LIMIT_BURST'])
+        
+        return cls(
+            config['JIKAN_API_URL'],
+            timeout=config['JIKAN_API_TIMEOUT'],
+            max_concurrency=config['JIKAN_MAX_CONCURRENCY'],
+            pool_size=config['JIKAN_POOL_SIZE'],
+            rate_limiter=rate_limiter,
+            max_retries=config['JIKAN_MAX_RETRIES'],
+            max_retry_delay=config['JIKAN_MAX_RETRY_DELAY']
+        )
+    
+    def get(self, path, params=None):
+        """GET na API Jikan
+
+        Chamadas idênticas simultâneas compartilham uma única requisição; cada
+        requisição consome um token do rate limiter e é repetida em caso de 429.
+        """
+        key = (path, tuple(sorted((params or {}).items())))
+        started = time.perf_counter()
+        try:
+            return self._single_flight.do(key, lambda: self._get_with_retry(path, params))
+        finally:
+            record_jikan_call(time.perf_counter() - started)
+    
+    def _get_with_retry(self, path, params):
+        # Esperas pelo rate limiter e pelos 429 somam no máximo `timeout` segundos
+        deadline = time.monotonic() + self.timeout
+        attempt = 0
+        
+        while True:
+            self._throttle(deadline)
+            
+            # No máximo max_concurrency chamadas simultâneas por processo
+            with self._semaphore:
+                response = self.session.get(f'{self.base_url}{path}', params=params, timeout=self.timeout)
+            self._count('requests')
+            
+            if response.status_code == 429 and attempt < self.max_retries:
+                delay = self._retry_delay(response, attempt + 1)
+                # Sem tempo para outra tentativa: o 429 segue como erro
+                if time.monotonic() + delay <= deadline:
+                    attempt += 1
+                    self._count('retried')
+                    time.sleep(delay)
+                    continue
+            
+            response.raise_for_status()
+            return response.json()
+    
+    def _throttle(self, deadline):
+        """Esperar por um token do rate limiter (no máximo até `deadline`)"""
+        if self.rate_limiter is None:
+            return
+        
+        try:
+            waited = self.rate_limiter.acquire(timeout=max(deadline - time.monotonic(), 0))
+        except sqlite3.OperationalError as e:
+            # Arquivo do limite compartilhado travado (database is locked): mesmo caminho do timeout
+            self._count('throttled')
+            raise requests.Timeout(f'Jikan rate limit unavailable: {e}') from e
+        if waited is None:
+            self._count('throttled')
+            raise requests.Timeout('Timed out waiting for the Jikan rate limit')
+        if waited > 0:
+            self._count('throttled')
+            self._count('throttle_wait_seconds', waited)
+    
+    def _retry_delay(self, response, attempt):
+        """Usar Retry-After quando presente; senão backoff exponencial com jitter"""
+        retry_after = response.headers.get('Retry-After')
+        delay = None
+        
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+        
+        if delay is None:
+            delay = self.backoff * 2 ** (attempt - 1) * (1 + random.random())
+        
+        return min(max(delay, 0), self.max_retry_delay)
+    
+    def _count(self, name, value=1):
+        with self._stats_lock:
+            self._counters[name] += value
+    
+    def stats(self):
+        """Contadores de chamadas agrupadas, limitadas e repetidas"""
+        with self._stats_lock:
+            stats = dict(self._counters)
+        stats['coalesced'] = self._single_flight.coalesced
+        stats['throttle_wait_seconds'] = round(stats['throttle_wait_seconds'], 3)
+        return stats
+    
+    def search(self, query, limit=12):
+        """Buscar animes por nome"""
+        return self.get('/anime', {'q': query, 'limit': limit}).get('data', [])
+    
+    def get_anime(self, mal_id):
+        """Obter os detalhes de um anime pelo mal_id"""
+        return self.get(f'/anime/{mal_id}').get('data')
+    
+    def get_animes(self, mal_ids):
+        """Obter os detalhes de vários animes em paralelo (na ordem dos mal_ids)"""
+        return self.gather(*[lambda mal_id=mal_id: self.get_anime(mal_id) for mal_id in mal_ids])
+    
+    def gather(self, *calls):
+        """Executar chamadas (funções sem argumentos) em paralelo e retornar os resultados em ordem"""
+        # Cada chamada roda numa cópia do contexto, para as métricas da requisição atual
+        futures = [self._get_executor().submit(contextvars.copy_context().run, call) for call in calls]
+        return [future.result() for future in futures]
+    
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_concurrency,
+                        thread_name_prefix='jikan'
+                    )
+        return self._executor
+    
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+class AsyncJikanClient:
+    """Variante asyncio do cliente Jikan
+
+    As chamadas HTTP usam a sessão do JikanClient em threads (asyncio.to_thread),
+    então o pool de conexões é o mesmo; um asyncio.Semaphore limita a concorrência.
+    """
+    
+    def __init__(self, client, max_concurrency=None):
+        self.client = client
+        self._semaphore = asyncio.Semaphore(max_concurrency or client.max_concurrency)
+    
+    async def get(self, path, params=None):
+        async with self._semaphore:
+            return await asyncio.to_thread(self.client.get, path, params)
+    
+    async def search(self, query, limit=12):
+        data = await self.get('/anime', {'q': query, 'limit': limit})
+        return data.get('data', [])
+    
+    async def get_anime(self, mal_id):
+        data = await self.get(f'/anime/{mal_id}')
+        return data.get('data')
+    
+    async def get_animes(self, mal_ids):
+        return await asyncio.gather(*[self.get_anime(mal_id) for mal_id in mal_ids])
+
+
+def get_jikan_client():
+    """Cliente Jikan da aplicação atual (um por processo, criado sob demanda)"""
+    client = current_app.extensions.get('jikan_client')
+    
+    if client is None:
+        client = JikanClient.from_config(current_app.config)
+        current_app.extensions['jikan_client'] = client
+    
+    return client
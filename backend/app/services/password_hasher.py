@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+try:
+    import bcrypt as _bcrypt
+except ImportError:  # pragma: no cover - dependência opcional
+    _bcrypt = None
+
+# Valores aceitos em PASSWORD_HASH_ALGORITHM
+PASSWORD_HASH_ALGORITHMS = ('scrypt', 'pbkdf2', 'bcrypt')
+
+
+# Funções executadas nos processos do pool (precisam ser importáveis pelo nome).
+# `method` segue o formato do werkzeug: 'scrypt:n:r:p', 'pbkdf2:sha256:iterações'
+# e, para o bcrypt, 'bcrypt:rounds'.
+
+def _hash_password(method, password):
+    if method.startswith('bcrypt:'):
+        if _bcrypt is None:
+            raise RuntimeError('bcrypt is not installed')
+        # O bcrypt considera só os primeiros 72 bytes da senha
+        rounds = int(method.split(':')[1])
+        return _bcrypt.hashpw(password.encode(), _bcrypt.gensalt(rounds)).decode()
+    return generate_password_hash(password, method=method)
+
+
+def _verify_password(password_hash, password):
+    if password_hash.startswith('$2'):
+        if _bcrypt is None:
+            raise RuntimeError('bcrypt is not installed')
+        return _bcrypt.checkpw(password.encode(), password_hash.encode())
+    return check_password_hash(password_hash, password)
+
+
+def hash_method(password_hash):
+    """Algoritmo e parâmetros de um hash armazenado, no formato de `method`"""
+    if password_hash.startswith('$2'):
+        # $2b$12$<salt+hash>
+        return f'bcrypt:{int(password_hash.split("$")[2])}'
+    return password_hash.split('$', 1)[0]
+
+
+def _pool_context():
+    # Sem fork: o worker já tem threads (métricas, Jikan) quando o pool é criado
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    # O servidor importa este módulo uma vez; cada processo do pool nasce dele já pronto
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+class PasswordHasher:
+    """Hash e verificação de senhas em um pool de processos limitado
+
+    Com `workers` = 0 o cálculo roda na própria thread da requisição. O pool
+    é criado sob demanda em cada processo (workers do gunicorn não herdam o do pai).
+    """
+
+    def __init__(self, method, workers=0, timeout=30):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self._dummy_hash = None
+
+    def hash(self, password):
+        return self._run(_hash_password, self.method, password)
+
+    def verify(self, password_hash, password):
+        if not password_hash:
+            return False
+        return self._run(_verify_password, password_hash, password)
+
+    def verify_dummy(self, password):
+        """Verificação contra um hash qualquer, para que usuários inexistentes custem o mesmo"""
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hash(os.urandom(16).hex())
+        self.verify(self._dummy_hash, password)
+        return False
+
+    def needs_rehash(self, password_hash):
+        """True se o hash foi gerado com outro algoritmo ou custo"""
+        return hash_method(password_hash) != self.method
+
+    def _run(self, function, *args):
+        if not self.workers:
+            return function(*args)
+
+        try:
+            return self._get_executor().submit(function, *args).result(self.timeout)
+        except BrokenProcessPool:
+            # Um processo do pool morreu: recriar o pool e tentar uma vez mais
+            self._reset_executor()
+            return self._get_executor().submit(function, *args).result(self.timeout)
+
+    def _get_executor(self):
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._executor_lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+                    self._executor_pid = pid
+        return self._executor
+
+    def _reset_executor(self):
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._executor_pid == os.getpid():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        self._reset_executor()
+
+
+def _build_password_hasher(config):
+    algorithm = config['PASSWORD_HASH_ALGORITHM']
+    if algorithm not in PASSWORD_HASH_ALGORITHMS:
+        raise ValueError(f'Invalid PASSWORD_HASH_ALGORITHM. Must be one of: {", ".join(PASSWORD_HASH_ALGORITHMS)}')
+
+    if algorithm == 'bcrypt':
+        if _bcrypt is None:
+            raise ValueError('PASSWORD_HASH_ALGORITHM=bcrypt requires the bcrypt package')
+        method = f'bcrypt:{config["PASSWORD_HASH_BCRYPT_ROUNDS"]}'
+    elif algorithm == 'pbkdf2':
+        method = f'pbkdf2:sha256:{config["PASSWORD_HASH_PBKDF2_ITERATIONS"]}'
+    else:
+        method = (
+            f'scrypt:{config["PASSWORD_HASH_SCRYPT_N"]}'
+            f':{config["PASSWORD_HASH_SCRYPT_R"]}:{config["PASSWORD_HASH_SCRYPT_P"]}'
+        )
+
+    return PasswordHasher(method, workers=config['PASSWORD_HASH_WORKERS'], timeout=config['PASSWORD_HASH_TIMEOUT'])
+
+
+def get_password_hasher():
+    """Hasher de senhas da aplicação atual"""
+    extensions = current_app.extensions
+
+    if 'password_hasher' not in extensions:
+        extensions['password_hasher'] = _build_password_hasher(current_app.config)
+
+    return extensions['password_hasher']
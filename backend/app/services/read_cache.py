@@ -0,0 +1,253 @@
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+
+from app.models import Anime, DiaryEntry, User, UserDiaryStats
+from app.models.routing import RoutingSession, use_primary
+from app.utils.cache import CACHE_ERRORS, LRUCache, RedisCache, SQLiteCache, TaggedCache, redis
+
+# Valores aceitos em READ_CACHE_BACKEND (vazio desativa o cache)
+READ_CACHE_BACKENDS = ('memory', 'sqlite', 'redis')
+
+# Tags alteradas na transação atual, invalidadas só depois do commit
+PENDING_TAGS_KEY = 'read_cache_tags'
+
+# Tabelas cujas escritas invalidam o cache
+_TRACKED_TABLES = {model.__tablename__: model for model in (User, Anime, DiaryEntry, UserDiaryStats)}
+
+
+def user_tag(user_id):
+    return f'user:{user_id}'
+
+
+def anime_tag(anime_id):
+    return f'anime:{anime_id}'
+
+
+def diary_tag(user_id):
+    """Listas e versão do diário (inclui os animes embutidos nos registros)"""
+    return f'diary:{user_id}'
+
+
+def stats_tag(user_id):
+    return f'stats:{user_id}'
+
+
+def _build_read_cache(config, logger):
+    backend = config['READ_CACHE_BACKEND']
+    if not backend:
+        return None
+    if backend not in READ_CACHE_BACKENDS:
+        raise ValueError(f'Invalid READ_CACHE_BACKEND. Must be one of: {", ".join(READ_CACHE_BACKENDS)}')
+
+    if backend == 'memory':
+        storage = LRUCache(config['READ_CACHE_MAX_ENTRIES'])
+    elif backend == 'sqlite':
+        if not config['READ_CACHE_PATH']:
+            raise ValueError('READ_CACHE_BACKEND=sqlite requires READ_CACHE_PATH')
+        storage = SQLiteCache(config['READ_CACHE_PATH'], max_entries=config['READ_CACHE_MAX_ENTRIES'], table='read_cache')
+    else:
+        if redis is None:
+            logger.warning('READ_CACHE_BACKEND=redis but redis is not installed; read cache disabled')
+            return None
+        storage = RedisCache.from_url(config['READ_CACHE_REDIS_URL'], prefix='read_cache:')
+
+    return TaggedCache(storage, ttl=config['READ_CACHE_TTL'])
+
+
+def get_read_cache():
+    """Cache de leituras da aplicação atual (None se desativado)"""
+    extensions = current_app.extensions
+
+    if 'read_cache' not in extensions:
+        extensions['read_cache'] = _build_read_cache(current_app.config, current_app.logger)
+
+    return extensions['read_cache']
+
+
+def cached(key, tags, compute):
+    """compute() através do cache de leituras (direto, se o cache está desativado)
+
+    No miss, compute() lê do primário: valores de uma réplica atrasada
+    ficariam guardados sob a versão nova das tags.
+    """
+    cache = get_read_cache()
+    if cache is None:
+        return compute()
+
+    def compute_on_primary():
+        with use_primary():
+            return compute()
+
+    return cache.get_or_set(key, tags, compute_on_primary)
+
+
+def get_read_cache_stats():
+    cache = get_read_cache()
+    return cache.stats() if cache else {'enabled': False}
+
+
+# Invalidação: eventos do SQLAlchemy juntam as tags afetadas em session.info
+# e o after_commit troca as versões (antes do commit, uma leitura concorrente
+# guardaria o valor antigo sob a versão nova).
+
+def _pending_tags(session):
+    if session is None or not has_app_context() or get_read_cache() is None:
+        return None
+    return session.info.setdefault(PENDING_TAGS_KEY, set())
+
+
+def _add_tags(session, tags):
+    pending = _pending_tags(session)
+    if pending is not None:
+        pending.update(tags)
+
+
+def _anime_dependents(connection, condition):
+    """Tags dos animes que satisfazem `condition` e dos diários que os contêm"""
+    rows = connection.execute(
+        select(Anime.id, DiaryEntry.user_id)
+        .outerjoin(DiaryEntry, DiaryEntry.anime_id == Anime.id)
+        .where(condition)
+    )
+    tags = set()
+    for anime_id, user_id in rows:
+        tags.add(anime_tag(anime_id))
+        if user_id is not None:
+            tags.add(diary_tag(user_id))
+    return tags
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+def _user_changed(mapper, connection, user):
+    _add_tags(Session.object_session(user), {user_tag(user.id)})
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, user):
+    # Diário e resumo saem junto pelo ON DELETE CASCADE
+    _add_tags(Session.object_session(user), {user_tag(user.id), diary_tag(user.id), stats_tag(user.id)})
+
+
+@event.listens_for(Anime, 'after_insert')
+@event.listens_for(Anime, 'after_delete')
+def _anime_inserted_or_deleted(mapper, connection, anime):
+    # Inserido ainda não está em diários; removido não pode estar (RESTRICT)
+    _add_tags(Session.object_session(anime), {anime_tag(anime.id)})
+
+
+@event.listens_for(Anime, 'after_update')
+def _anime_updated(mapper, connection, anime):
+    session = Session.object_session(anime)
+    if _pending_tags(session) is not None:
+        _add_tags(session, {anime_tag(anime.id)} | _anime_dependents(connection, Anime.id == anime.id))
+
+
+@event.listens_for(DiaryEntry, 'after_insert')
+@event.listens_for(DiaryEntry, 'after_update')
+@event.listens_for(DiaryEntry, 'after_delete')
+def _diary_entry_changed(mapper, connection, entry):
+    _add_tags(Session.object_session(entry), {diary_tag(entry.user_id), stats_tag(entry.user_id)})
+
+
+@event.listens_for(UserDiaryStats, 'after_insert')
+@event.listens_for(UserDiaryStats, 'after_update')
+@event.listens_for(UserDiaryStats, 'after_delete')
+def _stats_changed(mapper, connection, stats):
+    _add_tags(Session.object_session(stats), {stats_tag(stats.user_id)})
+
+
+def _criteria_values(whereclause, column):
+    """Valores de `column` fixados por `= :x` ou `IN (...)` nos critérios AND (None se não há)"""
+    if whereclause is None:
+        return None
+
+    if isinstance(whereclause, BooleanClauseList) and whereclause.operator is operators.and_:
+        clauses = whereclause.clauses
+    else:
+        clauses = [whereclause]
+
+    for clause in clauses:
+        if not (isinstance(clause, BinaryExpression) and isinstance(clause.right, BindParameter)):
+            continue
+        if getattr(clause.left, 'key', None) != column.key or getattr(clause.left, 'table', None) is not column.table:
+            continue
+        value = clause.right.effective_value
+        if clause.operator is operators.eq:
+            return {value}
+        if clause.operator is operators.in_op:
+            return set(value)
+    return None
+
+
+def _user_tags(user_ids, *kinds):
+    return {kind(user_id) for user_id in user_ids for kind in kinds}
+
+
+def _bulk_tags(state):
+    """Tags de um INSERT/UPDATE/DELETE em lote (sem eventos de mapper); None = desconhecidas"""
+    # Pela tabela alvo: bind_mapper também aponta para modelos citados só em subconsultas
+    model = _TRACKED_TABLES.get(getattr(state.statement.table, 'name', None))
+    if model is None:
+        return set()
+
+    if state.is_insert:
+        rows = state.parameters if isinstance(state.parameters, list) else [state.parameters or {}]
+        if model is Anime:
+            # Upsert da importação: mudam os animes que já existiam (por mal_id)
+            mal_ids = [row['mal_id'] for row in rows if row.get('mal_id') is not None]
+            return _anime_dependents(state.session.connection(), Anime.mal_id.in_(mal_ids)) if mal_ids else set()
+        if model is User:
+            return set()
+        user_ids = {row.get('user_id') for row in rows}
+        return None if None in user_ids else _user_tags(user_ids, diary_tag, stats_tag)
+
+    # UPDATE/DELETE: linhas identificadas pelos critérios de chave do WHERE
+    whereclause = state.statement.whereclause
+    if model is Anime:
+        anime_ids = _criteria_values(whereclause, Anime.__table__.c.id)
+        if anime_ids is None:
+            return None
+        return {anime_tag(anime_id) for anime_id in anime_ids} | _anime_dependents(
+            state.session.connection(), Anime.id.in_(anime_ids)
+        )
+    if model is User:
+        user_ids = _criteria_values(whereclause, User.__table__.c.id)
+        return None if user_ids is None else _user_tags(user_ids, user_tag, diary_tag, stats_tag)
+    user_ids = _criteria_values(whereclause, model.__table__.c.user_id)
+    return None if user_ids is None else _user_tags(user_ids, diary_tag, stats_tag)
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _bulk_changed(state):
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    if _pending_tags(state.session) is None:
+        return
+
+    tags = _bulk_tags(state)
+    # Linhas afetadas desconhecidas: invalidar tudo
+    _add_tags(state.session, {TaggedCache.GLOBAL_TAG} if tags is None else tags)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _invalidate_committed(session):
+    tags = session.info.pop(PENDING_TAGS_KEY, None)
+    cache = get_read_cache() if tags and has_app_context() else None
+    if cache is None:
+        return
+
+    try:
+        cache.invalidate(tags)
+    except CACHE_ERRORS as e:
+        current_app.logger.warning('Read cache invalidation failed for %s: %s', sorted(tags), e)
+
+
+@event.listens_for(RoutingSession, 'after_soft_rollback')
+def _discard_rolled_back(session, previous_transaction):
+    # Só a transação externa: o rollback de um savepoint mantém o que veio antes
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_TAGS_KEY, None)
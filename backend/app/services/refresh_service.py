@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import requests
+from flask import current_app
+from sqlalchemy import func, or_, update
+
+from app.models import db, Anime, DiaryEntry
+from app.services.anime_service import AnimeService
+from app.services.jikan_client import get_jikan_client
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem eleição de líder entre workers
+    fcntl = None
+
+
+class CatalogueRefresher:
+    """Atualiza score, episodes e status dos animes do catálogo a partir da Jikan
+
+    Os animes mais referenciados em diários e com updated_at mais antigo são
+    atualizados primeiro. Falhas e animes que a Jikan não encontra ficam fora
+    da fila por CATALOGUE_REFRESH_RETRY_AFTER segundos. As chamadas à Jikan rodam em um pool de threads
+    limitado (e passam pelo rate limiter do cliente); as gravações acontecem
+    na thread que chamou, em lotes.
+    """
+    
+    def run_once(self, limit=None):
+        """Executar uma rodada de atualização e retornar um resumo"""
+        config = current_app.config
+        limit = limit or config['CATALOGUE_REFRESH_LIMIT']
+        batch_size = config['CATALOGUE_REFRESH_BATCH_SIZE']
+        client = get_jikan_client()
+        
+        candidates = self.select_candidates(limit)
+        refreshed = 0
+        failed = []
+        missing = []
+        pending = []
+        
+        with ThreadPoolExecutor(max_workers=config['CATALOGUE_REFRESH_WORKERS'],
+                                thread_name_prefix='catalogue-refresh') as pool:
+            futures = {pool.submit(client.get_anime, mal_id): mal_id for mal_id in candidates}
+            
+            for future in as_completed(futures):
+                try:
+                    anime_data = future.result()
+                except requests.RequestException as e:
+                    current_app.logger.warning('Refresh of mal_id %s failed: %s', futures[future], e)
+                    failed.append(futures[future])
+                    continue
+                
+                if anime_data:
+                    pending.append(anime_data)
+                else:
+                    missing.append(futures[future])
+                if len(pending) >= batch_size:
+                    refreshed += self._apply(pending)
+                    pending = []
+        
+        if pending:
+            refreshed += self._apply(pending)
+        if failed or missing:
+            self._record_failures(failed + missing)
+        
+        return {
+            'candidates': len(candidates),
+            'refreshed': refreshed,
+            'failed': len(failed),
+            'missing': len(missing),
+            **self.lag()
+        }
+    
+    def select_candidates(self, limit):
+        """mal_ids a atualizar, por número de registros no diário e idade de updated_at"""
+        config = current_app.config
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=config['CATALOGUE_REFRESH_MAX_AGE'])
+        retry_before = now - timedelta(seconds=config['CATALOGUE_REFRESH_RETRY_AFTER'])
+        references = func.count(DiaryEntry.id)
+        
+        rows = db.session.query(Anime.mal_id) \
+            .outerjoin(DiaryEntry, DiaryEntry.anime_id == Anime.id) \
+            .filter(Anime.updated_at < stale_before) \
+            .filter(or_(Anime.refresh_failed_at.is_(None), Anime.refresh_failed_at < retry_before)) \
+            .group_by(Anime.id, Anime.mal_id, Anime.updated_at) \
+            .order_by(references.desc(), Anime.updated_at.asc()) \
+            .limit(limit) \
+            .all()
+        
+        return [row.mal_id for row in rows]
+    
+    def lag(self):
+        """Atraso da atualização: idade do anime referenciado em diários mais desatualizado"""
+        stale_before = datetime.utcnow() - timedelta(seconds=current_app.config['CATALOGUE_REFRESH_MAX_AGE'])
+        tracked = db.session.query(Anime.id).join(DiaryEntry, DiaryEntry.anime_id == Anime.id).distinct().subquery()
+        
+        oldest, stale = db.session.query(
+            func.min(Anime.updated_at),
+            func.count(Anime.id).filter(Anime.updated_at < stale_before)
+        ).filter(Anime.id.in_(db.session.query(tracked.c.id))).one()
+        
+        return {
+            'lag_seconds': int((datetime.utcnow() - oldest).total_seconds()) if oldest else 0,
+            'stale_tracked_animes': stale or 0
+        }
+    
+    def _apply(self, items):
+        """Gravar um lote de respostas da Jikan em uma única transação"""
+        by_mal_id = {item['mal_id']: item for item in items if item.get('mal_id') is not None}
+        animes = Anime.query.filter(Anime.mal_id.in_(list(by_mal_id))).all()
+        now = datetime.utcnow()
+        
+        try:
+            for anime in animes:
+                AnimeService._apply_jikan_update(anime, by_mal_id[anime.mal_id])
+                # Marcar como atualizado mesmo quando nada mudou, para sair da fila
+                anime.updated_at = now
+                anime.refresh_failed_at = None
+            db.session.commit()
+            return len(animes)
+        except Exception as e:
+            db.session.rollback()
+            raise ValueError(f'Error refreshing animes: {str(e)}')
+    
+    def _record_failures(self, mal_ids):
+        """Marcar a tentativa sem sucesso (sem alterar updated_at: os dados não foram atualizados)"""
+        try:
+            db.session.execute(
+                update(Anime)
+                .where(Anime.mal_id.in_(mal_ids))
+                .values(refresh_failed_at=datetime.utcnow(), updated_at=Anime.updated_at)
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise ValueError(f'Error recording refresh failures: {str(e)}')
+
+
+def start_background_refresher(app):
+    """Rodar o refresher em uma thread daemon deste processo
+
+    Com vários workers do gunicorn, só o que obtiver o lock em
+    CATALOGUE_REFRESH_LOCK_PATH executa as rodadas.
+    """
+    def loop():
+        lock_file = _acquire_leader_lock(app.config['CATALOGUE_REFRESH_LOCK_PATH'])
+        if lock_file is None:
+            return
+        
+        refresher = CatalogueRefresher()
+        while True:
+            with app.app_context():
+                try:
+                    summary = refresher.run_once()
+                    app.logger.info('Catalogue refresh: %s', summary)
+                except Exception as e:
+                    app.logger.exception('Catalogue refresh failed: %s', e)
+                finally:
+                    db.session.remove()
+            time.sleep(app.config['CATALOGUE_REFRESH_INTERVAL'])
+    
+    thread = threading.Thread(target=loop, name='catalogue-refresher', daemon=True)
+    thread.start()
+    return thread
+
+
+def _acquire_leader_lock(path):
+    """Lock exclusivo não bloqueante; o arquivo fica aberto enquanto o processo viver"""
+    if fcntl is None:
+        return True
+    
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    lock_file = open(path, 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
@@ -0,0 +1,295 @@
+import bisect
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import column, delete, func, insert, select, table, text
+from sqlalchemy.exc import OperationalError
+
+from app.models import db, Anime
+
+# Peso do título em relação à sinopse no ranking
+TITLE_WEIGHT = 10.0
+SYNOPSIS_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(value):
+    """Quebrar um texto em tokens minúsculos e sem acentos"""
+    if not value:
+        return []
+    decomposed = unicodedata.normalize('NFKD', value.lower())
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return _TOKEN_RE.findall(stripped)
+
+
+class SQLiteFTSIndex:
+    """Índice de busca em uma tabela virtual FTS5 no próprio banco SQLite
+
+    As alterações do índice rodam na mesma transação da alteração do anime.
+    """
+
+    # Alterações vão na transação do chamador (índices em memória: só depois do commit)
+    transactional = True
+
+    fts = table('anime_fts', column('rowid'), column('title'), column('synopsis'))
+
+    def setup(self):
+        """Criar a tabela FTS5 e populá-la se estiver vazia (em uma transação própria)"""
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                'CREATE VIRTUAL TABLE IF NOT EXISTS anime_fts '
+                "USING fts5(title, synopsis, tokenize='unicode61 remove_diacritics 2')"
+            ))
+            if not connection.execute(text('SELECT 1 FROM anime_fts LIMIT 1')).first():
+                self._reindex(connection)
+
+    def reindex(self, condition=None):
+        """(Re)indexar os animes que satisfazem `condition` (todos se None)"""
+        self._reindex(db.session, condition)
+
+    def _reindex(self, connection, condition=None):
+        source = select(Anime.id, Anime.title, Anime.synopsis)
+        if condition is not None:
+            source = source.where(condition)
+            connection.execute(delete(self.fts).where(
+                self.fts.c.rowid.in_(select(Anime.id).where(condition))
+            ))
+        else:
+            connection.execute(delete(self.fts))
+
+        connection.execute(insert(self.fts).from_select(['rowid', 'title', 'synopsis'], source))
+
+    def remove(self, anime_ids):
+        db.session.execute(delete(self.fts).where(self.fts.c.rowid.in_(list(anime_ids))))
+
+    def search(self, query, limit=12):
+        """Ids dos animes mais relevantes (prefixo em cada termo, todos obrigatórios)"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        rank = func.bm25(text('anime_fts'), TITLE_WEIGHT, SYNOPSIS_WEIGHT)
+        rows = db.session.execute(
+            select(self.fts.c.rowid)
+            .where(text('anime_fts MATCH :match'))
+            .order_by(rank)
+            .limit(limit),
+            {'match': match}
+        )
+        return [row[0] for row in rows]
+
+
+class MemoryIndex:
+    """Base dos índices mantidos em memória por processo
+
+    Alterações só devem chegar aqui depois do commit (um rollback deixaria o
+    índice com animes que não existem). A reconstrução completa monta o estado
+    novo fora do lock e o troca de uma vez: as buscas seguem no índice anterior
+    enquanto isso, só uma thread reconstrói por vez e as alterações recebidas
+    no meio do caminho são repetidas no estado novo.
+    """
+
+    transactional = False
+
+    # Atributos com o estado do índice, trocados juntos na reconstrução
+    STATE = ()
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._replay = None
+        self.built_at = 0.0
+        self._clear()
+
+    def setup(self):
+        self.rebuild()
+
+    def is_stale(self, interval):
+        return bool(interval) and time.monotonic() - self.built_at > interval
+
+    def rebuild(self, blocking=True):
+        """Reconstruir o índice inteiro; False se outra thread já está reconstruindo"""
+        if not self._rebuild_lock.acquire(blocking=blocking):
+            return False
+
+        try:
+            with self._lock:
+                self._replay = []
+
+            fresh = type(self)()
+            fresh._apply(db.session.execute(self._source()).all(), bulk=True)
+
+            with self._lock:
+                for anime_ids, rows in self._replay:
+                    fresh._apply(rows, anime_ids)
+                for name in self.STATE:
+                    setattr(self, name, getattr(fresh, name))
+                self.built_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._replay = None
+            self._rebuild_lock.release()
+        return True
+
+    def reindex(self, condition=None):
+        """(Re)indexar os animes que satisfazem `condition` (reconstrução completa se None)"""
+        if condition is None:
+            self.rebuild()
+            return
+        self._change(rows=db.session.execute(self._source().where(condition)).all())
+
+    def remove(self, anime_ids):
+        self._change(anime_ids=list(anime_ids))
+
+    def _change(self, anime_ids=(), rows=()):
+        with self._lock:
+            self._apply(rows, anime_ids)
+            if self._replay is not None:
+                self._replay.append((anime_ids, rows))
+
+    def _apply(self, rows, anime_ids=(), bulk=False):
+        for anime_id in anime_ids:
+            self._remove(anime_id)
+        for row in rows:
+            if not bulk:
+                self._remove(row[0])
+            self._add(row, bulk)
+        self._refresh(bulk)
+
+    def _source(self):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _add(self, row, bulk):
+        raise NotImplementedError
+
+    def _remove(self, anime_id):
+        raise NotImplementedError
+
+    def _refresh(self, bulk):
+        """Estruturas derivadas, recalculadas depois de cada alteração"""
+
+
+class InvertedIndex(MemoryIndex):
+    """Índice invertido em memória, para bancos sem FTS5
+
+    Mantido por processo: alterações feitas por outros workers só aparecem
+    depois de um rebuild (ver LOCAL_SEARCH_REBUILD_INTERVAL).
+    """
+
+    STATE = ('_postings', '_documents', '_vocabulary')
+
+    def _source(self):
+        return select(Anime.id, Anime.title, Anime.synopsis)
+
+    def _clear(self):
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._vocabulary = []
+
+    def _refresh(self, bulk):
+        self._vocabulary = sorted(self._postings)
+
+    def _add(self, row, bulk):
+        anime_id, title, synopsis = row
+        weights = defaultdict(float)
+        for token in tokenize(title):
+            weights[token] += TITLE_WEIGHT
+        for token in tokenize(synopsis):
+            weights[token] += SYNOPSIS_WEIGHT
+
+        for token, weight in weights.items():
+            self._postings[token][anime_id] = weight
+        self._documents[anime_id] = list(weights)
+
+    def _remove(self, anime_id):
+        for token in self._documents.pop(anime_id, []):
+            postings = self._postings[token]
+            postings.pop(anime_id, None)
+            if not postings:
+                del self._postings[token]
+
+    def search(self, query, limit=12):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            total = len(self._documents) or 1
+            scores = None
+
+            for token in tokens:
+                # Expandir o termo para todos os tokens com esse prefixo
+                matches = defaultdict(float)
+                start = bisect.bisect_left(self._vocabulary, token)
+                for candidate in self._vocabulary[start:]:
+                    if not candidate.startswith(token):
+                        break
+                    postings = self._postings[candidate]
+                    idf = math.log(1 + total / len(postings))
+                    for anime_id, weight in postings.items():
+                        matches[anime_id] += weight * idf
+
+                # Todos os termos são obrigatórios
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {i: s + matches[i] for i, s in scores.items() if i in matches}
+                if not scores:
+                    return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [anime_id for anime_id, _ in ranked[:limit]]
+
+
+def _build_search_index():
+    index = None
+    if db.engine.dialect.name == 'sqlite':
+        try:
+            index = SQLiteFTSIndex()
+            index.setup()
+        except OperationalError:
+            # SQLite compilado sem FTS5
+            index = None
+    if index is None:
+        index = InvertedIndex()
+        index.setup()
+    return index
+
+
+def init_search_index(app):
+    """Construir o índice de busca local na inicialização, fora das requisições"""
+    if not app.config['LOCAL_SEARCH_ENABLED']:
+        return
+
+    with app.app_context():
+        app.extensions['search_index'] = _build_search_index()
+
+
+def get_search_index():
+    """Índice de busca local da aplicação atual (FTS5 no SQLite, invertido nos demais)"""
+    index = current_app.extensions.get('search_index')
+
+    if index is None:
+        index = current_app.extensions['search_index'] = _build_search_index()
+
+    # O índice em memória não vê escritas de outros workers: reconstruir periodicamente
+    # (uma thread por vez; as demais seguem no índice atual)
+    elif isinstance(index, MemoryIndex) and index.is_stale(current_app.config['LOCAL_SEARCH_REBUILD_INTERVAL']):
+        index.rebuild(blocking=False)
+
+    return index
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Filtro do autogenerate do Alembic: ignorar a tabela FTS5 (e as auxiliares dela)"""
+    return not (type_ == 'table' and name.startswith('anime_fts'))
@@ -0,0 +1,166 @@
+import bisect
+import heapq
+import math
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.models import db, Anime
+from app.services.search_index import MemoryIndex, tokenize
+
+# Bônus de similaridade para títulos que começam com o texto digitado (autocomplete)
+PREFIX_BONUS = 0.5
+
+
+def trigrams(value):
+    """Trigramas de um texto, palavra por palavra (no estilo do pg_trgm)"""
+    grams = set()
+    for word in tokenize(value):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex(MemoryIndex):
+    """Índice de trigramas em memória para busca aproximada de títulos
+
+    Tolerante a erros de digitação: a similaridade é o coeficiente de Dice
+    entre os trigramas da busca e os do título. As listas invertidas são
+    separadas por número de trigramas do título, o que permite descartar
+    tamanhos incompatíveis com o limiar e só varrer as listas mais raras
+    (algoritmo CPMerge do SimString). Títulos que começam com o texto
+    digitado vêm de uma lista ordenada e recebem um bônus (autocomplete).
+
+    Mantido por processo e reconstruído periodicamente para ver escritas
+    de outros workers.
+    """
+
+    STATE = ('_postings', '_documents', '_sorted_titles')
+
+    def _source(self):
+        return select(Anime.id, Anime.mal_id, Anime.title)
+
+    def _clear(self):
+        self._postings = defaultdict(lambda: defaultdict(set))
+        self._documents = {}
+        self._sorted_titles = []
+
+    def _refresh(self, bulk):
+        # Na carga completa os títulos entram fora de ordem
+        if bulk:
+            self._sorted_titles.sort()
+
+    def _add(self, row, bulk):
+        anime_id, mal_id, title = row
+        grams = frozenset(trigrams(title))
+        normalized = ' '.join(tokenize(title))
+        self._documents[anime_id] = (mal_id, title, normalized, grams)
+
+        postings = self._postings[len(grams)]
+        for gram in grams:
+            postings[gram].add(anime_id)
+
+        if bulk:
+            self._sorted_titles.append((normalized, anime_id))
+        else:
+            bisect.insort(self._sorted_titles, (normalized, anime_id))
+
+    def _remove(self, anime_id):
+        document = self._documents.pop(anime_id, None)
+        if document is None:
+            return
+
+        _, _, normalized, grams = document
+        postings = self._postings[len(grams)]
+        for gram in grams:
+            postings[gram].discard(anime_id)
+            if not postings[gram]:
+                del postings[gram]
+
+        position = bisect.bisect_left(self._sorted_titles, (normalized, anime_id))
+        if position < len(self._sorted_titles) and self._sorted_titles[position] == (normalized, anime_id):
+            del self._sorted_titles[position]
+
+    def suggest(self, query, limit=10, min_similarity=0.3):
+        """Títulos mais parecidos com `query`, do mais para o menos similar"""
+        grams = trigrams(query)
+        if not grams:
+            return []
+
+        normalized = ' '.join(tokenize(query))
+        with self._lock:
+            scores = self._fuzzy_matches(grams, min_similarity)
+
+            # Autocomplete: títulos que começam com o texto digitado
+            position = bisect.bisect_left(self._sorted_titles, (normalized,))
+            for title_normalized, anime_id in self._sorted_titles[position:position + limit]:
+                if not title_normalized.startswith(normalized):
+                    break
+                if anime_id not in scores:
+                    title_grams = self._documents[anime_id][3]
+                    scores[anime_id] = 2 * len(grams & title_grams) / (len(grams) + len(title_grams))
+                scores[anime_id] += PREFIX_BONUS
+
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+            return [
+                {
+                    'id': anime_id,
+                    'mal_id': self._documents[anime_id][0],
+                    'title': self._documents[anime_id][1],
+                    'similarity': round(min(score, 1.0), 3)
+                }
+                for anime_id, score in best
+            ]
+
+    def _fuzzy_matches(self, grams, alpha):
+        """Títulos com Dice >= alpha, por tamanho candidato (CPMerge)"""
+        size = len(grams)
+        min_size = math.ceil(alpha / (2 - alpha) * size)
+        max_size = math.floor((2 - alpha) / alpha * size)
+        scores = {}
+
+        for title_size, postings in self._postings.items():
+            if not min_size <= title_size <= max_size:
+                continue
+
+            # Sobreposição mínima para atingir o limiar com este tamanho
+            overlap = math.ceil(alpha * (size + title_size) / 2)
+            lists = sorted((postings.get(gram, ()) for gram in grams), key=len)
+            scan = size - overlap + 1
+
+            # Só quem aparece em uma das listas mais raras pode atingir o limiar
+            counts = defaultdict(int)
+            for candidates in lists[:scan]:
+                for anime_id in candidates:
+                    counts[anime_id] += 1
+
+            for anime_id, count in counts.items():
+                for position in range(scan, size):
+                    if anime_id in lists[position]:
+                        count += 1
+                    elif count + size - position - 1 < overlap:
+                        break
+                if count >= overlap:
+                    scores[anime_id] = 2 * count / (size + title_size)
+
+        return scores
+
+    def __len__(self):
+        return len(self._documents)
+
+
+def get_suggest_index():
+    """Índice de trigramas da aplicação atual (construído sob demanda)"""
+    index = current_app.extensions.get('suggest_index')
+
+    if index is None:
+        index = TrigramIndex()
+        index.setup()
+        current_app.extensions['suggest_index'] = index
+
+    # Uma thread por vez reconstrói; as demais seguem no índice atual
+    elif index.is_stale(current_app.config['SUGGEST_INDEX_REBUILD_INTERVAL']):
+        index.rebuild(blocking=False)
+
+    return index
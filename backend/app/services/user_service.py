@@ -1,4 +1,8 @@
+from flask import current_app
 from app.models import db, User
+from app.services.password_hasher import get_password_hasher
+from app.services.read_cache import cached, user_tag
+from sqlalchemy import update
 from sqlalchemy.exc import IntegrityError
 
 
@@ -37,17 +41,46 @@ class UserService:
         """Autenticar usuário"""
         user = User.query.filter_by(username=username).first()
         
-        if user and user.check_password(password):
-            return user
-        return None
+        if not user:
+            # Mesmo custo de um usuário existente (sem revelar quais existem pelo tempo)
+            get_password_hasher().verify_dummy(password)
+            return None
+        if not user.check_password(password):
+            return None
+        
+        if get_password_hasher().needs_rehash(user.password_hash):
+            self._rehash_password(user, password)
+        return user
+    
+    def _rehash_password(self, user, password):
+        """Regravar o hash com o algoritmo e o custo atuais (sem alterar updated_at)"""
+        try:
+            db.session.execute(
+                update(User)
+                .where(User.id == user.id)
+                .values(password_hash=get_password_hasher().hash(password), updated_at=User.updated_at)
+            )
+            db.session.commit()
+        except Exception as e:
+            # O login já foi validado; o rehash fica para a próxima vez
+            db.session.rollback()
+            current_app.logger.warning('Password rehash failed for user %s: %s', user.id, e)
     
     def get_user(self, user_id):
         """Obter usuário por ID"""
-        return User.query.get(user_id)
+        return db.session.get(User, user_id)
+    
+    def get_user_data(self, user_id):
+        """to_dict() do usuário pelo cache de leituras (None se não existe)"""
+        def load():
+            user = db.session.get(User, user_id)
+            return user.to_dict() if user else None
+        
+        return cached(f'user:{user_id}', [user_tag(user_id)], load)
     
     def update_user(self, user_id, data):
         """Atualizar usuário"""
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         
         if not user:
             return None
@@ -71,7 +104,7 @@ class UserService:
     
     def delete_user(self, user_id):
         """Deletar usuário"""
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         
         if not user:
             return False
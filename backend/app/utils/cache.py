@@ -0,0 +1,364 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # dependência opcional
+    redis = None
+
+# Falhas de um nível compartilhado (tratadas como miss)
+CACHE_ERRORS = (sqlite3.Error,) + ((redis.RedisError,) if redis is not None else ())
+
+
+class LRUCache:
+    """Cache em memória (por processo) com TTL e despejo LRU"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        """Retorna (valor, fresh_until) ou None se ausente/expirado"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, fresh_until, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value, fresh_until
+
+    def set(self, key, value, fresh_until, expires_at):
+        """Armazena um valor, despejando os menos usados se necessário"""
+        with self._lock:
+            self._entries[key] = (value, fresh_until, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """Cache compartilhado entre processos (workers do gunicorn) em um arquivo SQLite"""
+
+    # A cada quantas escritas verificar expiração e limite de tamanho
+    PRUNE_EVERY = 64
+
+    def __init__(self, path, max_entries=10000, table='cache'):
+        self.path = path
+        self.max_entries = max_entries
+        self.table = table
+        self._local = threading.local()
+        self._writes = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+            'fresh_until REAL NOT NULL, expires_at REAL NOT NULL)'
+        )
+        self._connection().execute(
+            f'CREATE INDEX IF NOT EXISTS ix_{self.table}_expires_at ON {self.table} (expires_at)'
+        )
+
+    def _connection(self):
+        """Uma conexão por thread (sqlite3 não compartilha conexões entre threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Retorna (valor, fresh_until) ou None se ausente/expirado"""
+        row = self._connection().execute(
+            f'SELECT value, fresh_until, expires_at FROM {self.table} WHERE key = ?',
+            (key,)
+        ).fetchone()
+        if row is None or row[2] <= time.time():
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, fresh_until, expires_at):
+        """Armazena um valor serializado em JSON"""
+        conn = self._connection()
+        conn.execute(
+            f'INSERT OR REPLACE INTO {self.table} (key, value, fresh_until, expires_at) '
+            'VALUES (?, ?, ?, ?)',
+            (key, json.dumps(value), fresh_until, expires_at)
+        )
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def delete(self, key):
+        self._connection().execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+
+    def prune(self):
+        """Remove entradas expiradas e as mais antigas além do limite"""
+        conn = self._connection()
+        conn.execute(f'DELETE FROM {self.table} WHERE expires_at <= ?', (time.time(),))
+        cursor = conn.execute(
+            f'DELETE FROM {self.table} WHERE key IN ('
+            f'SELECT key FROM {self.table} ORDER BY expires_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+        self.evictions += max(cursor.rowcount, 0)
+
+    def clear(self):
+        self._connection().execute(f'DELETE FROM {self.table}')
+
+
+class RedisCache:
+    """Cache compartilhado em um servidor Redis (ou compatível), com a mesma interface do SQLiteCache
+
+    `client` é um redis.Redis ou qualquer objeto com get/set/delete/scan_iter.
+    O limite de tamanho fica com a política de despejo do servidor (maxmemory).
+    """
+
+    def __init__(self, client, prefix='cache:'):
+        self.client = client
+        self.prefix = prefix
+        self.evictions = 0
+
+    @classmethod
+    def from_url(cls, url, prefix='cache:'):
+        if redis is None:
+            raise RuntimeError('The redis package is not installed')
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def get(self, key):
+        """Retorna (valor, fresh_until) ou None se ausente/expirado"""
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        value, fresh_until = json.loads(raw)
+        return value, fresh_until
+
+    def set(self, key, value, fresh_until, expires_at):
+        """Armazena [valor, fresh_until] em JSON; o Redis expira a chave sozinho"""
+        ttl = None if math.isinf(expires_at) else max(1, math.ceil(expires_at - time.time()))
+        self.client.set(self.prefix + key, json.dumps([value, fresh_until]), ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class TieredCache:
+    """Cache em dois níveis: LRU local na frente de um cache compartilhado opcional
+
+    Cada entrada fica "fresca" por `ttl` segundos e pode ainda ser servida como
+    "velha" por mais `stale_ttl` segundos enquanto é revalidada em segundo plano.
+    """
+
+    def __init__(self, local, shared=None, ttl=3600, stale_ttl=0):
+        self.local = local
+        self.shared = shared
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'local_hits': 0,
+            'shared_hits': 0,
+            'sets': 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, key):
+        """Retorna (valor, is_fresh) ou None em caso de miss"""
+        entry = self.local.get(key)
+        if entry is not None:
+            self._count('local_hits')
+        elif self.shared is not None:
+            entry = self._shared_get(key)
+            if entry is not None:
+                self._count('shared_hits')
+                value, fresh_until = entry
+                self.local.set(key, value, fresh_until, fresh_until + self.stale_ttl)
+
+        if entry is None:
+            self._count('misses')
+            return None
+
+        value, fresh_until = entry
+        is_fresh = fresh_until > time.time()
+        self._count('hits' if is_fresh else 'stale_hits')
+        return value, is_fresh
+
+    def set(self, key, value):
+        fresh_until = time.time() + self.ttl
+        expires_at = fresh_until + self.stale_ttl
+        self.local.set(key, value, fresh_until, expires_at)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value, fresh_until, expires_at)
+            except sqlite3.Error:
+                # O nível compartilhado é uma otimização; falhas não devem quebrar a requisição
+                pass
+        self._count('sets')
+
+    def _shared_get(self, key):
+        try:
+            return self.shared.get(key)
+        except sqlite3.Error:
+            return None
+
+    def delete(self, key):
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self):
+        """Contadores de hit/miss para monitoramento"""
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else 0
+        stats['local_entries'] = len(self.local)
+        stats['local_evictions'] = self.local.evictions
+        stats['shared_enabled'] = self.shared is not None
+        if self.shared is not None:
+            stats['shared_evictions'] = self.shared.evictions
+        return stats
+
+
+class TaggedCache:
+    """Cache de leituras do banco com invalidação por tags
+
+    A chave física de cada entrada inclui a versão atual das suas tags;
+    invalidar uma tag troca a versão e as entradas que dependiam dela deixam
+    de ser encontradas (e expiram com o TTL). As versões ficam no próprio
+    backend, então valem para todos os workers de um backend compartilhado.
+    São tokens aleatórios: perder uma versão (despejo, reinício) também só
+    invalida, nunca ressuscita um valor antigo.
+    """
+
+    # Tag implícita de todas as entradas (clear() a troca)
+    GLOBAL_TAG = '*'
+    TAG_PREFIX = 'tag:'
+
+    def __init__(self, backend, ttl=300):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'invalidations': 0,
+            'errors': 0,
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    @staticmethod
+    def _new_version():
+        return os.urandom(8).hex()
+
+    def _version(self, tag):
+        key = self.TAG_PREFIX + tag
+        entry = self.backend.get(key)
+        if entry is not None:
+            return entry[0]
+        version = self._new_version()
+        self.backend.set(key, version, math.inf, math.inf)
+        return version
+
+    def _physical_key(self, key, tags):
+        versions = [self._version(tag) for tag in (self.GLOBAL_TAG, *sorted(set(tags)))]
+        digest = hashlib.blake2b(' '.join(versions).encode(), digest_size=8).hexdigest()
+        return f'{key}@{digest}'
+
+    def get_or_set(self, key, tags, compute):
+        """Valor de `key`, ou compute() guardado sob as versões atuais de `tags`
+
+        As versões são lidas antes de compute(): se uma escrita as trocar
+        no meio, o valor calculado fica sob a versão antiga, inalcançável.
+        None não é guardado.
+        """
+        try:
+            physical_key = self._physical_key(key, tags)
+            entry = self.backend.get(physical_key)
+        except CACHE_ERRORS:
+            # O cache é uma otimização; falhas não devem quebrar a requisição
+            self._count('errors')
+            return compute()
+
+        if entry is not None:
+            self._count('hits')
+            return entry[0]
+
+        self._count('misses')
+        value = compute()
+        if value is not None:
+            expires_at = time.time() + self.ttl
+            try:
+                self.backend.set(physical_key, value, expires_at, expires_at)
+                self._count('sets')
+            except CACHE_ERRORS:
+                self._count('errors')
+        return value
+
+    def invalidate(self, tags):
+        """Trocar a versão de cada tag (as entradas dependentes deixam de valer)"""
+        tags = set(tags)
+        for tag in tags:
+            self.backend.set(self.TAG_PREFIX + tag, self._new_version(), math.inf, math.inf)
+        self._count('invalidations', len(tags))
+
+    def clear(self):
+        self.invalidate([self.GLOBAL_TAG])
+
+    def stats(self):
+        """Contadores de hit/miss para monitoramento"""
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0
+        stats['backend'] = type(self.backend).__name__
+        stats['evictions'] = self.backend.evictions
+        return stats
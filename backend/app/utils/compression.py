@@ -0,0 +1,58 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # dependência opcional
+    brotli = None
+
+# Só vale comprimir texto; imagens etc. já chegam comprimidas
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/html', 'text/plain', 'text/css')
+
+
+def choose_encoding(accept_encodings):
+    """Melhor codificação aceita pelo cliente (br antes de gzip em caso de empate)"""
+    candidates = [('br', brotli is not None), ('gzip', True)]
+    best, best_quality = None, 0
+    for encoding, available in candidates:
+        quality = accept_encodings[encoding]
+        if available and quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def init_compression(app):
+    """Comprimir (br ou gzip) respostas acima de COMPRESSION_MIN_SIZE bytes"""
+    if not app.config['COMPRESSION_ENABLED']:
+        return
+
+    min_size = app.config['COMPRESSION_MIN_SIZE']
+    level = app.config['COMPRESSION_LEVEL']
+    brotli_quality = app.config['COMPRESSION_BROTLI_QUALITY']
+
+    @app.after_request
+    def compress_response(response):
+        # Streaming (exportações) e respostas sem corpo ficam como estão
+        if response.direct_passthrough or response.is_streamed or response.status_code in (204, 304):
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES or 'Content-Encoding' in response.headers:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if (response.content_length or 0) < min_size:
+            return response
+
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if encoding == 'br':
+            compressed = brotli.compress(data, quality=brotli_quality)
+        else:
+            compressed = gzip.compress(data, compresslevel=level, mtime=0)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
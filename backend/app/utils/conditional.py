@@ -0,0 +1,30 @@
+import hashlib
+
+from flask import current_app, request
+from werkzeug.http import is_resource_modified
+
+
+def make_etag(*parts):
+    """ETag a partir dos valores que definem a versão de um recurso"""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+def conditional_response(etag, last_modified, build):
+    """Responder 304 se o cliente já tem esta versão; senão, usar build()
+
+    `build` (consultas e serialização do corpo) só roda quando o recurso mudou.
+    O ETag é fraco: o mesmo conteúdo pode sair com outra codificação.
+    """
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = current_app.make_response(build())
+    else:
+        response = current_app.response_class(status=304)
+
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+
+    # Dados por usuário: o cliente pode guardar, mas deve revalidar a cada uso
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,62 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def engine_options(app_config, uri=None):
+    """Opções de create_engine para o banco de `uri` (SQLALCHEMY_DATABASE_URI se None)
+
+    SQLite é configurado por pragmas em cada conexão (ver configure_engines);
+    PostgreSQL e MySQL recebem um pool dimensionado e pool_pre_ping.
+    """
+    url = make_url(uri or app_config['SQLALCHEMY_DATABASE_URI'])
+
+    if url.get_backend_name() == 'sqlite':
+        return {}
+
+    return {
+        'pool_size': app_config['DB_POOL_SIZE'],
+        'max_overflow': app_config['DB_MAX_OVERFLOW'],
+        'pool_timeout': app_config['DB_POOL_TIMEOUT'],
+        'pool_recycle': app_config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': app_config['DB_POOL_PRE_PING'],
+    }
+
+
+def primary_engine_options(app_config):
+    """engine_options do banco principal; SQLALCHEMY_ENGINE_OPTIONS explícito tem precedência"""
+    return {
+        **engine_options(app_config),
+        **app_config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+
+
+def sqlite_pragmas(app_config):
+    """Pragmas aplicados a cada nova conexão SQLite, na ordem de execução"""
+    pragmas = {
+        'journal_mode': app_config['SQLITE_JOURNAL_MODE'],
+        'busy_timeout': app_config['SQLITE_BUSY_TIMEOUT'],
+        'synchronous': app_config['SQLITE_SYNCHRONOUS'],
+        'mmap_size': app_config['SQLITE_MMAP_SIZE'],
+    }
+    return {name: value for name, value in pragmas.items() if value not in (None, '')}
+
+
+def configure_engines(app, db):
+    """Registrar os pragmas SQLite nos engines da aplicação (antes da primeira conexão)"""
+    pragmas = sqlite_pragmas(app.config)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    for engine in engines:
+        if engine.dialect.name != 'sqlite' or not pragmas:
+            continue
+
+        @event.listens_for(engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for name, value in pragmas.items():
+                    cursor.execute(f'PRAGMA {name}={value}')
+            finally:
+                cursor.close()
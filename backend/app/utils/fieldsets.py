@@ -0,0 +1,114 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+from flask import request
+from sqlalchemy.orm import joinedload, load_only
+
+from app.utils.serialization import compile_serializer
+
+
+class Fieldset(NamedTuple):
+    """Campos pedidos via ?fields= / ?include= para um modelo
+
+    `fields` segue a ordem de SERIALIZED_FIELDS e inclui os relacionamentos
+    pedidos; `related` é uma tupla de (relacionamento, campos ou None = todos).
+    """
+    fields: tuple
+    related: tuple = ()
+
+
+def _related_model(model, name):
+    return getattr(model, name).property.mapper.class_
+
+
+def _parse_names(param, allowed):
+    """Ler uma lista separada por vírgulas da query string (None se ausente)"""
+    raw = request.args.get(param)
+    if raw is None:
+        return None
+
+    names = {name.strip() for name in raw.split(',') if name.strip()}
+    invalid = sorted(names.difference(allowed))
+    if invalid:
+        raise ValueError(f'Invalid {param}: {", ".join(invalid)}. Must be among: {", ".join(allowed)}')
+    return names
+
+
+def get_fieldset(model):
+    """Ler ?fields=, ?fields[<relacionamento>]= e ?include= para `model`
+
+    Retorna None quando nada foi pedido (resposta completa, como em to_dict).
+    Relacionamentos de INCLUDABLE vêm por padrão; `include=` vazio os omite.
+    O id é sempre incluído.
+    """
+    relationships = getattr(model, 'INCLUDABLE', ())
+    attributes = [field for field in model.SERIALIZED_FIELDS if field not in relationships]
+
+    requested = _parse_names('fields', attributes)
+    includes = _parse_names('include', relationships)
+    if includes is None:
+        includes = set(relationships)
+
+    related = []
+    for name in relationships:
+        if name not in includes:
+            continue
+        related_fields = _related_model(model, name).SERIALIZED_FIELDS
+        subfields = _parse_names(f'fields[{name}]', related_fields)
+        if subfields is not None:
+            subfields = tuple(field for field in related_fields if field in subfields | {'id'})
+        related.append((name, subfields))
+
+    if requested is None and includes == set(relationships) and all(sub is None for _, sub in related):
+        return None
+
+    selected = (requested | {'id'} if requested is not None else set(attributes)) | includes
+    return Fieldset(tuple(field for field in model.SERIALIZED_FIELDS if field in selected), tuple(related))
+
+
+@lru_cache(maxsize=256)
+def sparse_serializer(model, fieldset):
+    """Serializador gerado para um Fieldset (memorizado por combinação de campos)"""
+    nested = {}
+    for name, subfields in fieldset.related:
+        related_model = _related_model(model, name)
+        nested[name] = related_model.to_dict if subfields is None else sparse_serializer(related_model, Fieldset(subfields))
+
+    return compile_serializer(
+        fieldset.fields, model.DATETIME_FIELDS, nested, name=f'serialize_{model.__tablename__}_sparse'
+    )
+
+
+def get_serializer(model, fieldset):
+    return model.to_dict if fieldset is None else sparse_serializer(model, fieldset)
+
+
+def load_options(model, fieldset, required=()):
+    """Opções de carga que só selecionam as colunas usadas pelo Fieldset
+
+    `required` lista colunas lidas fora da serialização (ex.: a de ordenação,
+    usada no cursor). Relacionamentos não incluídos não são carregados.
+    """
+    columns = model.__table__.columns
+    options = [load_only(*[getattr(model, f) for f in (*fieldset.fields, *required) if f in columns])]
+
+    for name, subfields in fieldset.related:
+        loader = joinedload(getattr(model, name))
+        if subfields is not None:
+            related_model = _related_model(model, name)
+            loader = loader.load_only(*[getattr(related_model, f) for f in subfields if f in related_model.__table__.columns])
+        options.append(loader)
+
+    return options
+
+
+def select_fields(data, fieldset):
+    """Aplicar um Fieldset a um dicionário já serializado (ex.: vindo do cache)"""
+    if fieldset is None:
+        return data
+
+    selected = {field: data[field] for field in fieldset.fields}
+    for name, subfields in fieldset.related:
+        if subfields is not None and selected.get(name) is not None:
+            selected[name] = {field: selected[name][field] for field in subfields}
+    return selected
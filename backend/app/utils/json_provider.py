@@ -0,0 +1,65 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # dependência opcional
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Provider JSON do Flask baseado em orjson
+
+    Gera as mesmas respostas que o provider padrão: chaves ordenadas
+    (sort_keys) e datas e Decimal pelo mesmo `default`. Com ensure_ascii,
+    saídas com texto não ASCII são refeitas pelo encoder padrão, que o escapa
+    como \\uXXXX (escapar a saída do orjson em Python sai mais caro que
+    isso). Diferenças restantes: floats com expoente (1e16 em vez de 1e+16)
+    e dumps() sem separators, que sai compacto em vez de com espaços.
+    """
+    
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME \
+        | orjson.OPT_PASSTHROUGH_DATACLASS if orjson else 0
+    
+    def dumps(self, obj, **kwargs):
+        indent = kwargs.pop('indent', None)
+        separators = kwargs.pop('separators', None)
+        
+        # Argumentos que o orjson não suporta: usar o encoder padrão
+        if kwargs:
+            if indent is not None:
+                kwargs['indent'] = indent
+            return super().dumps(obj, **kwargs)
+        
+        option = self.OPTIONS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0) \
+            | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            data = orjson.dumps(obj, default=self.default, option=option)
+        except orjson.JSONEncodeError:
+            # Ex.: inteiros acima de 64 bits, que o orjson não serializa
+            data = None
+        
+        if data is not None and (data.isascii() or not self.ensure_ascii):
+            return data.decode()
+        
+        # Compacto como o orjson quando separators não foi passado
+        if separators is None and not indent:
+            separators = (',', ':')
+        return super().dumps(obj, indent=indent, separators=separators)
+    
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def configure_json_provider(app):
+    """Registrar o provider JSON escolhido em JSON_PROVIDER"""
+    name = app.config['JSON_PROVIDER']
+    
+    if name == 'orjson':
+        if orjson is None:
+            app.logger.warning('JSON_PROVIDER=orjson but orjson is not installed; using the default provider')
+            return
+        app.json = OrjsonProvider(app)
+    elif name != 'default':
+        raise ValueError(f'Unknown JSON_PROVIDER: {name}')
@@ -0,0 +1,96 @@
+import gzip
+import json
+from itertools import islice
+
+CHUNK_SIZE = 1 << 16
+NUMBER_CHARS = frozenset('0123456789+-.eE')
+
+
+def open_text(path):
+    """Abrir um arquivo texto (descompactando .gz)"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def iter_json_records(path):
+    """Ler objetos de um dump, um por vez, sem carregar o arquivo inteiro
+
+    Aceita NDJSON (um objeto por linha) ou um array JSON. Objetos no formato
+    de página da Jikan ({"data": [...]} ou {"data": {...}}) são expandidos.
+    """
+    with open_text(path) as stream:
+        first = _peek_non_whitespace(stream)
+        records = _iter_json_array(stream) if first == '[' else _iter_ndjson(stream)
+        
+        for record in records:
+            data = record.get('data') if isinstance(record, dict) else None
+            if isinstance(data, list):
+                yield from data
+            elif isinstance(data, dict):
+                yield data
+            else:
+                yield record
+
+
+def batched(iterable, size):
+    """Agrupar um iterável em listas de até `size` itens"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _peek_non_whitespace(stream):
+    position = stream.tell()
+    while True:
+        char = stream.read(1)
+        if not char or not char.isspace():
+            stream.seek(position)
+            return char
+        position = stream.tell()
+
+
+def _iter_ndjson(stream):
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f'Invalid JSON on line {number}: {e}')
+
+
+def _iter_json_array(stream):
+    """Decodificar os elementos de um array JSON de topo à medida que o arquivo é lido"""
+    decoder = json.JSONDecoder()
+    buffer = stream.read(CHUNK_SIZE).lstrip()[1:]
+    eof = False
+    
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        
+        if buffer.startswith(']'):
+            return
+        
+        try:
+            value, end = decoder.raw_decode(buffer)
+            # Um número no fim do buffer ("3", "3.", "1e") pode continuar no próximo bloco
+            complete = eof or (end < len(buffer) and buffer[end] not in NUMBER_CHARS)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError('Truncated or invalid JSON array')
+            complete = False
+        
+        if not complete:
+            chunk = stream.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        
+        yield value
+        buffer = buffer[end:]
+        
+        if len(buffer) < CHUNK_SIZE and not eof:
+            chunk = stream.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer += chunk
@@ -0,0 +1,246 @@
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+# nome -> (tipo, descrição, buckets)
+METRICS = {
+    'http_request_duration_seconds': ('histogram', 'Request latency', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Response body size (after compression)', SIZE_BUCKETS),
+    'http_request_sql_statements': ('histogram', 'SQL statements executed per request', COUNT_BUCKETS),
+    'http_request_sql_seconds': ('histogram', 'Time spent in SQL per request', LATENCY_BUCKETS),
+    'http_request_jikan_seconds': ('histogram', 'Time spent in Jikan calls per request (only requests that called Jikan)', LATENCY_BUCKETS),
+    'jikan_call_duration_seconds': ('histogram', 'Duration of each Jikan call, including background work', LATENCY_BUCKETS),
+}
+
+# Acumuladores da requisição atual e registro do processo (criado por init_metrics)
+_current = ContextVar('request_metrics', default=None)
+_registry = None
+
+
+class RequestMetrics:
+    """Acumuladores de uma requisição (SQL e Jikan), preenchidos pelos hooks"""
+
+    __slots__ = ('sql_statements', 'sql_seconds', 'jikan_calls', 'jikan_seconds', '_lock')
+
+    def __init__(self):
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.jikan_calls = 0
+        self.jikan_seconds = 0.0
+        # Chamadas à Jikan em paralelo (gather) somam de várias threads
+        self._lock = threading.Lock()
+
+    def add_jikan(self, seconds):
+        with self._lock:
+            self.jikan_calls += 1
+            self.jikan_seconds += seconds
+
+
+class MetricsRegistry:
+    """Histogramas do processo, com rótulos, exportáveis em JSON
+
+    Cada série guarda as contagens por bucket (não cumulativas), a soma e o total.
+    """
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * (len(buckets) + 1), 'sum': 0.0, 'count': 0}
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {
+                    'name': name,
+                    'labels': dict(labels),
+                    'buckets': list(series['buckets']),
+                    'sum': series['sum'],
+                    'count': series['count']
+                }
+                for (name, labels), series in self._series.items()
+            ]
+
+
+class MetricsStore:
+    """Um arquivo JSON por worker em `directory`, somados na leitura
+
+    Cada processo só escreve o próprio arquivo (troca atômica com os.replace),
+    então não há locks entre workers. Arquivos de workers encerrados continuam
+    contando, como contadores do Prometheus; limpe o diretório a cada deploy.
+    Sem `directory`, só as métricas do processo atual são exportadas.
+    """
+
+    def __init__(self, registry, directory='', flush_interval=1.0):
+        self.registry = registry
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._flushed_at = 0.0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self):
+        return os.path.join(self.directory, f'metrics_{os.getpid()}.json')
+
+    def maybe_flush(self):
+        if self.directory and time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if not self.directory:
+            return
+        self._flushed_at = time.monotonic()
+        path = self._path()
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(temporary, path)
+
+    def collect(self):
+        """Séries de todos os workers, somadas por (nome, rótulos)"""
+        if not self.directory:
+            return self.registry.snapshot()
+
+        self.flush()
+        merged = {}
+        for filename in os.listdir(self.directory):
+            if not (filename.startswith('metrics_') and filename.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    series_list = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for series in series_list:
+                key = (series['name'], tuple(sorted(series['labels'].items())))
+                total = merged.get(key)
+                if total is None:
+                    merged[key] = series
+                    continue
+                total['buckets'] = [a + b for a, b in zip(total['buckets'], series['buckets'])]
+                total['sum'] += series['sum']
+                total['count'] += series['count']
+        return list(merged.values())
+
+
+def _format_labels(labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+def render_prometheus(series_list):
+    """Formato texto de exposição do Prometheus (versão 0.0.4)"""
+    lines = []
+    by_name = {}
+    for series in series_list:
+        by_name.setdefault(series['name'], []).append(series)
+
+    for name, (kind, description, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for series in sorted(by_name.get(name, []), key=lambda s: sorted(s['labels'].items())):
+            labels = series['labels']
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), series['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{_format_labels({**labels, "le": bound})}}} {cumulative}')
+            suffix = f'{{{_format_labels(labels)}}}' if labels else ''
+            lines.append(f'{name}_sum{suffix} {series["sum"]}')
+            lines.append(f'{name}_count{suffix} {series["count"]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def record_jikan_call(seconds):
+    """Registrar uma chamada à Jikan (no processo e na requisição atual, se houver)"""
+    registry = _registry
+    if registry is not None:
+        registry.observe('jikan_call_duration_seconds', seconds)
+    current = _current.get()
+    if current is not None:
+        current.add_jikan(seconds)
+
+
+def init_metrics(app, db):
+    """Registrar os hooks de requisição e de SQL e o store de métricas"""
+    global _registry
+
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    registry = _registry = _registry or MetricsRegistry()
+    store = MetricsStore(registry, app.config['METRICS_DIR'], app.config['METRICS_FLUSH_INTERVAL'])
+    app.extensions['metrics'] = store
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    for engine in engines:
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if _current.get() is not None:
+                conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            current = _current.get()
+            started = conn.info.get('metrics_started')
+            if current is not None and started:
+                current.sql_statements += 1
+                current.sql_seconds += time.perf_counter() - started.pop()
+
+    # Registrado antes da compressão: os after_request rodam na ordem inversa,
+    # então o tamanho medido é o do corpo já comprimido
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_token = _current.set(RequestMetrics())
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        current = _current.get()
+        if started is None or current is None:
+            return response
+
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        method = request.method
+        registry.observe('http_request_duration_seconds', time.perf_counter() - started,
+                         method=method, endpoint=endpoint, status=response.status_code)
+        if not response.is_streamed and response.content_length is not None:
+            registry.observe('http_response_size_bytes', response.content_length, method=method, endpoint=endpoint)
+        registry.observe('http_request_sql_statements', current.sql_statements, method=method, endpoint=endpoint)
+        registry.observe('http_request_sql_seconds', current.sql_seconds, method=method, endpoint=endpoint)
+        if current.jikan_calls:
+            registry.observe('http_request_jikan_seconds', current.jikan_seconds, method=method, endpoint=endpoint)
+
+        store.maybe_flush()
+        return response
+
+    # Sempre roda, mesmo quando um after_request falha antes deste: sem isso os
+    # acumuladores vazariam para o que a thread executar depois da requisição
+    @app.teardown_request
+    def reset_request_metrics(exc):
+        token = g.pop('metrics_token', None)
+        if token is not None:
+            _current.reset(token)
@@ -0,0 +1,93 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy import and_, or_
+from sqlalchemy.types import DateTime, Integer
+
+# Faixa do INTEGER de 64 bits (valores fora dela dão OverflowError no driver)
+_MAX_INT = 2 ** 63
+
+
+def get_page_params():
+    """Ler limit/cursor da query string; None quando a paginação não foi pedida"""
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        return None
+    
+    max_limit = current_app.config['PAGINATION_MAX_LIMIT']
+    limit = request.args.get('limit', current_app.config['PAGINATION_DEFAULT_LIMIT'], type=int)
+    limit = max(1, min(limit, max_limit))
+    
+    return limit, request.args.get('cursor') or None
+
+
+def encode_cursor(sort_value, row_id):
+    """Codificar a posição (valor de ordenação, id) do último item da página"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and -_MAX_INT <= value < _MAX_INT
+
+
+def decode_cursor(cursor, sort_column):
+    """Decodificar um cursor gerado por encode_cursor
+
+    Cursores alterados pelo cliente viram ValueError (400), nunca um valor
+    de tipo errado que chegaria ao banco.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(sort_column.type, DateTime):
+            sort_value = datetime.fromisoformat(sort_value)
+        elif isinstance(sort_column.type, Integer):
+            if not _is_int(sort_value):
+                raise TypeError('Invalid sort value')
+        elif not isinstance(sort_value, sort_column.type.python_type):
+            raise TypeError('Invalid sort value')
+        if not _is_int(row_id):
+            raise TypeError('Invalid id')
+        return sort_value, row_id
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def keyset_paginate(query, sort_column, id_column, order='asc', limit=50, cursor=None):
+    """Paginar por (coluna de ordenação, id) com range scan, sem OFFSET
+
+    Retorna (itens, next_cursor); next_cursor é None na última página.
+    """
+    descending = order.lower() != 'asc'
+    tie_break = sort_column is not id_column
+    
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, sort_column)
+        if descending:
+            after = sort_column < sort_value
+            if tie_break:
+                after = or_(after, and_(sort_column == sort_value, id_column < last_id))
+        else:
+            after = sort_column > sort_value
+            if tie_break:
+                after = or_(after, and_(sort_column == sort_value, id_column > last_id))
+        query = query.filter(after)
+    
+    columns = [sort_column, id_column] if tie_break else [sort_column]
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    
+    # Um item a mais indica se existe próxima página
+    items = query.limit(limit + 1).all()
+    next_cursor = None
+    
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    
+    return items, next_cursor
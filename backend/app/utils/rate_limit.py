@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket em memória (limite por processo)"""
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def try_acquire(self):
+        """Consome um token se houver; senão retorna quantos segundos esperar"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+    
+    def acquire(self, timeout=None):
+        """Espera até conseguir um token; retorna o tempo esperado ou None se estourar o timeout"""
+        return _acquire(self.try_acquire, timeout)
+
+
+class SQLiteTokenBucket:
+    """Token bucket compartilhado entre processos, guardado em um arquivo SQLite
+
+    Cada tentativa roda em uma transação BEGIN IMMEDIATE, que serializa os
+    workers do gunicorn no lock de escrita do arquivo.
+    """
+    
+    def __init__(self, path, rate, capacity=None, name='default'):
+        self.path = path
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.name = name
+        self._local = threading.local()
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS token_bucket ('
+            'name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+        )
+    
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+    
+    def try_acquire(self):
+        """Consome um token se houver; senão retorna quantos segundos esperar"""
+        conn = self._connection()
+        # Relógio de parede: precisa ser comparável entre processos
+        now = time.time()
+        
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT tokens, updated_at FROM token_bucket WHERE name = ?', (self.name,)
+            ).fetchone()
+            tokens = self.capacity if row is None else min(
+                self.capacity, row[0] + max(now - row[1], 0) * self.rate
+            )
+            
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            
+            conn.execute(
+                'INSERT OR REPLACE INTO token_bucket (name, tokens, updated_at) VALUES (?, ?, ?)',
+                (self.name, tokens, now)
+            )
+            conn.execute('COMMIT')
+            return wait
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    
+    def acquire(self, timeout=None):
+        """Espera até conseguir um token; retorna o tempo esperado ou None se estourar o timeout"""
+        return _acquire(self.try_acquire, timeout)
+
+
+def _acquire(try_acquire, timeout):
+    started = time.monotonic()
+    waited = 0.0
+    
+    while True:
+        wait = try_acquire()
+        
+        if wait == 0:
+            return waited
+        if timeout is not None and waited + wait > timeout:
+            return None
+        time.sleep(wait)
+        waited = time.monotonic() - started
@@ -0,0 +1,27 @@
+def compile_serializer(fields, datetimes=(), nested=None, name='serialize'):
+    """Gerar uma função que serializa um objeto (modelo ou Row) nos campos dados
+
+    O corpo da função é montado uma única vez, então cada chamada é só um
+    literal de dicionário com acessos diretos a atributos, sem laços nem
+    getattr dinâmico. `nested` mapeia um campo para o serializador do
+    objeto relacionado (None quando o relacionamento está vazio).
+    """
+    nested = nested or {}
+    namespace = {}
+    items = []
+    
+    for field in fields:
+        if not field.isidentifier():
+            raise ValueError(f'Invalid field name: {field}')
+        if field in nested:
+            namespace[f'_{field}'] = nested[field]
+            items.append(f"'{field}': _{field}(obj.{field}) if obj.{field} is not None else None")
+        elif field in datetimes:
+            items.append(f"'{field}': obj.{field}.isoformat()")
+        else:
+            items.append(f"'{field}': obj.{field}")
+    
+    source = f'def {name}(obj):\n    return {{' + ', '.join(items) + '}\n'
+    exec(compile(source, f'<serializer {name}>', 'exec'), namespace)
+    return namespace[name]
+
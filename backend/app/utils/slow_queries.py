@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+# Valores de parâmetros maiores que isso são truncados no log
+MAX_PARAMETER_LENGTH = 200
+# Valor registrado no lugar dos parâmetros de escritas
+REDACTED = '<redacted>'
+
+
+class SlowQueryLog:
+    """Buffer circular das últimas consultas lentas do processo
+
+    Cada worker tem o seu buffer; as mesmas entradas vão para o log da
+    aplicação, que é onde elas se juntam entre workers.
+    """
+
+    def __init__(self, max_entries=100):
+        self._entries = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def record(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self, limit=None):
+        """Entradas da mais recente para a mais antiga"""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def explain_prefix(dialect_name, analyze=False):
+    """Prefixo de EXPLAIN do banco (None se não suportado)"""
+    if dialect_name == 'sqlite':
+        return 'EXPLAIN QUERY PLAN '
+    if dialect_name in ('postgresql', 'mysql', 'mariadb'):
+        return 'EXPLAIN ANALYZE ' if analyze else 'EXPLAIN '
+    return None
+
+
+def _is_select(statement):
+    return statement.lstrip().split(None, 1)[0].upper() in ('SELECT', 'WITH')
+
+
+def _format_parameter(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= MAX_PARAMETER_LENGTH else text[:MAX_PARAMETER_LENGTH] + '...'
+
+
+def _format_parameters(parameters, executemany, redact=False):
+    if executemany:
+        return f'<{len(parameters)} parameter sets>'
+    format_parameter = (lambda value: REDACTED) if redact else _format_parameter
+    if isinstance(parameters, dict):
+        return {key: format_parameter(value) for key, value in parameters.items()}
+    return [format_parameter(value) for value in parameters or ()]
+
+
+def _format_plan(dialect_name, rows):
+    if dialect_name == 'sqlite':
+        # (id, parent, notused, detail): indentar cada passo sob o seu pai
+        depths = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depths[node_id] = depths.get(parent, -1) + 1
+            lines.append('  ' * depths[node_id] + detail)
+        return lines
+    return [' | '.join('' if value is None else str(value) for value in row) for row in rows]
+
+
+def explain(connection, statement, parameters, analyze=False):
+    """Plano de execução de `statement` em um cursor à parte da mesma conexão
+
+    Fora do SQLite o EXPLAIN roda dentro de um savepoint, para que uma falha
+    não aborte a transação da requisição.
+    """
+    dialect_name = connection.dialect.name
+    prefix = explain_prefix(dialect_name, analyze)
+    if prefix is None:
+        return None
+
+    use_savepoint = dialect_name != 'sqlite'
+    cursor = connection.connection.cursor()
+    try:
+        if use_savepoint:
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception:
+            if use_savepoint:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            raise
+        if use_savepoint:
+            cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    finally:
+        cursor.close()
+
+    return _format_plan(dialect_name, rows)
+
+
+def init_slow_query_log(app, db):
+    """Registrar consultas acima de SLOW_QUERY_THRESHOLD_MS, com o plano de execução"""
+    if not app.config['SLOW_QUERY_LOG_ENABLED']:
+        return
+
+    threshold = app.config['SLOW_QUERY_THRESHOLD_MS'] / 1000
+    capture_plan = app.config['SLOW_QUERY_EXPLAIN']
+    analyze = app.config['SLOW_QUERY_EXPLAIN_ANALYZE']
+    log = SlowQueryLog(app.config['SLOW_QUERY_BUFFER_SIZE'])
+    app.extensions['slow_queries'] = log
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    for engine in engines:
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('slow_query_started', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info.get('slow_query_started')
+            if not started:
+                return
+            elapsed = time.perf_counter() - started.pop()
+            if elapsed < threshold:
+                return
+
+            # Escritas carregam dados do usuário (ex.: password_hash): só SELECTs mostram valores
+            is_select = _is_select(statement)
+            entry = {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'duration_ms': round(elapsed * 1000, 2),
+                'method': request.method if has_request_context() else None,
+                'endpoint': request.url_rule.rule if has_request_context() and request.url_rule else None,
+                'path': request.full_path.rstrip('?') if has_request_context() else None,
+                'statement': statement,
+                'parameters': _format_parameters(parameters, executemany, redact=not is_select),
+                'plan': None
+            }
+
+            # Só SELECTs: EXPLAIN ANALYZE executa de fato a instrução
+            if capture_plan and not executemany and is_select:
+                try:
+                    entry['plan'] = explain(conn, statement, parameters, analyze)
+                except Exception as e:
+                    entry['plan_error'] = str(e)
+
+            log.record(entry)
+            app.logger.warning(
+                'Slow query (%.1f ms) in %s %s: %s %s%s',
+                entry['duration_ms'], entry['method'] or '-', entry['endpoint'] or '-',
+                ' '.join(statement.split()), entry['parameters'],
+                ''.join(f'\n    {line}' for line in entry['plan'] or ())
+            )
@@ -0,0 +1,40 @@
+from flask import Response, current_app, stream_with_context
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+
+def iter_serialized(rows, serialize, fmt='ndjson'):
+    """Serializar linhas uma a uma, como NDJSON ou como um array JSON em pedaços"""
+    dumps = current_app.json.dumps
+    
+    if fmt == 'ndjson':
+        for row in rows:
+            yield dumps(serialize(row)) + '\n'
+        return
+    
+    yield '['
+    first = True
+    for row in rows:
+        yield ('' if first else ',') + dumps(serialize(row))
+        first = False
+    yield ']\n'
+
+
+def export_response(query, serialize, fmt='ndjson', batch_size=None):
+    """Resposta em streaming que lê a consulta em lotes com yield_per
+
+    O uso de memória fica constante: só um lote de linhas fica vivo por vez.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'Invalid format. Must be one of: {", ".join(EXPORT_FORMATS)}')
+    
+    batch_size = batch_size or current_app.config['EXPORT_BATCH_SIZE']
+    rows = query.yield_per(batch_size)
+    
+    return Response(
+        stream_with_context(iter_serialized(rows, serialize, fmt)),
+        mimetype=EXPORT_FORMATS[fmt]
+    )
@@ -0,0 +1,42 @@
+"""diary composite indexes
+
+Índices compostos para o diário: filtro por user_id (e status) já na ordem
+de cada chave de sort_by, com o id de desempate da paginação por cursor.
+Substituem os índices simples de user_id e status, que viram prefixos.
+Bancos novos já nascem com eles pelo db.create_all(), daí o if_(not_)exists.
+
+Revision ID: 8b4e61f0c2d5
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-17 23:41:41.192713
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e61f0c2d5'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Criar os compostos antes de remover os simples (o MySQL exige um índice na FK de user_id)
+    with op.batch_alter_table('diary_entry', schema=None) as batch_op:
+        batch_op.create_index('ix_diary_entry_user_created', ['user_id', 'created_at', 'id'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_diary_entry_user_updated', ['user_id', 'updated_at', 'id'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_diary_entry_user_score', ['user_id', 'user_score', 'id'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_diary_entry_user_status_created', ['user_id', 'status', 'created_at', 'id'], unique=False, if_not_exists=True)
+        batch_op.drop_index(batch_op.f('ix_diary_entry_user_id'), if_exists=True)
+        batch_op.drop_index(batch_op.f('ix_diary_entry_status'), if_exists=True)
+
+
+def downgrade():
+    with op.batch_alter_table('diary_entry', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_diary_entry_user_id'), ['user_id'], unique=False, if_not_exists=True)
+        batch_op.create_index(batch_op.f('ix_diary_entry_status'), ['status'], unique=False, if_not_exists=True)
+        batch_op.drop_index('ix_diary_entry_user_status_created', if_exists=True)
+        batch_op.drop_index('ix_diary_entry_user_score', if_exists=True)
+        batch_op.drop_index('ix_diary_entry_user_updated', if_exists=True)
+        batch_op.drop_index('ix_diary_entry_user_created', if_exists=True)
@@ -0,0 +1,37 @@
+"""anime refresh_failed_at
+
+Última tentativa sem sucesso de atualizar o anime pela Jikan (erro ou 404),
+para que o CatalogueRefresher não o tente de novo a cada rodada.
+Bancos novos já nascem com a coluna pelo db.create_all(); o SQLite não tem
+ADD COLUMN IF NOT EXISTS, então a existência é conferida pelo inspector.
+
+Revision ID: c5d2e7a14f93
+Revises: 8b4e61f0c2d5
+Create Date: 2026-10-18 10:12:37.418205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d2e7a14f93'
+down_revision = '8b4e61f0c2d5'
+branch_labels = None
+depends_on = None
+
+
+def _has_column():
+    return 'refresh_failed_at' in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('anime')}
+
+
+def upgrade():
+    if not _has_column():
+        with op.batch_alter_table('anime', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('refresh_failed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    if _has_column():
+        with op.batch_alter_table('anime', schema=None) as batch_op:
+            batch_op.drop_column('refresh_failed_at')
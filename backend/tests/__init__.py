@@ -0,0 +1,28 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+@contextmanager
+def count_queries(engine):
+    """Conta os comandos SQL executados no engine dentro do bloco"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@contextmanager
+def assert_num_queries(engine, expected):
+    """Falha se o bloco executar um número de comandos SQL diferente do esperado"""
+    with count_queries(engine) as statements:
+        yield statements
+    assert len(statements) == expected, (
+        f'Expected {expected} SQL statements, got {len(statements)}:\n' + '\n'.join(statements)
+    )
@@ -0,0 +1,22 @@
+import time
+
+
+def best_time(function, repeat=3):
+    """Menor tempo (s) de `repeat` execuções de `function`"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def report(title, header, rows):
+    """Imprimir uma tabela de resultados (rode com -s para vê-la)"""
+    table = [header] + [[cell if isinstance(cell, str) else f'{cell:,.1f}' for cell in row] for row in rows]
+    widths = [max(len(row[column]) for row in table) for column in range(len(header))]
+
+    print(f'\n{title}')
+    for row in table:
+        print('  ' + '  '.join(cell.ljust(width) if column == 0 else cell.rjust(width)
+                                for column, (cell, width) in enumerate(zip(row, widths))))
@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from app import create_app
+from app.config import TestingConfig, config
+from app.models import db
+
+
+@pytest.fixture(autouse=True)
+def _benchmarks_opt_in():
+    """Benchmarks são lentos: só rodam com RUN_BENCHMARKS=1 (python -m pytest tests/benchmarks -s)"""
+    if not os.getenv('RUN_BENCHMARKS'):
+        pytest.skip('benchmark (set RUN_BENCHMARKS=1 to run)')
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """Como o fixture `app`, mas com SQLite em arquivo (commits pagam o custo de disco)"""
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "benchmark.db"}'
+
+    monkeypatch.setitem(config, 'benchmark', FileConfig)
+    app = create_app('benchmark')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
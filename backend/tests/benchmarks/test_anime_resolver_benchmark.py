@@ -0,0 +1,55 @@
+import random
+
+from sqlalchemy import insert
+
+from app.models import db, Anime
+from app.services.anime_resolver import get_anime_resolver
+from tests.benchmarks import best_time, report
+
+ANIMES = 10_000
+LOOKUPS = 20_000
+# O caminho antigo faz 1-2 consultas por busca: amostra menor
+OLD_LOOKUPS = 2_000
+
+
+def _old_lookup(value):
+    """Como get_anime/add_to_diary resolviam antes: mal_id e, se não achar, id do banco"""
+    anime = Anime.query.filter_by(mal_id=value).first()
+    return anime.id if anime else db.session.get(Anime, value).id
+
+
+def test_anime_id_lookups_per_second(app):
+    db.session.execute(insert(Anime), [
+        {'mal_id': 100_000 + i, 'title': f'Anime {i}'} for i in range(ANIMES)
+    ])
+    db.session.commit()
+    ids = [anime_id for (anime_id,) in db.session.query(Anime.id)]
+
+    randomizer = random.Random(7)
+    mal_ids = [randomizer.randint(100_000, 100_000 + ANIMES - 1) for _ in range(LOOKUPS)]
+    db_ids = [randomizer.choice(ids) for _ in range(LOOKUPS)]
+    resolver = get_anime_resolver()
+
+    def old(values):
+        return lambda: [_old_lookup(value) for value in values]
+
+    def resolve(values, by=None):
+        return lambda: [resolver.resolve(value, by) for value in values]
+
+    # Aquecer o mapa (a primeira passada carrega cada valor com uma consulta)
+    resolve(mal_ids)()
+    resolve(db_ids, 'id')()
+
+    rows = [
+        ('old: mal_id, then id (mal_id)', OLD_LOOKUPS / best_time(old(mal_ids[:OLD_LOOKUPS]), repeat=1)),
+        ('old: mal_id, then id (db id)', OLD_LOOKUPS / best_time(old(db_ids[:OLD_LOOKUPS]), repeat=1)),
+        ('resolver, by=None (mal_id)', LOOKUPS / best_time(resolve(mal_ids))),
+        ('resolver, by=mal_id', LOOKUPS / best_time(resolve(mal_ids, 'mal_id'))),
+        ('resolver, by=id', LOOKUPS / best_time(resolve(db_ids, 'id'))),
+        # Ausência de mal_id reconfirmada no banco a cada busca (sem `by`)
+        ('resolver, by=None (db id)', OLD_LOOKUPS / best_time(resolve(db_ids[:OLD_LOOKUPS]), repeat=1)),
+    ]
+    report(f'Anime id lookups per second ({ANIMES:,} animes, warm map)', ('lookup', 'lookups/s'), rows)
+
+    old_rate = rows[0][1]
+    assert all(lookups_per_second > old_rate for _, lookups_per_second in rows[2:5])
@@ -0,0 +1,97 @@
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+
+from app.models import db, Anime, DiaryEntry, User
+from app.services.diary_service import DiaryService
+from tests.benchmarks import best_time, report
+
+HEAVY_ENTRIES = 20_000
+LIGHT_USERS = 80
+LIGHT_ENTRIES = 1_000
+PAGE = 50
+
+COMPOSITE_INDEXES = (
+    'ix_diary_entry_user_created', 'ix_diary_entry_user_updated',
+    'ix_diary_entry_user_score', 'ix_diary_entry_user_status_created',
+)
+# Índices anteriores (user_id e status isolados), como no downgrade da migração 8b4e61f0c2d5
+OLD_INDEXES = (
+    'CREATE INDEX ix_diary_entry_user_id ON diary_entry (user_id)',
+    'CREATE INDEX ix_diary_entry_status ON diary_entry (status)',
+)
+
+
+def _seed():
+    """100k registros: um usuário com 20k e 80 usuários com 1k cada"""
+    db.session.execute(insert(Anime), [{'mal_id': i, 'title': f'Anime {i}'} for i in range(HEAVY_ENTRIES)])
+    anime_ids = [anime_id for (anime_id,) in db.session.query(Anime.id)]
+    db.session.execute(insert(User), [
+        {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': '-'} for i in range(LIGHT_USERS + 1)
+    ])
+    user_ids = [user_id for (user_id,) in db.session.query(User.id).order_by(User.id)]
+
+    randomizer = random.Random(23)
+    start = datetime(2024, 1, 1)
+    for user_id, count in [(user_ids[0], HEAVY_ENTRIES)] + [(user_id, LIGHT_ENTRIES) for user_id in user_ids[1:]]:
+        db.session.execute(insert(DiaryEntry), [
+            {'user_id': user_id, 'anime_id': anime_id, 'user_score': randomizer.randint(1, 10),
+             'status': randomizer.choice(DiaryEntry.VALID_STATUSES), 'episodes_watched': 12,
+             'created_at': start + timedelta(minutes=randomizer.randrange(500_000)),
+             'updated_at': start + timedelta(minutes=randomizer.randrange(500_000))}
+            for anime_id in randomizer.sample(anime_ids, count)
+        ])
+    db.session.commit()
+    return user_ids[0]
+
+
+def _use_old_indexes():
+    for name in COMPOSITE_INDEXES:
+        db.session.execute(text(f'DROP INDEX {name}'))
+    for statement in OLD_INDEXES:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+
+def _reads(user_id):
+    service = DiaryService()
+
+    def page(sort_by, status=None, deep=False):
+        def read():
+            cursor = None
+            # Página "profunda": segue o cursor por 20 páginas
+            for _ in range(20 if deep else 1):
+                _, cursor = service.get_user_diary_page(user_id, status, sort_by, 'desc', PAGE, cursor)
+            db.session.expunge_all()
+        return read
+
+    return [
+        ('page of 50, created_at desc', page('created_at')),
+        ('page of 50, updated_at desc', page('updated_at')),
+        ('page of 50, user_score desc', page('user_score')),
+        ('status page, created_at desc', page('created_at', 'completed')),
+        ('status page, user_score desc', page('user_score', 'completed')),
+        ('20 cursor pages, created_at desc', page('created_at', deep=True)),
+    ]
+
+
+def _milliseconds(reads):
+    return {name: best_time(read) * 1000 for name, read in reads}
+
+
+def test_sorted_diary_reads(file_app):
+    user_id = _seed()
+    reads = _reads(user_id)
+
+    composite = _milliseconds(reads)
+    _use_old_indexes()
+    old = _milliseconds(reads)
+
+    rows = [(name, old[name], composite[name]) for name, _ in reads]
+    total = HEAVY_ENTRIES + LIGHT_USERS * LIGHT_ENTRIES
+    report(
+        f'Sorted diary reads, ms ({total:,} entries, user with {HEAVY_ENTRIES:,}, SQLite file)',
+        ('read', 'old indexes', 'composite'), rows
+    )
+    assert all(composite_ms < old_ms for _, old_ms, composite_ms in rows[:3])
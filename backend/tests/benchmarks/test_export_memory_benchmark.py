@@ -0,0 +1,68 @@
+import os
+import tracemalloc
+
+from flask import json
+from sqlalchemy import insert
+
+from app.models import db, Anime
+from tests.benchmarks import report
+
+# Tamanhos do catálogo exportado; o maior leva minutos sob tracemalloc (BENCHMARK_EXPORT_ROWS reduz)
+SIZES = (1_000, 100_000, int(os.getenv('BENCHMARK_EXPORT_ROWS', 1_000_000)))
+# A lista completa em memória (antes do streaming) só até esse tamanho
+MAX_BUFFERED_ROWS = 100_000
+INSERT_BATCH = 50_000
+
+
+def _grow_catalog(size):
+    first = Anime.query.count()
+    for start in range(first, size, INSERT_BATCH):
+        db.session.execute(insert(Anime), [
+            {'mal_id': i, 'title': f'Anime {i}', 'synopsis': 'x' * 200, 'score': 7.5,
+             'episodes': 12, 'status': 'Finished Airing'}
+            for i in range(start, min(start + INSERT_BATCH, size))
+        ])
+        db.session.commit()
+
+
+def _peak_mib(function):
+    """Pico de memória Python (MiB) alocada durante `function`"""
+    tracemalloc.start()
+    try:
+        result = function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / 2 ** 20
+
+
+def _stream(client):
+    response = client.get('/api/animes/export', buffered=False)
+    lines = sum(chunk.count(b'\n') for chunk in response.iter_encoded())
+    response.close()
+    return lines
+
+
+def _buffered():
+    # Como uma exportação sem streaming: todos os objetos e o corpo inteiro em memória
+    return len(json.dumps([anime.to_dict() for anime in Anime.query.order_by(Anime.id).all()]))
+
+
+def test_export_peak_memory(app, client):
+    rows = []
+    for size in SIZES:
+        _grow_catalog(size)
+        db.session.expunge_all()
+
+        lines, streamed = _peak_mib(lambda: _stream(client))
+        assert lines == size
+        buffered = None
+        if size <= MAX_BUFFERED_ROWS:
+            _, buffered = _peak_mib(_buffered)
+            db.session.expunge_all()
+        rows.append((f'{size:,}', streamed, '-' if buffered is None else buffered))
+
+    report('Peak Python memory (MiB) exporting the anime catalogue', ('rows', 'streamed NDJSON', 'list + dumps'), rows)
+
+    # Streaming: a partir de um lote cheio (EXPORT_BATCH_SIZE), o pico não cresce com o catálogo
+    assert rows[-1][1] < rows[1][1] * 1.5
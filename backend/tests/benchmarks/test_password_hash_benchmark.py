@@ -0,0 +1,66 @@
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.password_hasher import _bcrypt, get_password_hasher
+from tests.benchmarks import report
+
+REQUESTS = 24
+CONCURRENCY = 8
+PASSWORD = 'password123'
+
+# Custos padrão de produção (Config); o bcrypt só entra se estiver instalado
+ALGORITHMS = ['scrypt', 'pbkdf2'] + (['bcrypt'] if _bcrypt else [])
+WORKERS = (0, 2)
+
+
+def _configure(app, algorithm, workers):
+    """Trocar algoritmo e pool (o hasher é recriado na próxima chamada)"""
+    hasher = app.extensions.pop('password_hasher', None)
+    if hasher is not None:
+        hasher.close()
+    app.config.update(PASSWORD_HASH_ALGORITHM=algorithm, PASSWORD_HASH_WORKERS=workers, PASSWORD_HASH_SCRYPT_N=32768)
+
+
+def _rate(app, request):
+    """Requisições por segundo com CONCURRENCY threads, cada uma com seu test client"""
+    def run(number):
+        response = request(app.test_client(), number)
+        assert response.status_code in (200, 201, 401), response.json
+        return response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(CONCURRENCY) as executor:
+        statuses = list(executor.map(run, range(REQUESTS)))
+    return REQUESTS / (time.perf_counter() - started), statuses
+
+
+def test_register_and_login_throughput(file_app):
+    rows = []
+
+    for run, (algorithm, workers) in enumerate(itertools.product(ALGORITHMS, WORKERS)):
+        _configure(file_app, algorithm, workers)
+        prefix = f'user{run}'
+        # Aquecer o pool (processos sobem sob demanda) e o hash de usuários inexistentes
+        with file_app.app_context():
+            get_password_hasher().verify_dummy(PASSWORD)
+
+        register, _ = _rate(file_app, lambda client, n: client.post('/api/users/register', json={
+            'username': f'{prefix}_{n}', 'email': f'{prefix}_{n}@example.com', 'password': PASSWORD
+        }))
+        login, statuses = _rate(file_app, lambda client, n: client.post('/api/users/login', json={
+            'username': f'{prefix}_{n}', 'password': PASSWORD
+        }))
+        assert set(statuses) == {200}
+        unknown, statuses = _rate(file_app, lambda client, n: client.post('/api/users/login', json={
+            'username': f'{prefix}_missing_{n}', 'password': PASSWORD
+        }))
+        assert set(statuses) == {401}
+
+        rows.append((algorithm, str(workers), register, login, unknown))
+
+    _configure(file_app, 'scrypt', 0)
+    report(
+        f'Password hashing throughput, req/s ({REQUESTS} requests, {CONCURRENCY} threads, production costs)',
+        ('algorithm', 'pool workers', 'register', 'login', 'unknown user login'), rows
+    )
@@ -0,0 +1,66 @@
+from sqlalchemy import event
+
+from app.models import db, Anime
+from app.services.anime_service import AnimeService
+from tests import count_queries
+from tests.benchmarks import best_time, report
+
+RESULTS = 12
+SEARCHES = 50
+
+
+def _old_save_or_update_anime(anime_data):
+    """Como _fetch_and_save salvava cada resultado antes: uma consulta e um commit por anime"""
+    anime = Anime.query.filter_by(mal_id=anime_data['mal_id']).first()
+    if not anime:
+        anime = Anime(**AnimeService._anime_fields(anime_data))
+        db.session.add(anime)
+    else:
+        AnimeService._apply_jikan_update(anime, anime_data)
+    db.session.commit()
+    return anime
+
+
+def _page(search):
+    """Uma página de resultados da Jikan com mal_ids novos"""
+    first = 10_000 + search * RESULTS
+    return [
+        {'mal_id': mal_id, 'title': f'Anime {mal_id}', 'score': 7.5, 'episodes': 12, 'status': 'Finished Airing'}
+        for mal_id in range(first, first + RESULTS)
+    ]
+
+
+def _measure(save, pages):
+    """Commits e comandos SQL por busca, e buscas por segundo"""
+    commits = []
+    listener = lambda session: commits.append(session)
+    event.listen(db.session, 'after_commit', listener)
+    try:
+        with count_queries(db.engine) as statements:
+            seconds = best_time(lambda: [save(page) for page in pages], repeat=1)
+    finally:
+        event.remove(db.session, 'after_commit', listener)
+    return len(commits) / len(pages), len(statements) / len(pages), len(pages) / seconds
+
+
+def test_commits_per_search(file_app):
+    service = AnimeService()
+    old = lambda page: [_old_save_or_update_anime(anime_data) for anime_data in page]
+
+    new_pages = [_page(search) for search in range(SEARCHES)]
+    old_pages = [_page(search) for search in range(SEARCHES, 2 * SEARCHES)]
+
+    rows = [
+        ('old: new animes', *_measure(old, old_pages)),
+        ('batched: new animes', *_measure(service._save_or_update_animes, new_pages)),
+        # Mesmas páginas de novo: todos os animes já existem
+        ('old: existing animes', *_measure(old, old_pages)),
+        ('batched: existing animes', *_measure(service._save_or_update_animes, new_pages)),
+    ]
+    report(
+        f'Saving Jikan search results ({RESULTS} per page, {SEARCHES} searches, SQLite file)',
+        ('path', 'commits/search', 'statements/search', 'searches/s'), rows
+    )
+
+    assert rows[1][1] == rows[3][1] == 1
+    assert rows[0][1] == rows[2][1] == RESULTS
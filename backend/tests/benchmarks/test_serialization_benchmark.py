@@ -0,0 +1,83 @@
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload
+
+from app.models import db, Anime, DiaryEntry, User
+from app.utils.fieldsets import Fieldset, sparse_serializer
+from app.utils.json_provider import OrjsonProvider, orjson
+from tests.benchmarks import best_time, report
+
+ROWS = 5_000
+
+
+def _old_anime(anime):
+    """to_dict escrito à mão, antes dos serializadores compilados"""
+    return {
+        'id': anime.id, 'mal_id': anime.mal_id, 'title': anime.title, 'synopsis': anime.synopsis,
+        'score': anime.score, 'episodes': anime.episodes, 'image_url': anime.image_url, 'status': anime.status,
+        'created_at': anime.created_at.isoformat(), 'updated_at': anime.updated_at.isoformat()
+    }
+
+
+def _old_user(user):
+    return {
+        'id': user.id, 'username': user.username, 'email': user.email,
+        'created_at': user.created_at.isoformat(), 'updated_at': user.updated_at.isoformat()
+    }
+
+
+def _old_diary_entry(entry):
+    return {
+        'id': entry.id, 'user_id': entry.user_id, 'anime_id': entry.anime_id,
+        'anime': _old_anime(entry.anime) if entry.anime else None,
+        'user_score': entry.user_score, 'status': entry.status, 'episodes_watched': entry.episodes_watched,
+        'notes': entry.notes, 'created_at': entry.created_at.isoformat(), 'updated_at': entry.updated_at.isoformat()
+    }
+
+
+def _seed():
+    db.session.execute(insert(Anime), [
+        {'mal_id': i, 'title': f'Anime {i}', 'synopsis': 'x' * 200, 'score': 7.5, 'episodes': 12,
+         'image_url': f'https://cdn.example.com/{i}.jpg', 'status': 'Finished Airing'}
+        for i in range(ROWS)
+    ])
+    db.session.execute(insert(User), [
+        {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': '-'} for i in range(ROWS)
+    ])
+    anime_ids = [anime_id for (anime_id,) in db.session.query(Anime.id)]
+    user_id = db.session.query(User.id).first()[0]
+    db.session.execute(insert(DiaryEntry), [
+        {'user_id': user_id, 'anime_id': anime_id, 'user_score': 8, 'status': 'completed', 'episodes_watched': 12}
+        for anime_id in anime_ids
+    ])
+    db.session.commit()
+
+
+def test_serialization_rows_per_second(app):
+    _seed()
+    models = [
+        (Anime, _old_anime, Anime.query.all()),
+        (User, _old_user, User.query.all()),
+        (DiaryEntry, _old_diary_entry, DiaryEntry.query.options(joinedload(DiaryEntry.anime)).all()),
+    ]
+    encoders = [('json', DefaultJSONProvider(app).dumps)]
+    if orjson is not None:
+        encoders.append(('orjson', OrjsonProvider(app).dumps))
+
+    def rate(function):
+        return ROWS / best_time(function)
+
+    rows = []
+    for model, old, objects in models:
+        new = model.to_dict
+        sparse = sparse_serializer(model, Fieldset(('id', model.SERIALIZED_FIELDS[1])))
+        assert [new(obj) for obj in objects[:100]] == [old(obj) for obj in objects[:100]]
+
+        rows.append((model.__name__, 'old to_dict', rate(lambda: [old(obj) for obj in objects])))
+        rows.append((model.__name__, 'compiled to_dict', rate(lambda: [new(obj) for obj in objects])))
+        rows.append((model.__name__, 'compiled, 2 fields', rate(lambda: [sparse(obj) for obj in objects])))
+        for name, dumps in encoders:
+            rows.append((model.__name__, f'old to_dict + {name}', rate(lambda: dumps([old(obj) for obj in objects]))))
+            rows.append((model.__name__, f'compiled + {name}', rate(lambda: dumps([new(obj) for obj in objects]))))
+
+    report(f'Serialization rows per second ({ROWS:,} loaded rows per model)', ('model', 'path', 'rows/s'), rows)
@@ -0,0 +1,126 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+from sqlalchemy.pool import NullPool
+
+from app import create_app
+from app.config import TestingConfig, config
+from app.models import db, DiaryEntry, User
+from app.services.anime_service import AnimeService
+from app.services.diary_service import DiaryService
+from tests.benchmarks import report
+
+WORKERS = 4
+WRITES = 150
+
+# Antes: sem pragmas (rollback journal, synchronous=FULL, sem mmap; só o timeout de 5s do sqlite3)
+SETTINGS = {
+    'defaults': dict(SQLITE_JOURNAL_MODE='', SQLITE_BUSY_TIMEOUT=None, SQLITE_SYNCHRONOUS='', SQLITE_MMAP_SIZE=None),
+    'pragmas': dict(SQLITE_JOURNAL_MODE='WAL', SQLITE_BUSY_TIMEOUT=5000, SQLITE_SYNCHRONOUS='NORMAL',
+                    SQLITE_MMAP_SIZE=268435456),
+}
+
+# Servidores (PostgreSQL/MySQL): uma conexão nova por checkout contra o pool dimensionado (DB_POOL_*)
+SERVER_SETTINGS = {
+    'no pool': dict(SQLALCHEMY_ENGINE_OPTIONS={'poolclass': NullPool}),
+    'pool': {},
+}
+
+# Bancos descartáveis para o benchmark (as tabelas são recriadas): sem a variável, o caso é pulado
+SERVER_URL_VARIABLES = ('BENCHMARK_POSTGRES_URL', 'BENCHMARK_MYSQL_URL')
+
+
+def _app(uri, settings):
+    """App sobre o banco `uri` com as opções de `settings` (chamado em cada processo)"""
+    config['benchmark'] = type('BenchmarkConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': uri, 'LOCAL_SEARCH_ENABLED': False, **settings
+    })
+    return create_app('benchmark')
+
+
+def _worker(uri, settings, worker, user_id, started):
+    """Como um worker do gunicorn: cria animes, adiciona ao diário e lê o diário, com commit por escrita"""
+    app = _app(uri, settings)
+    anime_service, diary_service = AnimeService(), DiaryService()
+    writes = 0
+    errors = []
+
+    with app.app_context():
+        started.wait()
+        for i in range(WRITES):
+            try:
+                anime = anime_service.create_anime({'mal_id': worker * 100_000 + i + 1, 'title': f'Anime {worker}-{i}'})
+                diary_service.add_to_diary(user_id, {'anime_id': anime.id, 'user_score': 7}, by='id')
+                writes += 2
+            except Exception as e:
+                db.session.rollback()
+                errors.append(str(e).splitlines()[0][:100])
+            DiaryEntry.query.filter_by(user_id=user_id).count()
+    return writes, errors
+
+
+def _run(uri, settings):
+    app = _app(uri, settings)
+    with app.app_context():
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+        user = User(username='reader', email='reader@example.com', password_hash='-')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        if db.engine.dialect.name == 'sqlite':
+            journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+        else:
+            journal_mode = db.engine.dialect.name
+        db.session.remove()
+        db.engine.dispose()
+
+    context = multiprocessing.get_context('fork')
+    with context.Manager() as manager:
+        started = manager.Event()
+        with context.Pool(WORKERS) as pool:
+            results = pool.starmap_async(_worker, [(uri, settings, worker, user_id, started) for worker in range(WORKERS)])
+            # Dar tempo a todos os processos de subir antes de liberar a carga
+            time.sleep(2)
+            began = time.perf_counter()
+            started.set()
+            results = results.get()
+            elapsed = time.perf_counter() - began
+
+    writes = sum(w for w, _ in results)
+    errors = [error for _, worker_errors in results for error in worker_errors]
+    return journal_mode, writes / elapsed, errors
+
+
+def test_write_throughput_with_and_without_pragmas(tmp_path):
+    rows = []
+    for name, settings in SETTINGS.items():
+        journal_mode, writes_per_second, errors = _run(f'sqlite:///{tmp_path / name}.db', settings)
+        rows.append((name, journal_mode, writes_per_second, str(len(errors))))
+
+    report(
+        f'SQLite writes per second ({WORKERS} processes x {WRITES} iterations, commit per write)',
+        ('settings', 'journal', 'writes/s', 'failed iterations'), rows
+    )
+    assert rows[1][1] == 'wal'
+    assert rows[1][3] == '0'
+
+
+@pytest.mark.parametrize('variable', SERVER_URL_VARIABLES)
+def test_write_throughput_on_server_databases(variable):
+    uri = os.getenv(variable)
+    if not uri:
+        pytest.skip(f'{variable} is not set')
+
+    rows = []
+    for name, settings in SERVER_SETTINGS.items():
+        dialect, writes_per_second, errors = _run(uri, settings)
+        rows.append((name, dialect, writes_per_second, str(len(errors))))
+
+    report(
+        f'{variable}: writes per second ({WORKERS} processes x {WRITES} iterations, commit per write)',
+        ('settings', 'dialect', 'writes/s', 'failed iterations'), rows
+    )
+    assert rows[1][3] == '0'
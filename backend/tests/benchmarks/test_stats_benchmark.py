@@ -0,0 +1,77 @@
+from sqlalchemy import insert
+
+from app.models import db, Anime, DiaryEntry, User, UserDiaryStats
+from app.services.diary_service import DiaryService
+from tests.benchmarks import best_time, report
+
+SIZES = (10, 1_000, 100_000)
+STATUSES = DiaryEntry.VALID_STATUSES
+
+
+def _old_get_stats(user_id):
+    """Como get_stats calculava antes: todos os registros em memória, seis passadas"""
+    entries = DiaryEntry.query.filter_by(user_id=user_id).all()
+    if not entries:
+        return {}
+    total_animes = len(entries)
+    return {
+        'total_animes': total_animes,
+        'average_score': round(sum(e.user_score for e in entries) / total_animes, 2),
+        **{status: sum(1 for e in entries if e.status == status) for status in STATUSES},
+        'total_episodes': sum(e.episodes_watched or 0 for e in entries)
+    }
+
+
+def _calls_per_second(function, size):
+    # Menos chamadas nos diários grandes, para o benchmark terminar em segundos
+    calls = max(1, 10_000 // size)
+    return calls / best_time(lambda: [function() for _ in range(calls)])
+
+
+def test_stats_by_diary_size(app):
+    db.session.execute(insert(Anime), [{'mal_id': i, 'title': f'Anime {i}'} for i in range(max(SIZES))])
+    anime_ids = [anime_id for (anime_id,) in db.session.query(Anime.id).order_by(Anime.id)]
+
+    users = {}
+    for size in SIZES:
+        user = User(username=f'user{size}', email=f'user{size}@example.com', password_hash='-')
+        db.session.add(user)
+        db.session.flush()
+        users[size] = user.id
+        db.session.execute(insert(DiaryEntry), [
+            {'user_id': user.id, 'anime_id': anime_id, 'user_score': 1 + i % 10,
+             'status': STATUSES[i % len(STATUSES)], 'episodes_watched': i % 25}
+            for i, anime_id in enumerate(anime_ids[:size])
+        ])
+    db.session.commit()
+
+    # Inserções diretas não passam pelo resumo: materializar com rebuild_stats
+    service = DiaryService()
+    service.rebuild_stats()
+    assert service.rebuild_stats(fix=False) == []
+
+    rows = []
+    for size, user_id in users.items():
+        def materialized():
+            # Leitura do resumo sem o cache de leituras (o que get_stats faz num miss)
+            db.session.expunge_all()
+            return db.session.get(UserDiaryStats, user_id).to_dict()
+
+        expected = _old_get_stats(user_id)
+        stats = materialized()
+        assert {key: stats[key] for key in expected} == expected
+
+        rows.append((
+            f'{size:,}',
+            _calls_per_second(lambda: _old_get_stats(user_id), size),
+            _calls_per_second(lambda: service._aggregate_stats(user_id), size),
+            _calls_per_second(materialized, size),
+            _calls_per_second(lambda: service.get_stats(user_id), size),
+        ))
+
+    report(
+        'Diary stats calls per second by diary size',
+        ('entries', 'old: load all', 'GROUP BY status', 'summary row', 'get_stats (cached)'), rows
+    )
+    # O resumo materializado não depende do tamanho do diário
+    assert rows[-1][3] > rows[-1][1] * 100
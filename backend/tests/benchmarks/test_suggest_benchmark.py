@@ -0,0 +1,82 @@
+import random
+
+from sqlalchemy import insert
+
+from app.models import db, Anime
+from app.services.suggest_index import TrigramIndex
+from tests.benchmarks import best_time, report
+
+SIZES = (1_000, 10_000, 30_000)
+QUERIES = 500
+# Meta de latência média por sugestão com ~30 mil títulos, só reportada: títulos
+# sintéticos têm poucos trigramas distintos (listas longas), o pior caso do índice
+TARGET_MS = 1.0
+# Limite contra regressões no maior catálogo
+MAX_MS = 25.0
+# Fração mínima das buscas com o título pretendido entre as sugestões
+MIN_RECALL = 0.9
+
+# Sílabas para palavras romanizadas e palavras comuns nos títulos do MyAnimeList
+SYLLABLES = ('ka ki ku ke ko sa shi su se so ta chi tsu te to na ni nu ne no ha hi fu he ho '
+             'ma mi mu me mo ya yu yo ra ri ru re ro wa n ga gi gu ge go za ji zu ze zo ba bi bu be bo').split()
+COMMON = ('no', 'wa', 'ga', 'to', 'the', 'of', 'season', 'movie', 'special', 'final', 'part', 'ova', '2', '3')
+
+
+def _word(randomizer):
+    return ''.join(randomizer.choices(SYLLABLES, k=randomizer.randint(2, 4)))
+
+
+def _titles(count, randomizer):
+    """Títulos sintéticos: 2 a 5 palavras, um terço delas comuns (no, season, movie...)"""
+    vocabulary = [_word(randomizer) for _ in range(count // 2)]
+    titles = set()
+    while len(titles) < count:
+        words = [
+            randomizer.choice(COMMON) if position and randomizer.random() < 0.33 else randomizer.choice(vocabulary)
+            for position in range(randomizer.randint(2, 5))
+        ]
+        titles.add(' '.join(word.capitalize() for word in words))
+    return sorted(titles)
+
+
+def _typo(title, randomizer):
+    """Título com uma letra trocada (erro de digitação) ou, às vezes, só o começo"""
+    text = title.lower()
+    if randomizer.random() < 0.3:
+        return text[:randomizer.randint(3, len(text))]
+    position = randomizer.randrange(len(text))
+    return text[:position] + randomizer.choice('aeiouknrst') + text[position + 1:]
+
+
+def test_suggest_latency_by_catalogue_size(app):
+    randomizer = random.Random(7)
+    titles = _titles(max(SIZES), randomizer)
+    randomizer.shuffle(titles)
+    rows = []
+
+    for size in SIZES:
+        inserted = db.session.query(Anime).count()
+        db.session.execute(insert(Anime), [
+            {'mal_id': i + 1, 'title': title} for i, title in enumerate(titles[inserted:size], inserted)
+        ])
+        db.session.commit()
+
+        index = TrigramIndex()
+        build = best_time(index.setup, repeat=1)
+        assert len(index) == size
+
+        targets = [randomizer.choice(titles[:size]) for _ in range(QUERIES)]
+        queries = [_typo(title, randomizer) for title in targets]
+        elapsed = best_time(lambda: [index.suggest(query) for query in queries])
+
+        found = sum(
+            title in [suggestion['title'] for suggestion in index.suggest(query)]
+            for query, title in zip(queries, targets)
+        )
+        rows.append((f'{size:,}', build * 1000, elapsed / QUERIES * 1000, QUERIES / elapsed, 100 * found / QUERIES))
+
+    report(f'Trigram suggestions by catalogue size (typos and prefixes, target {TARGET_MS} ms/query)',
+           ('titles', 'build ms', 'mean query ms', 'queries/s', 'recall %'), rows)
+
+    assert rows[-1][2] < MAX_MS
+    assert all(recall >= 100 * MIN_RECALL for *_, recall in rows)
@@ -0,0 +1,51 @@
+import pytest
+
+from app import create_app
+from app.models import db, Anime, User
+
+
+@pytest.fixture
+def app():
+    """Aplicação com TestingConfig (SQLite em memória, cache de leituras em memória)"""
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """Criar um usuário diretamente no banco (sem passar pelo hash da senha)"""
+    counter = iter(range(1, 1_000_000))
+
+    def make_user(username=None):
+        number = next(counter)
+        user = User(username=username or f'user{number}', email=f'user{number}@example.com', password_hash='-')
+        db.session.add(user)
+        db.session.commit()
+        return user
+
+    return make_user
+
+
+@pytest.fixture
+def make_animes(app):
+    """Criar `count` animes com mal_id a partir de `first_mal_id`"""
+    def make_animes(count, first_mal_id=1000):
+        animes = [
+            Anime(mal_id=first_mal_id + i, title=f'Anime {first_mal_id + i}', episodes=12, status='Finished Airing')
+            for i in range(count)
+        ]
+        db.session.add_all(animes)
+        db.session.commit()
+        return animes
+
+    return make_animes
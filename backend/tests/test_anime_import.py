@@ -0,0 +1,100 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from app.models import db, Anime
+from app.services.anime_service import AnimeService
+
+
+def test_import_keeps_fields_missing_from_the_dump(app):
+    service = AnimeService()
+    service.import_animes([{'mal_id': 1, 'title': 'Cowboy Bebop', 'score': 8.8, 'episodes': 26, 'status': 'Finished Airing'}])
+
+    service.import_animes([{'mal_id': 1, 'title': 'Cowboy Bebop'}])
+
+    anime = Anime.query.filter_by(mal_id=1).one()
+    assert (anime.score, anime.episodes, anime.status) == (8.8, 26, 'Finished Airing')
+
+
+def test_import_updates_fields_present_in_the_dump(app):
+    service = AnimeService()
+    service.import_animes([{'mal_id': 1, 'title': 'Cowboy Bebop', 'score': 8.8, 'episodes': 26, 'status': 'Currently Airing'}])
+
+    service.import_animes([{'mal_id': 1, 'title': 'Cowboy Bebop', 'score': 8.9, 'status': 'Finished Airing'}])
+
+    anime = Anime.query.filter_by(mal_id=1).one()
+    assert (anime.score, anime.episodes, anime.status) == (8.9, 26, 'Finished Airing')
+
+
+def _dump(path, count, gz=False, array=False):
+    """Dump com `count` animes (mal_id 1..count) em NDJSON ou array JSON"""
+    records = [{'mal_id': i, 'title': f'Anime {i}', 'episodes': i} for i in range(1, count + 1)]
+    text = json.dumps(records) if array else ''.join(json.dumps(record) + '\n' for record in records)
+    with (gzip.open if gz else open)(path, 'wt', encoding='utf-8') as f:
+        f.write(text)
+    return str(path)
+
+
+def _imported():
+    db.session.expire_all()
+    return [(anime.mal_id, anime.episodes) for anime in Anime.query.order_by(Anime.mal_id)]
+
+
+@pytest.mark.parametrize('name', ['animes.ndjson', 'animes.ndjson.gz', 'animes.json', 'animes.json.gz'])
+def test_import_command_reads_ndjson_arrays_and_gzip(app, tmp_path, name):
+    path = _dump(tmp_path / name, 5, gz=name.endswith('.gz'), array='.ndjson' not in name)
+
+    result = app.test_cli_runner().invoke(args=['anime', 'import', path, '--batch-size', '2'])
+
+    assert result.exit_code == 0, result.output
+    assert '4 records imported' in result.output and 'Done: 5 records' in result.output
+    assert _imported() == [(i, i) for i in range(1, 6)]
+    assert not os.path.exists(f'{path}.checkpoint')
+
+
+def test_import_command_resumes_from_the_checkpoint(app, tmp_path, monkeypatch):
+    path = _dump(tmp_path / 'animes.ndjson.gz', 7, gz=True)
+    imported_batches = []
+    failure = {'after_batches': 2}
+    import_batch = AnimeService._import_batch
+
+    def recording_import_batch(self, items):
+        if len(imported_batches) == failure['after_batches']:
+            raise ValueError('Error importing animes: connection lost')
+        import_batch(self, items)
+        imported_batches.append([item['mal_id'] for item in items])
+
+    monkeypatch.setattr(AnimeService, '_import_batch', recording_import_batch)
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['anime', 'import', path, '--batch-size', '2'])
+
+    assert result.exit_code != 0
+    with open(f'{path}.checkpoint') as f:
+        assert json.load(f) == {'records': 4}
+    assert [mal_id for mal_id, _ in _imported()] == [1, 2, 3, 4]
+
+    # Sem falhas dessa vez: só os registros depois do checkpoint são lidos de novo
+    failure['after_batches'] = None
+    result = runner.invoke(args=['anime', 'import', path, '--batch-size', '2', '--resume'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Resuming after 4 records' in result.output and 'Done: 7 records' in result.output
+    assert imported_batches == [[1, 2], [3, 4], [5, 6], [7]]
+    assert _imported() == [(i, i) for i in range(1, 8)]
+    assert not os.path.exists(f'{path}.checkpoint')
+
+
+def test_import_command_ignores_the_checkpoint_without_resume(app, tmp_path):
+    path = _dump(tmp_path / 'animes.ndjson', 3)
+    with open(f'{path}.checkpoint', 'w') as f:
+        json.dump({'records': 2}, f)
+
+    result = app.test_cli_runner().invoke(args=['anime', 'import', path])
+
+    assert result.exit_code == 0, result.output
+    assert 'Resuming' not in result.output
+    assert _imported() == [(1, 1), (2, 2), (3, 3)]
+    assert not os.path.exists(f'{path}.checkpoint')
@@ -0,0 +1,50 @@
+from sqlalchemy import insert
+
+from app.models import db, Anime
+from app.services.anime_resolver import get_anime_resolver
+from tests import assert_num_queries
+
+
+def _create_elsewhere(mal_id):
+    """Criar um anime sem passar pelo resolvedor (como outro worker faria)"""
+    db.session.execute(insert(Anime), [{'mal_id': mal_id, 'title': f'Anime {mal_id}'}])
+    db.session.commit()
+    return Anime.query.filter_by(mal_id=mal_id).one().id
+
+
+def test_cached_mal_id_miss_is_rechecked_before_falling_back_to_id(app, make_animes):
+    resolver = get_anime_resolver()
+    animes = make_animes(3)
+    value = animes[1].id
+
+    # Nenhum anime com mal_id == value: cai no id do banco (e a ausência fica em cache)
+    assert resolver.resolve(value) == animes[1].id
+
+    created_id = _create_elsewhere(value)
+
+    assert resolver.resolve(value) == created_id
+    assert resolver.resolve_many([value]) == {value: created_id}
+
+
+def test_explicit_by_uses_cached_misses(app, make_animes):
+    resolver = get_anime_resolver()
+    value = make_animes(3)[1].id
+    assert resolver.resolve(value, by='mal_id') is None
+
+    _create_elsewhere(value)
+
+    # Com `by`, a ausência vale até miss_ttl (a ambiguidade não existe)
+    with assert_num_queries(db.engine, 0):
+        assert resolver.resolve(value, by='mal_id') is None
+
+
+def test_known_mal_ids_resolve_without_queries(app, make_animes):
+    resolver = get_anime_resolver()
+    animes = make_animes(5)
+    mal_ids = [anime.mal_id for anime in animes]
+    expected = {anime.mal_id: anime.id for anime in animes}
+
+    assert resolver.resolve_many(mal_ids) == expected
+    with assert_num_queries(db.engine, 0):
+        assert resolver.resolve_many(mal_ids) == expected
+        assert resolver.resolve_many(mal_ids, by='mal_id') == expected
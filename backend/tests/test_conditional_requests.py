@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from app.models import db, Anime, DiaryEntry, UserDiaryStats
+
+
+def _age_diary(user_id, hours=1):
+    """Recuar as datas do diário (e dos animes), para que a próxima escrita caia em outro segundo"""
+    past = datetime.utcnow() - timedelta(hours=hours)
+    Anime.query.update({Anime.updated_at: past})
+    DiaryEntry.query.filter_by(user_id=user_id).update({DiaryEntry.updated_at: past})
+    UserDiaryStats.query.filter_by(user_id=user_id).update({UserDiaryStats.updated_at: past})
+    db.session.commit()
+
+
+def _diary_with_entries(client, make_user, make_animes, count):
+    user_id = make_user().id
+    entry_ids = []
+    for anime in make_animes(count):
+        response = client.post('/api/diary?by=id', json={'user_id': user_id, 'anime_id': anime.id, 'user_score': 7})
+        entry_ids.append(response.json['entry']['id'])
+    _age_diary(user_id)
+    return user_id, entry_ids
+
+
+def test_diary_last_modified_changes_after_delete(app, client, make_user, make_animes):
+    user_id, entry_ids = _diary_with_entries(client, make_user, make_animes, 2)
+    first = client.get(f'/api/diary/user/{user_id}')
+    assert first.last_modified is not None
+
+    assert client.delete(f'/api/diary/{entry_ids[0]}').status_code == 200
+
+    response = client.get(f'/api/diary/user/{user_id}', headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert response.status_code == 200
+    assert [entry['id'] for entry in response.json['entries']] == entry_ids[1:]
+    assert response.last_modified > first.last_modified
+
+
+def test_diary_last_modified_changes_after_deleting_the_last_entry(app, client, make_user, make_animes):
+    user_id, entry_ids = _diary_with_entries(client, make_user, make_animes, 1)
+    first = client.get(f'/api/diary/user/{user_id}')
+
+    assert client.delete(f'/api/diary/{entry_ids[0]}').status_code == 200
+
+    response = client.get(f'/api/diary/user/{user_id}', headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert response.status_code == 200
+    assert response.json['entries'] == []
+
+
+def test_unchanged_diary_answers_304(app, client, make_user, make_animes):
+    user_id, _ = _diary_with_entries(client, make_user, make_animes, 2)
+    first = client.get(f'/api/diary/user/{user_id}')
+
+    by_date = client.get(f'/api/diary/user/{user_id}', headers={'If-Modified-Since': first.headers['Last-Modified']})
+    by_etag = client.get(f'/api/diary/user/{user_id}', headers={'If-None-Match': first.headers['ETag']})
+
+    assert by_date.status_code == 304
+    assert by_etag.status_code == 304
+
+
+def test_anime_etag_depends_on_the_query_string(app, client, make_animes):
+    anime_id = make_animes(1)[0].id
+    full = client.get(f'/api/animes/{anime_id}?by=id')
+
+    same = client.get(f'/api/animes/{anime_id}?by=id', headers={'If-None-Match': full.headers['ETag']})
+    fields = client.get(f'/api/animes/{anime_id}?by=id&fields=id,title', headers={'If-None-Match': full.headers['ETag']})
+
+    assert same.status_code == 304
+    assert fields.status_code == 200
+    assert set(fields.json['anime']) == {'id', 'title'}
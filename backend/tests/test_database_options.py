@@ -0,0 +1,66 @@
+from app import create_app
+from app.config import TestingConfig, config
+from app.models import db
+from app.utils.database import engine_options, primary_engine_options, sqlite_pragmas
+
+POOL_SETTINGS = dict(DB_POOL_SIZE=7, DB_MAX_OVERFLOW=3, DB_POOL_TIMEOUT=11, DB_POOL_RECYCLE=600, DB_POOL_PRE_PING=True)
+
+
+def _file_app(tmp_path, monkeypatch, **settings):
+    app_config = type('FileConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "app.db"}', **settings
+    })
+    monkeypatch.setitem(config, 'database-options', app_config)
+    return create_app('database-options')
+
+
+def test_server_databases_get_a_sized_pool():
+    for uri in ('postgresql://user:secret@db/anime', 'mysql+pymysql://user:secret@db/anime'):
+        assert engine_options(POOL_SETTINGS, uri) == {
+            'pool_size': 7, 'max_overflow': 3, 'pool_timeout': 11, 'pool_recycle': 600, 'pool_pre_ping': True,
+        }
+
+
+def test_sqlite_gets_no_pool_options():
+    assert engine_options(POOL_SETTINGS, 'sqlite:///anime.db') == {}
+    assert engine_options({**POOL_SETTINGS, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'}) == {}
+
+
+def test_empty_pragmas_are_skipped():
+    settings = dict(SQLITE_JOURNAL_MODE='', SQLITE_BUSY_TIMEOUT=2000, SQLITE_SYNCHRONOUS='NORMAL', SQLITE_MMAP_SIZE=None)
+    assert sqlite_pragmas(settings) == {'busy_timeout': 2000, 'synchronous': 'NORMAL'}
+
+
+def test_sqlite_connections_get_the_pragmas(tmp_path, monkeypatch):
+    app = _file_app(tmp_path, monkeypatch, SQLITE_JOURNAL_MODE='WAL', SQLITE_BUSY_TIMEOUT=1234,
+                    SQLITE_SYNCHRONOUS='NORMAL')
+
+    with app.app_context():
+        assert app.config['SQLALCHEMY_ENGINE_OPTIONS'] == {}
+        with db.engine.connect() as connection:
+            pragmas = {
+                name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+                for name in ('journal_mode', 'busy_timeout', 'synchronous')
+            }
+    assert pragmas == {'journal_mode': 'wal', 'busy_timeout': 1234, 'synchronous': 1}
+
+
+def test_explicit_engine_options_win_over_the_pool_settings():
+    settings = {
+        **POOL_SETTINGS,
+        'SQLALCHEMY_DATABASE_URI': 'postgresql://user:secret@db/anime',
+        'SQLALCHEMY_ENGINE_OPTIONS': {'pool_size': 2, 'echo': True},
+    }
+    assert primary_engine_options(settings) == {
+        'pool_size': 2, 'max_overflow': 3, 'pool_timeout': 11, 'pool_recycle': 600, 'pool_pre_ping': True,
+        'echo': True,
+    }
+
+
+def test_explicit_engine_options_reach_the_engine(tmp_path, monkeypatch):
+    explicit = {'pool_pre_ping': True, 'connect_args': {'timeout': 1}}
+    app = _file_app(tmp_path, monkeypatch, SQLALCHEMY_ENGINE_OPTIONS=explicit)
+
+    assert app.config['SQLALCHEMY_ENGINE_OPTIONS'] == explicit
+    with app.app_context():
+        assert db.engine.pool._pre_ping is True
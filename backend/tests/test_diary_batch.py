@@ -0,0 +1,56 @@
+from app.models import db, DiaryEntry
+from app.services.diary_service import DiaryService
+
+
+def _diary(user_id):
+    db.session.expire_all()
+    entries = DiaryEntry.query.filter_by(user_id=user_id).order_by(DiaryEntry.id)
+    return [(entry.anime_id, entry.user_score, entry.episodes_watched) for entry in entries]
+
+
+def test_failed_update_is_not_persisted(app, make_user, make_animes):
+    service = DiaryService()
+    user_id = make_user().id
+    anime = make_animes(1)[0]
+    entry = service.add_to_diary(user_id, {'anime_id': anime.id, 'user_score': 5, 'episodes_watched': 3}, by='id')
+
+    results = service.apply_batch(user_id, [
+        {'op': 'update', 'entry_id': entry.id, 'episodes_watched': 'abc', 'user_score': 9},
+    ])
+
+    assert results[0]['status'] == 'error'
+    assert _diary(user_id) == [(anime.id, 5, 3)]
+    assert service.rebuild_stats(fix=False) == []
+
+
+def test_failed_add_does_not_block_a_later_add(app, make_user, make_animes):
+    service = DiaryService()
+    user_id = make_user().id
+    anime = make_animes(1)[0]
+
+    results = service.apply_batch(user_id, [
+        {'op': 'add', 'anime_id': anime.id, 'user_score': 7, 'episodes_watched': -1},
+        {'op': 'add', 'anime_id': anime.id, 'user_score': 7, 'episodes_watched': 2},
+    ], by='id')
+
+    assert [result['status'] for result in results] == ['error', 'created']
+    assert _diary(user_id) == [(anime.id, 7, 2)]
+    assert service.rebuild_stats(fix=False) == []
+
+
+def test_single_entry_writes_validate_episodes(client, make_user, make_animes):
+    user_id = make_user().id
+    anime_id = make_animes(1)[0].id
+
+    response = client.post('/api/diary?by=id', json={
+        'user_id': user_id, 'anime_id': anime_id, 'user_score': 8, 'episodes_watched': 'x'
+    })
+    assert response.status_code == 400
+
+    response = client.post('/api/diary?by=id', json={'user_id': user_id, 'anime_id': anime_id, 'user_score': 8})
+    entry_id = response.json['entry']['id']
+
+    for episodes in (True, '3', -2):
+        response = client.put(f'/api/diary/{entry_id}', json={'user_id': user_id, 'episodes_watched': episodes})
+        assert response.status_code == 400
+    assert _diary(user_id) == [(anime_id, 8, 0)]
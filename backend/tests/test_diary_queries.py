@@ -0,0 +1,45 @@
+import pytest
+
+from app.models import db, DiaryEntry
+from tests import assert_num_queries, count_queries
+
+# Versão do diário (ETag/Last-Modified) e a lista com o anime de cada registro
+DIARY_LIST_STATEMENTS = 2
+
+
+def _user_with_diary(make_user, make_animes, entries, first_mal_id):
+    """Id de um usuário novo com `entries` registros no diário"""
+    user = make_user()
+    db.session.add_all(
+        DiaryEntry(user_id=user.id, anime_id=anime.id, user_score=i % 10 + 1, episodes_watched=i)
+        for i, anime in enumerate(make_animes(entries, first_mal_id))
+    )
+    db.session.commit()
+    return user.id
+
+
+@pytest.mark.parametrize('entries', [1, 50])
+def test_diary_list_statement_count_is_fixed(client, make_user, make_animes, entries):
+    user_id = _user_with_diary(make_user, make_animes, entries, first_mal_id=1000)
+
+    with assert_num_queries(db.engine, DIARY_LIST_STATEMENTS) as statements:
+        response = client.get(f'/api/diary/user/{user_id}')
+
+    assert response.status_code == 200
+    assert len(response.json['entries']) == entries
+    assert all(entry['anime']['title'] for entry in response.json['entries'])
+    # O anime vem no mesmo SELECT dos registros (sem N+1)
+    assert 'JOIN anime' in statements[-1]
+
+
+def test_diary_list_statement_count_does_not_grow_with_entries(client, make_user, make_animes):
+    small = _user_with_diary(make_user, make_animes, 1, first_mal_id=1000)
+    large = _user_with_diary(make_user, make_animes, 50, first_mal_id=2000)
+
+    counts = []
+    for user_id in (small, large):
+        with count_queries(db.engine) as statements:
+            assert client.get(f'/api/diary/user/{user_id}').status_code == 200
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
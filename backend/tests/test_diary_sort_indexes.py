@@ -0,0 +1,72 @@
+import re
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app.models import db, DiaryEntry
+from app.services.diary_service import DiaryService
+from app.utils.fieldsets import Fieldset
+from app.utils.pagination import encode_cursor
+from app.utils.slow_queries import explain
+
+# Índice esperado para cada chave de ordenação (e para created_at filtrado por status)
+SORT_INDEXES = {
+    'created_at': 'ix_diary_entry_user_created',
+    'updated_at': 'ix_diary_entry_user_updated',
+    'user_score': 'ix_diary_entry_user_score',
+}
+STATUS_SORT_INDEXES = {**SORT_INDEXES, 'created_at': 'ix_diary_entry_user_status_created'}
+
+
+# Valor de ordenação de um cursor de exemplo, por chave
+CURSOR_VALUES = {'created_at': datetime(2024, 1, 1), 'updated_at': datetime(2024, 1, 1), 'user_score': 7}
+
+
+def test_every_sort_key_has_an_expected_index():
+    assert set(SORT_INDEXES) == set(DiaryEntry.SORT_KEYS)
+
+
+@contextmanager
+def _captured_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _plans(read):
+    with _captured_statements() as statements:
+        read()
+    connection = db.session.connection()
+    return [explain(connection, statement, parameters) for statement, parameters in statements]
+
+
+@pytest.mark.parametrize('sort_by', DiaryEntry.SORT_KEYS)
+@pytest.mark.parametrize('status', [None, 'completed'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+@pytest.mark.parametrize('fieldset', [None, Fieldset(('id', 'status'))], ids=['full', 'sparse'])
+def test_sorted_diary_reads_use_the_sort_index(app, sort_by, status, order, fieldset):
+    service = DiaryService()
+    index = (STATUS_SORT_INDEXES if status else SORT_INDEXES)[sort_by]
+
+    cursor = encode_cursor(CURSOR_VALUES[sort_by], 10)
+
+    # Lista completa, primeira página e página seguinte (range scan a partir do cursor)
+    plans = _plans(lambda: (
+        service.get_user_diary(1, status, sort_by, order, fieldset=fieldset),
+        service.get_user_diary_page(1, status, sort_by, order, limit=20, fieldset=fieldset),
+        service.get_user_diary_page(1, status, sort_by, order, limit=20, cursor=cursor, fieldset=fieldset),
+    ))
+
+    assert len(plans) == 3
+    for plan in plans:
+        assert re.match(rf'SEARCH diary_entry USING (COVERING )?INDEX {index} ', plan[0]), plan
+        assert not any('TEMP B-TREE' in step for step in plan), plan
@@ -0,0 +1,124 @@
+from sqlalchemy import func
+
+from app.models import db, DiaryEntry, UserDiaryStats
+
+
+def _stored(user_id):
+    db.session.expire_all()
+    stats = db.session.get(UserDiaryStats, user_id)
+    return {field: getattr(stats, field) for field in UserDiaryStats.COUNTERS} if stats else None
+
+
+def _aggregate(user_id):
+    """Contadores calculados do zero com GROUP BY, independente do serviço"""
+    counters = dict.fromkeys(UserDiaryStats.COUNTERS, 0)
+    rows = db.session.query(
+        DiaryEntry.status,
+        func.count(DiaryEntry.id),
+        func.sum(DiaryEntry.user_score),
+        func.sum(func.coalesce(DiaryEntry.episodes_watched, 0))
+    ).filter(DiaryEntry.user_id == user_id).group_by(DiaryEntry.status)
+    for status, count, score_sum, episodes in rows:
+        counters[status] += count
+        counters['total_animes'] += count
+        counters['score_sum'] += score_sum
+        counters['total_episodes'] += episodes
+    return counters
+
+
+def _add(client, user_id, anime_id, **fields):
+    response = client.post('/api/diary?by=id', json={'user_id': user_id, 'anime_id': anime_id, **fields})
+    assert response.status_code == 201, response.json
+    return response.json['entry']['id']
+
+
+def test_counters_follow_adds_updates_and_removals(client, make_user, make_animes):
+    user_id = make_user().id
+    other_id = make_user().id
+    first, second, third = (anime.id for anime in make_animes(3))
+
+    entry = _add(client, user_id, first, user_score=7, status='watching', episodes_watched=3)
+    _add(client, user_id, second, user_score=9, status='completed', episodes_watched=12)
+    removed = _add(client, user_id, third, user_score=4, status='planned')
+    _add(client, other_id, first, user_score=2, status='dropped', episodes_watched=1)
+    assert _stored(user_id) == _aggregate(user_id) == {
+        'total_animes': 3, 'score_sum': 20, 'total_episodes': 15,
+        'completed': 1, 'watching': 1, 'planned': 1, 'dropped': 0,
+    }
+
+    steps = [
+        {'status': 'completed'},
+        {'user_score': 10},
+        {'episodes_watched': 12},
+        {'status': 'dropped', 'user_score': 1, 'episodes_watched': 5},
+        {'notes': 'só as notas mudaram'},
+    ]
+    for data in steps:
+        assert client.put(f'/api/diary/{entry}', json=data).status_code == 200
+        assert _stored(user_id) == _aggregate(user_id)
+
+    assert client.delete(f'/api/diary/{removed}').status_code == 200
+    assert _stored(user_id) == _aggregate(user_id) == {
+        'total_animes': 2, 'score_sum': 10, 'total_episodes': 17,
+        'completed': 1, 'watching': 0, 'planned': 0, 'dropped': 1,
+    }
+    assert _stored(other_id) == _aggregate(other_id)
+
+
+def test_rejected_update_leaves_the_counters_alone(client, make_user, make_animes):
+    user_id = make_user().id
+    entry = _add(client, user_id, make_animes(1)[0].id, user_score=6, status='watching', episodes_watched=2)
+    before = _stored(user_id)
+
+    assert client.put(f'/api/diary/{entry}', json={'status': 'paused', 'user_score': 9}).status_code == 400
+
+    assert _stored(user_id) == before == _aggregate(user_id)
+
+
+def _drift(user_id):
+    """Corromper o resumo de um usuário, como uma escrita fora do serviço faria"""
+    UserDiaryStats.query.filter_by(user_id=user_id).update({'total_animes': 99, 'completed': 5})
+    db.session.commit()
+    return _stored(user_id)
+
+
+def test_verify_reports_drift_without_fixing_it(app, client, make_user, make_animes):
+    user_id = make_user().id
+    _add(client, user_id, make_animes(1)[0].id, user_score=8, status='watching')
+    drifted = _drift(user_id)
+
+    result = app.test_cli_runner().invoke(args=['diary', 'rebuild-stats', '--verify'])
+
+    assert result.exit_code == 1
+    assert f'user {user_id}: total_animes stored=99 expected=1' in result.output
+    assert '2 divergent counters across 1 users' in result.output
+    assert _stored(user_id) == drifted
+
+
+def test_rebuild_repairs_drift(app, client, make_user, make_animes):
+    user_id = make_user().id
+    _add(client, user_id, make_animes(1)[0].id, user_score=8, status='watching')
+    _drift(user_id)
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['diary', 'rebuild-stats'])
+
+    assert result.exit_code == 0
+    assert 'fixed 2 divergent counters across 1 users' in result.output
+    assert _stored(user_id) == _aggregate(user_id)
+
+    result = runner.invoke(args=['diary', 'rebuild-stats', '--verify'])
+    assert (result.exit_code, result.output.strip()) == (0, '0 divergent counters across 0 users')
+
+
+def test_rebuild_creates_missing_rows(app, client, make_user, make_animes):
+    user_id = make_user().id
+    _add(client, user_id, make_animes(1)[0].id, user_score=3, status='completed', episodes_watched=12)
+    UserDiaryStats.query.filter_by(user_id=user_id).delete()
+    db.session.commit()
+
+    assert app.test_cli_runner().invoke(args=['diary', 'rebuild-stats', '--verify']).exit_code == 1
+    assert _stored(user_id) is None
+
+    assert app.test_cli_runner().invoke(args=['diary', 'rebuild-stats']).exit_code == 0
+    assert _stored(user_id) == _aggregate(user_id)
@@ -0,0 +1,68 @@
+from sqlalchemy import inspect
+
+from app.models import db
+from app.services.anime_service import AnimeService
+from app.utils.fieldsets import Fieldset
+from tests import count_queries
+
+
+def _anime(make_animes):
+    anime = make_animes(1)[0]
+    anime.synopsis = 'Spike e Jet caçam recompensas pelo sistema solar'
+    db.session.commit()
+    anime_id = anime.id
+    db.session.remove()
+    return anime_id
+
+
+def test_sparse_anime_detail_selects_only_the_requested_columns(client, make_animes):
+    anime_id = _anime(make_animes)
+
+    with count_queries(db.engine) as statements:
+        response = client.get(f'/api/animes/{anime_id}?by=id&fields=id,title')
+
+    assert response.status_code == 200
+    assert response.json['anime'] == {'id': anime_id, 'title': 'Anime 1000'}
+    assert len(statements) == 1
+    assert 'synopsis' not in statements[0] and 'anime.title' in statements[0]
+
+
+def test_sparse_and_full_anime_details_are_cached_separately(app, client, make_animes):
+    anime_id = _anime(make_animes)
+
+    sparse = client.get(f'/api/animes/{anime_id}?by=id&fields=title')
+    full = client.get(f'/api/animes/{anime_id}?by=id')
+    db.session.remove()
+
+    with count_queries(db.engine) as statements:
+        assert client.get(f'/api/animes/{anime_id}?by=id&fields=title').json == sparse.json
+        assert client.get(f'/api/animes/{anime_id}?by=id').json == full.json
+    assert statements == []
+    assert full.json['anime']['synopsis'] == 'Spike e Jet caçam recompensas pelo sistema solar'
+    assert sparse.json['anime'] == {'id': anime_id, 'title': 'Anime 1000'}
+
+    # A ETag da resposta parcial continua valendo (updated_at é lido mesmo sem ser pedido)
+    again = client.get(f'/api/animes/{anime_id}?by=id&fields=title', headers={'If-None-Match': sparse.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_sparse_anime_detail_sees_updates(client, make_animes):
+    anime_id = _anime(make_animes)
+    client.get(f'/api/animes/{anime_id}?by=id&fields=title,score')
+
+    assert client.put(f'/api/animes/{anime_id}', json={'score': 9.1}).status_code == 200
+    db.session.remove()
+
+    response = client.get(f'/api/animes/{anime_id}?by=id&fields=title,score')
+    assert response.json['anime'] == {'id': anime_id, 'title': 'Anime 1000', 'score': 9.1}
+
+
+def test_get_anime_applies_the_fieldset(app, make_animes):
+    anime_id = _anime(make_animes)
+
+    with count_queries(db.engine) as statements:
+        anime = AnimeService().get_anime(anime_id, Fieldset(('id', 'title')))
+
+    assert anime.title == 'Anime 1000'
+    assert 'synopsis' not in statements[0]
+    assert 'synopsis' in inspect(anime).unloaded
@@ -0,0 +1,100 @@
+import sqlite3
+import types
+
+import pytest
+import requests
+
+from app.services import jikan_client
+from app.services.jikan_client import JikanClient
+from app.utils.rate_limit import SQLiteTokenBucket
+
+
+class FakeClock:
+    """Relógio manual: sleep só avança o tempo"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = b'{"data": []}'
+    return response
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(jikan_client, 'time', types.SimpleNamespace(
+        monotonic=clock.monotonic, sleep=clock.sleep, perf_counter=jikan_client.time.perf_counter
+    ))
+    return clock
+
+
+def _client(monkeypatch, responses, **kwargs):
+    client = JikanClient('http://jikan.test', **kwargs)
+    calls = []
+
+    def get(url, params=None, timeout=None):
+        calls.append(url)
+        return responses(len(calls))
+
+    monkeypatch.setattr(client.session, 'get', get)
+    return client, calls
+
+
+def test_429_retries_stop_at_the_timeout(monkeypatch, clock):
+    client, calls = _client(
+        monkeypatch, lambda call: _response(429, {'Retry-After': '4'}),
+        timeout=10, max_retries=10, max_retry_delay=30
+    )
+
+    with pytest.raises(requests.HTTPError):
+        client.search('bebop')
+
+    # Duas esperas de 4s cabem em 10s; a terceira estouraria o prazo
+    assert clock.sleeps == [4.0, 4.0]
+    assert len(calls) == 3
+
+
+def test_429_retry_that_fits_the_timeout_succeeds(monkeypatch, clock):
+    client, calls = _client(
+        monkeypatch, lambda call: _response(429 if call == 1 else 200, {'Retry-After': '2'}),
+        timeout=10
+    )
+
+    assert client.search('bebop') == []
+    assert clock.sleeps == [2.0]
+    assert client.stats()['retried'] == 1
+
+
+def test_locked_rate_limit_file_is_a_timeout(monkeypatch, tmp_path):
+    path = str(tmp_path / 'rate_limit.db')
+    bucket = SQLiteTokenBucket(path, rate=10)
+    # Conexão do bucket com espera curta pelo lock (o padrão é 5s)
+    bucket._local.conn = sqlite3.connect(path, timeout=0.05, isolation_level=None)
+
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute('BEGIN IMMEDIATE')
+    try:
+        client, calls = _client(monkeypatch, lambda call: _response(200), rate_limiter=bucket)
+        with pytest.raises(requests.Timeout, match='rate limit unavailable'):
+            client.search('bebop')
+    finally:
+        holder.execute('ROLLBACK')
+        holder.close()
+
+    assert calls == []
+    assert client.stats()['throttled'] == 1
+    # Liberado o arquivo, o bucket volta a funcionar na mesma conexão
+    assert client.search('bebop') == []
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.jikan_client import AsyncJikanClient, get_jikan_client
+
+LATENCY = 0.05
+SEARCHES = 50
+MAX_CONCURRENCY = 4
+
+
+class LatencyJikan(ThreadingHTTPServer):
+    """Jikan falsa com latência fixa; registra o pico de requisições simultâneas e as conexões"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), LatencyHandler)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+        self.requests = 0
+        self.connections = set()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}/v4'
+
+
+class LatencyHandler(BaseHTTPRequestHandler):
+    # Keep-alive: a mesma conexão atende várias requisições
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+            server.requests += 1
+            server.connections.add(self.client_address)
+
+        detail = re.match(r'/v4/anime/(\d+)$', self.path)
+        if detail:
+            mal_id = int(detail.group(1))
+            # Latências diferentes por id: as respostas chegam fora de ordem
+            time.sleep(LATENCY * (1 + mal_id % 3))
+            payload = {'data': {'mal_id': mal_id}}
+        else:
+            time.sleep(LATENCY)
+            payload = {'data': [{'path': self.path}]}
+
+        with server.lock:
+            server.in_flight -= 1
+
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def jikan(app):
+    server = LatencyJikan()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Sem rate limit: o limite aqui é o semáforo do cliente
+    app.config.update(JIKAN_API_URL=server.url, JIKAN_MAX_CONCURRENCY=MAX_CONCURRENCY, JIKAN_RATE_LIMIT=0)
+    try:
+        yield server
+    finally:
+        get_jikan_client().close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_concurrent_distinct_searches_are_bounded_and_pooled(jikan):
+    client = get_jikan_client()
+    queries = [f'anime {n}' for n in range(SEARCHES)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(SEARCHES) as executor:
+        results = list(executor.map(client.search, queries))
+    elapsed = time.perf_counter() - started
+
+    assert jikan.requests == SEARCHES
+    assert jikan.peak <= MAX_CONCURRENCY
+    # Em série seriam SEARCHES * LATENCY; com MAX_CONCURRENCY em paralelo, cerca de 1/MAX_CONCURRENCY disso
+    assert elapsed < SEARCHES * LATENCY / 2
+    # Conexões keep-alive da sessão reaproveitadas: no máximo uma por chamada simultânea
+    assert len(jikan.connections) <= MAX_CONCURRENCY
+    assert [result[0]['path'] for result in results] == [
+        f'/v4/anime?q=anime+{n}&limit=12' for n in range(SEARCHES)
+    ]
+    assert client.stats()['requests'] == SEARCHES
+
+
+def test_gather_and_get_animes_keep_the_call_order(jikan):
+    client = get_jikan_client()
+    mal_ids = list(range(1, 13))
+
+    assert [anime['mal_id'] for anime in client.get_animes(mal_ids)] == mal_ids
+    assert client.gather(lambda: client.get_anime(5), lambda: client.search('bebop'), lambda: client.get_anime(1)) == [
+        {'mal_id': 5}, [{'path': '/v4/anime?q=bebop&limit=12'}], {'mal_id': 1}
+    ]
+    assert jikan.peak <= MAX_CONCURRENCY
+
+
+def test_async_client_keeps_order_and_bound(jikan):
+    async_client = AsyncJikanClient(get_jikan_client())
+    mal_ids = list(range(1, 13))
+
+    async def run():
+        animes, searches = await asyncio.gather(
+            async_client.get_animes(mal_ids),
+            async_client.search('bebop', limit=5)
+        )
+        return animes, searches
+
+    animes, searches = asyncio.run(run())
+
+    assert [anime['mal_id'] for anime in animes] == mal_ids
+    assert searches == [{'path': '/v4/anime?q=bebop&limit=5'}]
+    assert jikan.peak <= MAX_CONCURRENCY
@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.services.jikan_client import get_jikan_client
+
+CALLERS = 8
+
+
+class StubJikan(ThreadingHTTPServer):
+    """Jikan falsa: conta as requisições e segura as respostas até `release`"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.paths = []
+        self.status = 200
+        self.release = threading.Event()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}/v4'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        self.server.release.wait(5)
+        body = json.dumps({'data': [{'mal_id': 1, 'title': 'Cowboy Bebop'}]}).encode()
+        self.send_response(self.server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def jikan(app):
+    server = StubJikan()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    app.config['JIKAN_API_URL'] = server.url
+    try:
+        yield server
+    finally:
+        server.release.set()
+        server.shutdown()
+        server.server_close()
+        get_jikan_client().close()
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def _concurrent_searches(client, jikan, query):
+    """CALLERS buscas simultâneas; a resposta só sai quando todas estão esperando"""
+    with ThreadPoolExecutor(CALLERS) as executor:
+        futures = [executor.submit(client.search, query) for _ in range(CALLERS)]
+        _wait_for(lambda: len(jikan.paths) == 1 and client.stats()['coalesced'] == CALLERS - 1)
+        jikan.release.set()
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_concurrent_identical_searches_make_one_upstream_call(jikan):
+    client = get_jikan_client()
+
+    results = _concurrent_searches(client, jikan, 'bebop')
+
+    assert results == [[{'mal_id': 1, 'title': 'Cowboy Bebop'}]] * CALLERS
+    assert len(jikan.paths) == 1
+    assert jikan.paths[0].startswith('/v4/anime?')
+
+    # Depois de respondida, a mesma busca vai à Jikan de novo (single flight não é cache)
+    client.search('bebop')
+    assert len(jikan.paths) == 2
+
+
+def test_upstream_error_reaches_every_caller(jikan):
+    jikan.status = 500
+    client = get_jikan_client()
+
+    results = _concurrent_searches(client, jikan, 'bebop')
+
+    assert all(isinstance(result, requests.HTTPError) for result in results)
+    assert len(jikan.paths) == 1
@@ -0,0 +1,77 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+from app.models import db
+from app.utils.json_provider import OrjsonProvider, orjson
+
+pytestmark = pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+
+PAYLOAD = {
+    'title': 'Shingeki no Kyojin — 進撃の巨人',
+    'synopsis': 'Café, naïve façade e emoji 😀',
+    'aired': date(2013, 4, 7),
+    'updated_at': datetime(2024, 1, 31, 23, 59, 58),
+    'score': Decimal('8.55'),
+    'episodes': 25,
+    'rating': 8.5,
+    'genres': [{'name': 'Ação', 'id': 1}, {'name': 'Drama', 'id': 8}],
+    'studio': None,
+    'airing': False,
+    'counts': {2: 'two', 1: 'one'},
+}
+
+
+@pytest.fixture
+def providers(app):
+    return DefaultJSONProvider(app), OrjsonProvider(app)
+
+
+@pytest.mark.parametrize('compact', [None, False])
+def test_responses_match_the_default_provider(app, providers, compact):
+    default, fast = providers
+    for provider in providers:
+        provider.compact = compact
+
+    assert fast.response(PAYLOAD).get_data() == default.response(PAYLOAD).get_data()
+
+
+def test_non_ascii_is_escaped_like_ensure_ascii(providers):
+    default, fast = providers
+    text = 'Ação 進撃 😀'
+
+    assert fast.dumps(text) == default.dumps(text) == '"A\\u00e7\\u00e3o \\u9032\\u6483 \\ud83d\\ude00"'
+    assert fast.loads(fast.dumps(PAYLOAD))['title'] == PAYLOAD['title']
+    # Sem separators, compacto com ou sem texto não ASCII (como as linhas do NDJSON)
+    assert fast.dumps({'b': 1, 'a': 'ç'}) == '{"a":"\\u00e7","b":1}'
+
+
+def test_ensure_ascii_off_keeps_utf8(providers):
+    default, fast = providers
+    for provider in providers:
+        provider.ensure_ascii = False
+
+    assert fast.dumps(PAYLOAD, separators=(',', ':')) == default.dumps(PAYLOAD, separators=(',', ':'))
+    assert '進撃の巨人' in fast.dumps(PAYLOAD)
+
+
+def test_integers_beyond_64_bits_fall_back_to_the_default_encoder(providers):
+    default, fast = providers
+    payload = {'id': 2 ** 70, 'title': 'Ação'}
+
+    assert fast.dumps(payload, separators=(',', ':')) == default.dumps(payload, separators=(',', ':'))
+
+
+def test_app_responses_are_identical_with_orjson(app, client, make_animes):
+    anime = make_animes(1)[0]
+    anime.title = 'Kimi no Na wa. — 君の名は。'
+    anime.synopsis = 'Mitsuha e Taki trocam de corpo ✨'
+    db.session.commit()
+
+    body = client.get(f'/api/animes/{anime.id}?by=id').get_data()
+    app.json = OrjsonProvider(app)
+    app.extensions['read_cache'].clear()
+
+    assert client.get(f'/api/animes/{anime.id}?by=id').get_data() == body
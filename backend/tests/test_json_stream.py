@@ -0,0 +1,72 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from app.utils import json_stream
+from app.utils.json_stream import batched, iter_json_records
+
+RECORDS = [
+    {'mal_id': 1, 'title': 'Cowboy Bebop', 'synopsis': 'Espaço, jazz e "caçadores" de recompensa\n' * 3},
+    {'mal_id': 5, 'title': 'Tengoku no Tobira', 'genres': [{'name': 'Ação'}, {'name': 'Drama'}], 'score': 8.38},
+    {'mal_id': 30, 'title': '新世紀エヴァンゲリオン', 'episodes': 26, 'airing': False, 'studio': None},
+    12345,
+    'texto com ] e , dentro',
+]
+
+
+@pytest.fixture(params=[1, 2, 3, 7, 64])
+def chunk_size(request, monkeypatch):
+    """Blocos pequenos: elementos (e números) cortados em todas as posições"""
+    monkeypatch.setattr(json_stream, 'CHUNK_SIZE', request.param)
+    return request.param
+
+
+def test_array_split_across_chunks(chunk_size):
+    text = '  \n[\n  ' + ',\n  '.join(json.dumps(record, ensure_ascii=False) for record in RECORDS) + '\n]\n'
+
+    assert list(json_stream._iter_json_array(io.StringIO(text.lstrip()))) == RECORDS
+
+
+def test_compact_array_split_across_chunks(chunk_size):
+    text = json.dumps(RECORDS + [[1, 2], 3.5, -7], separators=(',', ':'))
+
+    assert list(json_stream._iter_json_array(io.StringIO(text))) == RECORDS + [[1, 2], 3.5, -7]
+
+
+@pytest.mark.parametrize('text', ['[{"mal_id": 1}, {"mal_id":', '[{"mal_id": 1}, {"mal_id": 2}', '[{"mal_id": x}]'])
+def test_truncated_array_is_an_error(chunk_size, text):
+    with pytest.raises(ValueError):
+        list(json_stream._iter_json_array(io.StringIO(text)))
+
+
+def test_array_file_with_jikan_pages(tmp_path, chunk_size):
+    path = tmp_path / 'dump.json'
+    path.write_text(json.dumps([{'data': RECORDS[:2]}, {'data': RECORDS[2]}, {'mal_id': 99}]), encoding='utf-8')
+
+    assert list(iter_json_records(str(path))) == RECORDS[:3] + [{'mal_id': 99}]
+
+
+@pytest.mark.parametrize('name', ['dump.ndjson', 'dump.ndjson.gz'])
+def test_ndjson_plain_and_gzipped(tmp_path, name):
+    path = tmp_path / name
+    text = '\n'.join(json.dumps(record, ensure_ascii=False) for record in RECORDS[:3]) + '\n\n'
+    opener = gzip.open if name.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        f.write(text)
+
+    assert list(iter_json_records(str(path))) == RECORDS[:3]
+
+
+def test_invalid_ndjson_line_is_reported(tmp_path):
+    path = tmp_path / 'dump.ndjson'
+    path.write_text('{"mal_id": 1}\n{"mal_id": \n')
+
+    with pytest.raises(ValueError, match='line 2'):
+        list(iter_json_records(str(path)))
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 2)) == []
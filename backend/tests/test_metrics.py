@@ -0,0 +1,137 @@
+import json
+
+import pytest
+
+from app.models import db
+from app.utils import metrics as metrics_module
+from app.utils.metrics import COUNT_BUCKETS, MetricsRegistry, MetricsStore, render_prometheus
+from tests import count_queries
+
+
+def _series(store, name, **labels):
+    """Série com exatamente esses rótulos (o registro é do processo, então compare deltas)"""
+    for series in store.collect():
+        if series['name'] == name and series['labels'] == labels:
+            return series
+    return {'buckets': [0] * (len(COUNT_BUCKETS) + 1), 'sum': 0, 'count': 0}
+
+
+def test_histograms_are_rendered_in_the_exposition_format():
+    registry = MetricsRegistry()
+    for value in (1, 3, 3, 500):
+        registry.observe('http_request_sql_statements', value, method='GET', endpoint='/api/animes')
+
+    lines = render_prometheus(registry.snapshot()).splitlines()
+
+    assert '# HELP http_request_sql_statements SQL statements executed per request' in lines
+    assert '# TYPE http_request_sql_statements histogram' in lines
+    labels = 'endpoint="/api/animes",method="GET"'
+    buckets = [line for line in lines if line.startswith('http_request_sql_statements_bucket')]
+    assert buckets == [
+        f'http_request_sql_statements_bucket{{{labels},le="{bound}"}} {count}'
+        for bound, count in zip((*COUNT_BUCKETS, '+Inf'), (1, 1, 3, 3, 3, 3, 3, 4))
+    ]
+    assert f'http_request_sql_statements_sum{{{labels}}} 507.0' in lines
+    assert f'http_request_sql_statements_count{{{labels}}} 4' in lines
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.observe('jikan_call_duration_seconds', 0.2)
+    registry.observe('http_request_sql_statements', 1, endpoint='a\\b "c"\nd')
+
+    text = render_prometheus(registry.snapshot())
+
+    assert 'http_request_sql_statements_count{endpoint="a\\\\b \\"c\\"\\nd"} 1' in text
+    # Série sem rótulos: sem chaves em _sum/_count
+    assert 'jikan_call_duration_seconds_count 1' in text
+    assert 'jikan_call_duration_seconds_bucket{le="+Inf"} 1' in text
+
+
+def test_requests_are_labelled_by_route_template(app, client, make_animes):
+    store = app.extensions['metrics']
+    anime = make_animes(1)[0]
+    template = dict(name='http_request_duration_seconds', method='GET', endpoint='/api/animes/<int:anime_id>',
+                    status=200)
+    before = _series(store, **template)['count']
+
+    for _ in range(2):
+        assert client.get(f'/api/animes/{anime.id}?by=id').status_code == 200
+    client.get('/api/no-such-route')
+
+    assert _series(store, **template)['count'] == before + 2
+    endpoints = {series['labels'].get('endpoint') for series in store.collect()}
+    assert f'/api/animes/{anime.id}' not in endpoints
+    assert 'unmatched' in endpoints
+
+    response = client.get('/api/metrics')
+    assert response.mimetype == 'text/plain'
+    assert 'endpoint="/api/animes/<int:anime_id>"' in response.get_data(as_text=True)
+
+
+def test_sql_statements_are_counted_per_request(app, client, make_user):
+    store = app.extensions['metrics']
+    user_id = make_user().id
+    # Sessão nova, como no começo de uma requisição real (sem o usuário no identity map)
+    db.session.remove()
+    labels = dict(method='GET', endpoint='/api/users/<int:user_id>')
+    before = _series(store, 'http_request_sql_statements', **labels)
+
+    with count_queries(db.engine) as statements:
+        assert client.get(f'/api/users/{user_id}').status_code == 200
+
+    after = _series(store, 'http_request_sql_statements', **labels)
+    assert statements
+    assert after['count'] == before['count'] + 1
+    assert after['sum'] - before['sum'] == len(statements)
+
+
+def test_worker_files_are_merged(tmp_path):
+    registry = MetricsRegistry()
+    registry.observe('http_request_sql_statements', 2, method='GET', endpoint='/api/animes')
+    store = MetricsStore(registry, str(tmp_path / 'metrics'))
+
+    other_worker = [
+        {'name': 'http_request_sql_statements', 'labels': {'endpoint': '/api/animes', 'method': 'GET'},
+         'buckets': [1, 0, 1, 0, 0, 0, 0, 1], 'sum': 104.0, 'count': 3},
+        {'name': 'jikan_call_duration_seconds', 'labels': {}, 'buckets': [0] * 12, 'sum': 0.0, 'count': 0},
+    ]
+    (tmp_path / 'metrics' / 'metrics_99999.json').write_text(json.dumps(other_worker))
+    # Arquivo pela metade (worker no meio de uma escrita) e arquivos de outros nomes são ignorados
+    (tmp_path / 'metrics' / 'metrics_99998.json').write_text('[{"name": ')
+    (tmp_path / 'metrics' / 'notes.json').write_text('not metrics')
+
+    merged = {series['name']: series for series in store.collect()}
+
+    assert merged['http_request_sql_statements']['buckets'] == [1, 1, 1, 0, 0, 0, 0, 1]
+    assert (merged['http_request_sql_statements']['sum'], merged['http_request_sql_statements']['count']) == (106.0, 4)
+    assert merged['jikan_call_duration_seconds']['count'] == 0
+    # A escrita do próprio arquivo é atômica: nenhum temporário fica para trás
+    assert not [path for path in (tmp_path / 'metrics').iterdir() if path.suffix == '.tmp']
+
+
+def test_metrics_dir_is_shared_by_the_app(app, client, tmp_path):
+    store = app.extensions['metrics']
+    store.directory = str(tmp_path)
+    (tmp_path / 'metrics_99999.json').write_text(json.dumps([
+        {'name': 'http_request_sql_statements', 'labels': {'endpoint': '/api/health', 'method': 'GET'},
+         'buckets': [5, 0, 0, 0, 0, 0, 0, 0], 'sum': 0.0, 'count': 5},
+    ]))
+    before = [series for series in store.registry.snapshot()
+              if series['name'] == 'http_request_sql_statements' and series['labels']['endpoint'] == '/api/health']
+    local = before[0]['count'] if before else 0
+
+    client.get('/api/health')
+
+    assert _series(store, 'http_request_sql_statements', endpoint='/api/health', method='GET')['count'] == local + 6
+
+
+def test_request_accumulators_are_reset_even_if_an_after_request_hook_fails(app, client):
+    @app.after_request
+    def broken(response):
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        client.get('/api/health')
+
+    assert metrics_module._current.get() is None
@@ -0,0 +1,113 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.models import db, DiaryEntry
+from app.utils.pagination import encode_cursor
+
+ENTRIES = 23
+PAGE = 5
+
+
+@pytest.fixture
+def diary(app, make_user, make_animes):
+    """Diário com empates em user_score e em created_at (resolvidos pelo id)"""
+    user_id = make_user().id
+    base = datetime(2024, 1, 1)
+    db.session.execute(insert(DiaryEntry), [
+        {'user_id': user_id, 'anime_id': anime.id, 'user_score': 1 + i % 3, 'status': 'watching',
+         'created_at': base + timedelta(hours=i // 4), 'updated_at': base + timedelta(minutes=i)}
+        for i, anime in enumerate(make_animes(ENTRIES))
+    ])
+    db.session.commit()
+    return user_id
+
+
+def _page(client, user_id, **params):
+    response = client.get(f'/api/diary/user/{user_id}', query_string={'fields': 'id', 'include': '', **params})
+    assert response.status_code == 200, response.json
+    return [entry['id'] for entry in response.json['entries']], response.json['next_cursor']
+
+
+def _walk(client, user_id, **params):
+    pages = []
+    cursor = None
+    while True:
+        ids, cursor = _page(client, user_id, limit=PAGE, **params, **({'cursor': cursor} if cursor else {}))
+        pages.append(ids)
+        if cursor is None:
+            return pages
+
+
+def _cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+@pytest.mark.parametrize('sort_by', DiaryEntry.SORT_KEYS)
+def test_walking_all_pages_returns_every_row_once_in_order(client, diary, sort_by, order):
+    pages = _walk(client, diary, sort_by=sort_by, order=order)
+
+    rows = DiaryEntry.query.filter_by(user_id=diary).all()
+    expected = [entry.id for entry in sorted(rows, key=lambda entry: (getattr(entry, sort_by), entry.id),
+                                             reverse=order == 'desc')]
+    assert [len(ids) for ids in pages] == [5, 5, 5, 5, 3]
+    assert [entry_id for ids in pages for entry_id in ids] == expected
+
+
+def test_last_full_page_has_no_next_cursor(client, diary):
+    ids, cursor = _page(client, diary, limit=ENTRIES)
+    assert (len(ids), cursor) == (ENTRIES, None)
+
+    first, cursor = _page(client, diary, limit=ENTRIES - 3)
+    rest, last_cursor = _page(client, diary, limit=3, cursor=cursor)
+    assert len(first + rest) == len(set(first + rest)) == ENTRIES
+    assert last_cursor is None
+
+
+@pytest.mark.parametrize('cursor', [
+    'not base64!',
+    _cursor('garbage')[:-1] + '*',
+    base64.urlsafe_b64encode(b'\xff\xfe').decode(),
+    _cursor([1]),
+    _cursor([1, 2, 3]),
+    _cursor({'a': 1, 'b': 2}),
+    _cursor(['2024-13-45T00:00:00', 1]),
+    _cursor([5, 1]),
+    _cursor(['2024-01-01T00:00:00', 'x']),
+    _cursor(['2024-01-01T00:00:00', 2 ** 70]),
+    _cursor(['2024-01-01T00:00:00', True]),
+    _cursor(['2024-01-01T00:00:00', [1]]),
+])
+def test_malformed_cursor_is_a_bad_request(client, diary, cursor):
+    response = client.get(f'/api/diary/user/{diary}', query_string={'limit': PAGE, 'cursor': cursor})
+    assert response.status_code == 400
+    assert response.json['error'] == 'Invalid cursor'
+
+
+@pytest.mark.parametrize('value', ['7', 7.5, 2 ** 64, None, [1], {'score': 1}])
+def test_tampered_sort_value_is_a_bad_request(client, diary, value):
+    response = client.get(f'/api/diary/user/{diary}', query_string={
+        'sort_by': 'user_score', 'limit': PAGE, 'cursor': _cursor([value, 1])
+    })
+    assert response.status_code == 400
+    assert response.json['error'] == 'Invalid cursor'
+
+
+def test_cursor_from_another_sort_key_is_a_bad_request(client, diary):
+    cursor = encode_cursor(datetime(2024, 1, 1), 1)
+    response = client.get(f'/api/diary/user/{diary}', query_string={
+        'sort_by': 'user_score', 'limit': 2, 'cursor': cursor
+    })
+    assert response.status_code == 400
+
+
+def test_limit_is_capped(app, client, diary):
+    app.config['PAGINATION_MAX_LIMIT'] = 4
+
+    assert len(_page(client, diary, limit=1000)[0]) == 4
+    assert len(_page(client, diary, limit=0)[0]) == 1
+    assert len(_page(client, diary, limit=-5)[0]) == 1
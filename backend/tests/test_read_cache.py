@@ -0,0 +1,204 @@
+import fnmatch
+
+import pytest
+from sqlalchemy import update
+
+from app.models import db, Anime, DiaryEntry, UserDiaryStats
+from app.services.anime_service import AnimeService
+from app.services.diary_service import DiaryService
+from app.services.read_cache import PENDING_TAGS_KEY, anime_tag, cached, diary_tag, get_read_cache, stats_tag, user_tag
+from app.utils.cache import RedisCache, TaggedCache
+from tests import assert_num_queries
+
+
+class FakeRedis:
+    """Dicionário com o subconjunto da API do redis.Redis usado pelo RedisCache"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match='*'):
+        return [key for key in self.data if fnmatch.fnmatchcase(key, match)]
+
+
+def _redis_read_cache(client):
+    return TaggedCache(RedisCache(client, prefix='read_cache:'), ttl=300)
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def read_cache(request, app):
+    """Cache de leituras da aplicação: LRUCache do TestingConfig ou um Redis falso"""
+    if request.param == 'redis':
+        app.extensions['read_cache'] = _redis_read_cache(FakeRedis())
+    return get_read_cache()
+
+
+@pytest.fixture
+def diaries(read_cache, make_user, make_animes):
+    """Usuário A com o anime X, usuário B com o anime Y"""
+    service = DiaryService()
+    user_a, user_b = make_user(), make_user()
+    anime_x, anime_y = make_animes(2)
+    service.add_to_diary(user_a.id, {'anime_id': anime_x.id, 'status': 'watching', 'user_score': 7}, by='id')
+    service.add_to_diary(user_b.id, {'anime_id': anime_y.id, 'status': 'watching', 'user_score': 7}, by='id')
+    return user_a.id, user_b.id, anime_x.id, anime_y.id
+
+
+def _probes(user_a, user_b, anime_x, anime_y):
+    return {
+        'diary_a': diary_tag(user_a),
+        'stats_a': stats_tag(user_a),
+        'user_a': user_tag(user_a),
+        'diary_b': diary_tag(user_b),
+        'stats_b': stats_tag(user_b),
+        'anime_x': anime_tag(anime_x),
+        'anime_y': anime_tag(anime_y),
+    }
+
+
+def _prime(probes):
+    for key, tag in probes.items():
+        cached(f'probe:{key}', [tag], lambda: key)
+
+
+def _missed(probes):
+    """Chaves cujo compute() rodou de novo (tag invalidada desde o _prime)"""
+    missed = set()
+    for key, tag in probes.items():
+        cached(f'probe:{key}', [tag], lambda: missed.add(key) or key)
+    return missed
+
+
+def test_hit_runs_no_sql(app, read_cache, make_animes):
+    anime = make_animes(1)[0]
+    service = AnimeService()
+    data = service.get_anime_data(anime.id, by='id')
+
+    with assert_num_queries(db.engine, 0):
+        assert service.get_anime_data(anime.id, by='id') == data
+
+    assert read_cache.stats()['hits'] == 1
+
+
+def test_commit_invalidates_only_dependent_tags(app, diaries):
+    user_a = diaries[0]
+    probes = _probes(*diaries)
+    _prime(probes)
+    entry = DiaryEntry.query.filter_by(user_id=user_a).one()
+
+    DiaryService().update_entry(entry.id, user_a, {'status': 'completed', 'user_score': 8})
+
+    assert _missed(probes) == {'diary_a', 'stats_a'}
+
+
+def test_tags_are_invalidated_only_after_commit(app, diaries):
+    user_a = diaries[0]
+    probes = _probes(*diaries)
+    _prime(probes)
+
+    db.session.query(DiaryEntry).filter_by(user_id=user_a).one().episodes_watched = 5
+    db.session.flush()
+
+    assert db.session.info[PENDING_TAGS_KEY] >= {diary_tag(user_a), stats_tag(user_a)}
+    assert _missed(probes) == set()
+
+
+def test_rollback_discards_pending_tags(app, diaries):
+    user_a, user_b = diaries[:2]
+    probes = _probes(*diaries)
+    _prime(probes)
+
+    db.session.query(DiaryEntry).filter_by(user_id=user_a).one().episodes_watched = 5
+    db.session.flush()
+    db.session.rollback()
+    assert PENDING_TAGS_KEY not in db.session.info
+
+    # O próximo commit invalida só o que ele mesmo alterou
+    db.session.query(DiaryEntry).filter_by(user_id=user_b).one().episodes_watched = 5
+    db.session.commit()
+
+    assert _missed(probes) == {'diary_b', 'stats_b'}
+
+
+def test_anime_update_fans_out_to_diaries(app, diaries):
+    anime_x = diaries[2]
+    probes = _probes(*diaries)
+    _prime(probes)
+
+    db.session.get(Anime, anime_x).title = 'Renamed'
+    db.session.commit()
+
+    assert _missed(probes) == {'anime_x', 'diary_a'}
+
+
+def test_bulk_batch_insert_invalidates(app, diaries, make_animes):
+    user_a = diaries[0]
+    probes = _probes(*diaries)
+    _prime(probes)
+    anime = make_animes(1, first_mal_id=5000)[0]
+
+    results = DiaryService().apply_batch(
+        user_a, [{'op': 'add', 'anime_id': anime.id, 'status': 'watching', 'user_score': 7}], by='id'
+    )
+
+    assert results[0]['status'] == 'created'
+    assert _missed(probes) == {'diary_a', 'stats_a'}
+
+
+def test_bulk_import_upsert_invalidates_existing_animes(app, diaries):
+    anime_x = db.session.get(Anime, diaries[2])
+    probes = _probes(*diaries)
+    _prime(probes)
+
+    AnimeService().import_animes([
+        {'mal_id': anime_x.mal_id, 'title': 'Imported title'},
+        {'mal_id': 9000, 'title': 'New anime'},
+    ])
+
+    assert _missed(probes) == {'anime_x', 'diary_a'}
+
+
+def test_bulk_stats_update_invalidates(app, diaries):
+    user_b = diaries[1]
+    probes = _probes(*diaries)
+    _prime(probes)
+
+    DiaryService()._write_stats_delta(user_b, {'total_episodes': 3})
+    db.session.commit()
+
+    assert db.session.get(UserDiaryStats, user_b) is not None
+    assert _missed(probes) == {'diary_b', 'stats_b'}
+
+
+def test_bulk_update_without_key_criteria_invalidates_everything(app, diaries):
+    probes = _probes(*diaries)
+    _prime(probes)
+
+    db.session.execute(update(Anime).where(Anime.episodes == 12).values(score=7.5))
+    db.session.commit()
+
+    assert _missed(probes) == set(probes)
+
+
+def test_redis_versions_are_shared_between_workers(app, make_user):
+    client = FakeRedis()
+    app.extensions['read_cache'] = _redis_read_cache(client)
+    tag = diary_tag(make_user().id)
+    cached('probe', [tag], lambda: 'value')
+
+    # Outro worker (outro TaggedCache sobre o mesmo servidor) vê as mesmas versões
+    other = _redis_read_cache(client)
+    assert other.get_or_set('probe', [tag], lambda: 'recomputed') == 'value'
+
+    get_read_cache().invalidate([tag])
+    assert other.get_or_set('probe', [tag], lambda: 'recomputed') == 'recomputed'
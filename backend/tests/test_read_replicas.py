@@ -0,0 +1,121 @@
+import pytest
+from sqlalchemy import insert, select, update
+
+from app import create_app
+from app.config import TestingConfig, config
+from app.models import db, Anime, User
+from app.models.routing import read_only, use_primary
+from app.services.anime_service import AnimeService
+from tests import count_queries
+
+MAL_ID = 1
+
+
+@pytest.fixture
+def replica_app(tmp_path, monkeypatch):
+    """Primário e réplica em arquivos SQLite distintos; a réplica tem o anime com outro título"""
+    class ReplicaConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "primary.db"}'
+        DATABASE_REPLICA_URLS = [f'sqlite:///{tmp_path / "replica.db"}']
+        # Sem cache de leituras: as leituras em cache vão sempre ao primário
+        READ_CACHE_BACKEND = ''
+
+    monkeypatch.setitem(config, 'replica', ReplicaConfig)
+    app = create_app('replica')
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        replica = db.engines['replica_0']
+        db.metadata.create_all(replica)
+
+        user = User(username='reader', email='reader@example.com', password_hash='-')
+        db.session.add_all([user, Anime(mal_id=MAL_ID, title='Primary title', episodes=12)])
+        db.session.commit()
+
+        # Réplica atrasada: mesmo usuário e anime, título antigo e nenhum registro no diário
+        with replica.begin() as connection:
+            connection.execute(insert(User), {'id': user.id, 'username': 'reader', 'email': 'reader@example.com',
+                                              'password_hash': '-'})
+            connection.execute(insert(Anime), {'mal_id': MAL_ID, 'title': 'Replica title', 'episodes': 12})
+
+        db.session.remove()
+        yield app
+        db.session.remove()
+        db.drop_all(bind_key=None)
+        db.metadata.drop_all(replica)
+
+    # init_app registra uma metadata por bind no `db` compartilhado entre as aplicações
+    db.metadatas.pop('replica_0', None)
+
+
+def _title():
+    db.session.expire_all()
+    return AnimeService().get_anime_by_mal_id(MAL_ID).title
+
+
+def test_read_only_reads_hit_the_replica(replica_app):
+    assert _title() == 'Replica title'
+
+    # Fora de @read_only, e dentro dele com use_primary, a leitura vai ao primário
+    db.session.expire_all()
+    assert Anime.query.filter_by(mal_id=MAL_ID).one().title == 'Primary title'
+    with use_primary():
+        assert _title() == 'Primary title'
+
+
+def test_writes_go_to_the_primary(replica_app):
+    primary, replica = db.engine, db.engines['replica_0']
+
+    with count_queries(primary) as on_primary, count_queries(replica) as on_replica:
+        # Flush de dentro de um método @read_only também não pode ir para a réplica
+        read_only(lambda: db.session.add(Anime(mal_id=2, title='Flushed', episodes=1)) or db.session.flush())()
+        read_only(db.session.execute)(update(Anime).where(Anime.mal_id == MAL_ID).values(title='Updated title'))
+        db.session.commit()
+
+    assert on_replica == []
+    assert any(statement.startswith('INSERT') for statement in on_primary)
+    assert any(statement.startswith('UPDATE') for statement in on_primary)
+    with replica.connect() as connection:
+        assert connection.scalars(select(Anime.title).order_by(Anime.mal_id)).all() == ['Replica title']
+
+
+def test_reads_after_a_write_in_the_same_session_use_the_primary(replica_app):
+    assert _title() == 'Replica title'
+
+    db.session.execute(update(Anime).where(Anime.mal_id == MAL_ID).values(title='Written title'))
+
+    assert _title() == 'Written title'
+    db.session.commit()
+    assert _title() == 'Written title'
+
+
+def test_sticky_cookie_keeps_the_client_on_the_primary(replica_app):
+    client = replica_app.test_client()
+    user_id = User.query.one().id
+    anime_id = Anime.query.one().id
+
+    assert client.get(f'/api/diary/user/{user_id}').json['entries'] == []
+    response = client.post('/api/diary?by=id', json={'user_id': user_id, 'anime_id': anime_id, 'user_score': 7})
+    assert response.status_code == 201
+    # Cada requisição real tem a sua sessão (removida no fim do app context)
+    db.session.remove()
+
+    # Mesmo cliente, dentro de REPLICA_STICKY_SECONDS: lê a própria escrita no primário
+    assert len(client.get(f'/api/diary/user/{user_id}').json['entries']) == 1
+
+    # Outro cliente (sem o cookie) continua na réplica
+    assert replica_app.test_client().get(f'/api/diary/user/{user_id}').json['entries'] == []
+
+    # Passado o prazo, o mesmo cliente volta para a réplica
+    replica_app.config['REPLICA_STICKY_SECONDS'] = 0
+    assert client.get(f'/api/diary/user/{user_id}').json['entries'] == []
+
+
+def test_without_replicas_routing_is_a_no_op(app, make_animes):
+    make_animes(1, first_mal_id=MAL_ID)
+    assert list(db.engines) == [None]
+
+    assert read_only(db.session.get_bind)() is db.engine
+    with count_queries(db.engine) as statements:
+        assert _title() == f'Anime {MAL_ID}'
+    assert len(statements) == 1
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+from sqlalchemy import update
+
+from app.models import db, Anime, DiaryEntry
+from app.services import refresh_service
+from app.services.refresh_service import CatalogueRefresher
+
+
+class StubJikan:
+    """get_anime com respostas por mal_id: dict, None (404) ou uma exceção"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def get_anime(self, mal_id):
+        self.calls.append(mal_id)
+        response = self.responses.get(mal_id)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def jikan(app, monkeypatch):
+    stub = StubJikan({})
+    monkeypatch.setattr(refresh_service, 'get_jikan_client', lambda: stub)
+    app.config.update(CATALOGUE_REFRESH_MAX_AGE=3600, CATALOGUE_REFRESH_RETRY_AFTER=600, CATALOGUE_REFRESH_WORKERS=2)
+    return stub
+
+
+def _age(mal_ids, hours):
+    """Recuar updated_at (como se a última atualização fosse de `hours` horas atrás)"""
+    past = datetime.utcnow() - timedelta(hours=hours)
+    db.session.execute(update(Anime).where(Anime.mal_id.in_(mal_ids)).values(updated_at=past))
+    db.session.commit()
+    return past
+
+
+def _anime(mal_id):
+    db.session.expire_all()
+    return Anime.query.filter_by(mal_id=mal_id).one()
+
+
+def _payload(mal_id, score=9.0):
+    return {'mal_id': mal_id, 'score': score, 'episodes': 24, 'status': 'Finished Airing'}
+
+
+def test_refresh_writes_in_batches(app, jikan, make_animes, monkeypatch):
+    mal_ids = [anime.mal_id for anime in make_animes(5)]
+    _age(mal_ids, hours=2)
+    jikan.responses = {mal_id: _payload(mal_id) for mal_id in mal_ids}
+    app.config['CATALOGUE_REFRESH_BATCH_SIZE'] = 2
+
+    batches = []
+    apply = CatalogueRefresher._apply
+    monkeypatch.setattr(CatalogueRefresher, '_apply', lambda self, items: batches.append(len(items)) or apply(self, items))
+
+    summary = CatalogueRefresher().run_once(limit=10)
+
+    assert sorted(batches, reverse=True) == [2, 2, 1]
+    assert summary['candidates'] == summary['refreshed'] == 5
+    assert all(_anime(mal_id).score == 9.0 for mal_id in mal_ids)
+    # Atualizados saem da fila
+    assert CatalogueRefresher().select_candidates(10) == []
+
+
+def test_missing_and_failed_animes_are_backed_off(app, jikan, make_animes):
+    ok, missing, failing = [anime.mal_id for anime in make_animes(3)]
+    past = _age([ok, missing, failing], hours=2)
+    jikan.responses = {ok: _payload(ok), missing: None, failing: requests.ConnectionError('down')}
+
+    summary = CatalogueRefresher().run_once(limit=10)
+
+    assert (summary['refreshed'], summary['missing'], summary['failed']) == (1, 1, 1)
+    for mal_id in (missing, failing):
+        anime = _anime(mal_id)
+        assert anime.refresh_failed_at is not None
+        # Dados não foram atualizados: updated_at continua velho
+        assert anime.updated_at == past
+
+    # Na próxima rodada, nenhum dos dois volta para a fila
+    jikan.calls.clear()
+    assert CatalogueRefresher().run_once(limit=10)['candidates'] == 0
+    assert jikan.calls == []
+
+
+def test_backed_off_anime_is_retried_after_the_delay(app, jikan, make_animes):
+    mal_id = make_animes(1)[0].mal_id
+    _age([mal_id], hours=2)
+    jikan.responses = {mal_id: None}
+    CatalogueRefresher().run_once()
+
+    db.session.execute(update(Anime).values(
+        refresh_failed_at=datetime.utcnow() - timedelta(seconds=601), updated_at=Anime.updated_at
+    ))
+    db.session.commit()
+    jikan.responses = {mal_id: _payload(mal_id)}
+
+    assert CatalogueRefresher().run_once()['refreshed'] == 1
+    assert _anime(mal_id).refresh_failed_at is None
+
+
+def test_backed_off_animes_do_not_take_slots(app, jikan, make_user, make_animes):
+    missing, other = [anime.mal_id for anime in make_animes(2)]
+    # O anime sem resposta é o mais referenciado: sem o backoff ocuparia sempre o único lugar
+    db.session.add(DiaryEntry(user_id=make_user().id, anime_id=_anime(missing).id, user_score=8))
+    db.session.commit()
+    _age([missing, other], hours=2)
+    jikan.responses = {missing: None, other: _payload(other)}
+
+    assert CatalogueRefresher().run_once(limit=1)['missing'] == 1
+    assert CatalogueRefresher().run_once(limit=1)['refreshed'] == 1
+    assert jikan.calls == [missing, other]
+
+
+def test_lag_considers_only_tracked_animes(app, jikan, make_user, make_animes):
+    tracked, untracked = [anime.mal_id for anime in make_animes(2)]
+    db.session.add(DiaryEntry(user_id=make_user().id, anime_id=_anime(tracked).id, user_score=8))
+    db.session.commit()
+    _age([tracked], hours=3)
+    _age([untracked], hours=10)
+
+    lag = CatalogueRefresher().lag()
+
+    assert lag['stale_tracked_animes'] == 1
+    assert 3 * 3600 - 5 <= lag['lag_seconds'] <= 3 * 3600 + 5
+
+
+def test_lag_without_tracked_animes(app, jikan, make_animes):
+    make_animes(1)
+    assert CatalogueRefresher().lag() == {'lag_seconds': 0, 'stale_tracked_animes': 0}
@@ -0,0 +1,154 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import anime_service
+from app.services.anime_service import AnimeService
+from app.utils import cache as cache_module
+from app.utils.cache import LRUCache, SQLiteCache, TieredCache
+
+
+class Clock:
+    """Relógio controlado pelo teste, no lugar de time.time() do módulo de cache"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class StubJikan:
+    """search() com resultados por chamada; `release` segura as chamadas em segundo plano"""
+
+    def __init__(self):
+        self.calls = []
+        self.results = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def search(self, query, limit):
+        self.calls.append(query)
+        self.release.wait(5)
+        return self.results
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, 'time', SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def jikan(app, monkeypatch):
+    stub = StubJikan()
+    monkeypatch.setattr(anime_service, 'get_jikan_client', lambda: stub)
+    # Só o cache e a Jikan: o índice local responderia às buscas repetidas
+    app.config.update(LOCAL_SEARCH_ENABLED=False, SEARCH_CACHE_TTL=60, SEARCH_CACHE_STALE_TTL=600)
+    return stub
+
+
+def _titles(animes):
+    return [anime.title for anime in animes]
+
+
+def test_lru_entries_expire(clock):
+    cache = LRUCache()
+    cache.set('key', 'value', clock.now + 10, clock.now + 20)
+
+    clock.advance(15)
+    assert cache.get('key') == ('value', clock.now - 5)
+
+    clock.advance(5)
+    assert cache.get('key') is None
+    assert len(cache) == 0
+
+
+def test_lru_evicts_the_least_recently_used(clock):
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1, clock.now + 10, clock.now + 10)
+    cache.set('b', 2, clock.now + 10, clock.now + 10)
+    assert cache.get('a') is not None
+
+    cache.set('c', 3, clock.now + 10, clock.now + 10)
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == ((1, clock.now + 10), (3, clock.now + 10))
+    assert cache.evictions == 1
+
+
+def test_tiered_cache_serves_stale_entries_until_they_expire(clock):
+    cache = TieredCache(LRUCache(), ttl=10, stale_ttl=100)
+    assert cache.get('key') is None
+    cache.set('key', [1, 2])
+
+    assert cache.get('key') == ([1, 2], True)
+    clock.advance(11)
+    assert cache.get('key') == ([1, 2], False)
+    clock.advance(100)
+    assert cache.get('key') is None
+
+    stats = cache.stats()
+    assert {name: stats[name] for name in ('hits', 'stale_hits', 'misses', 'sets')} == {
+        'hits': 1, 'stale_hits': 1, 'misses': 2, 'sets': 1
+    }
+    assert stats['hit_ratio'] == 0.5
+
+
+def test_shared_tier_is_seen_by_other_workers(clock, tmp_path):
+    path = str(tmp_path / 'search_cache.db')
+    first = TieredCache(LRUCache(), SQLiteCache(path, table='search_cache'), ttl=10, stale_ttl=100)
+    second = TieredCache(LRUCache(), SQLiteCache(path, table='search_cache'), ttl=10, stale_ttl=100)
+
+    first.set('key', [1, 2])
+
+    assert second.get('key') == ([1, 2], True)
+    assert second.get('key') == ([1, 2], True)
+    assert (second.stats()['shared_hits'], second.stats()['local_hits']) == (1, 1)
+
+    # A validade vem do nível compartilhado, não do momento da cópia local
+    clock.advance(11)
+    assert second.get('key') == ([1, 2], False)
+
+
+def test_repeated_searches_are_served_from_the_cache(app, clock, jikan):
+    jikan.results = [{'mal_id': 1, 'title': 'Cowboy Bebop'}, {'mal_id': 5, 'title': 'Cowboy Bebop: Tengoku no Tobira'}]
+    service = AnimeService()
+
+    first = service.search_animes('Cowboy Bebop')
+    second = service.search_animes('  cowboy   BEBOP ')
+
+    assert _titles(first) == _titles(second) == ['Cowboy Bebop', 'Cowboy Bebop: Tengoku no Tobira']
+    assert jikan.calls == ['cowboy bebop']
+    stats = service.get_search_cache_stats()
+    assert (stats['hits'], stats['misses'], stats['sets']) == (1, 1, 1)
+
+
+def test_stale_search_is_served_once_and_refreshed_in_the_background(app, clock, jikan):
+    jikan.results = [{'mal_id': 1, 'title': 'Cowboy Bebop'}]
+    service = AnimeService()
+    service.search_animes('bebop')
+
+    clock.advance(61)
+    jikan.results = [{'mal_id': 1, 'title': 'Cowboy Bebop'}, {'mal_id': 5, 'title': 'Cowboy Bebop: Tengoku no Tobira'}]
+    jikan.release.clear()
+
+    # Entrada velha: resposta imediata; uma única revalidação, mesmo com outra busca durante ela
+    assert _titles(service.search_animes('bebop')) == ['Cowboy Bebop']
+    assert _titles(service.search_animes('bebop')) == ['Cowboy Bebop']
+    jikan.release.set()
+
+    deadline = time.monotonic() + 5
+    while service._revalidating and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert jikan.calls == ['bebop', 'bebop']
+    assert service.get_search_cache().get('search:12:bebop') == ([1, 5], True)
+    assert _titles(service.search_animes('bebop')) == ['Cowboy Bebop', 'Cowboy Bebop: Tengoku no Tobira']
+    assert service.get_search_cache_stats()['stale_hits'] == 2
@@ -0,0 +1,106 @@
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import inspect
+
+from app.models import db, DiaryEntry, User
+from app.services.anime_service import AnimeService
+from app.services.search_index import InvertedIndex, SQLiteFTSIndex, get_search_index, include_object
+
+
+@pytest.fixture
+def memory_index(app):
+    """Índice invertido em memória no lugar do FTS5 (como em bancos sem FTS5)"""
+    index = InvertedIndex()
+    index.setup()
+    app.extensions['search_index'] = index
+    return index
+
+
+def test_index_is_built_at_startup(app):
+    assert isinstance(app.extensions['search_index'], SQLiteFTSIndex)
+    assert 'anime_fts' in inspect(db.engine).get_table_names()
+
+
+def test_first_search_does_not_commit_pending_changes(app):
+    db.session.add(User(username='pending', email='pending@example.com', password_hash='-'))
+    db.session.flush()
+
+    get_search_index().search('anything')
+    db.session.rollback()
+
+    assert User.query.filter_by(username='pending').first() is None
+
+
+def test_created_anime_is_indexed(app, memory_index):
+    anime = AnimeService().create_anime({'mal_id': 1, 'title': 'Cowboy Bebop'})
+
+    assert memory_index.search('bebop') == [anime.id]
+
+
+def test_failed_create_leaves_memory_index_untouched(app, memory_index, monkeypatch):
+    def fail():
+        raise RuntimeError('commit failed')
+
+    monkeypatch.setattr(db.session, 'commit', fail)
+    with pytest.raises(RuntimeError):
+        AnimeService().create_anime({'mal_id': 1, 'title': 'Cowboy Bebop'})
+
+    assert memory_index.search('bebop') == []
+
+
+def test_failed_delete_keeps_anime_in_memory_index(app, memory_index, make_user, make_animes):
+    anime_id = make_animes(1)[0].id
+    db.session.add(DiaryEntry(user_id=make_user().id, anime_id=anime_id, user_score=8))
+    db.session.commit()
+    memory_index.setup()
+
+    # O registro no diário impede a remoção
+    assert AnimeService().delete_anime(anime_id) is False
+
+    assert memory_index.search('anime') == [anime_id]
+
+
+def test_deleted_anime_leaves_memory_index(app, memory_index, make_animes):
+    anime_id = make_animes(1)[0].id
+    memory_index.setup()
+
+    assert AnimeService().delete_anime(anime_id) is True
+
+    assert memory_index.search('anime') == []
+
+
+def test_rebuild_replays_changes_made_while_loading(app, memory_index, make_animes):
+    first, second = (anime.id for anime in make_animes(2))
+    execute = db.session.execute
+
+    def execute_and_remove(*args, **kwargs):
+        # Outra requisição remove um anime enquanto a reconstrução lê a tabela
+        result = execute(*args, **kwargs)
+        memory_index.remove([first])
+        return result
+
+    db.session.execute = execute_and_remove
+    try:
+        assert memory_index.rebuild() is True
+    finally:
+        del db.session.execute
+
+    assert memory_index.search('anime') == [second]
+
+
+def test_concurrent_rebuild_keeps_serving_the_current_index(app, memory_index, make_animes):
+    anime_id = make_animes(1)[0].id
+    memory_index.setup()
+
+    with memory_index._rebuild_lock:
+        assert memory_index.rebuild(blocking=False) is False
+        assert memory_index.search('anime') == [anime_id]
+
+
+def test_autogenerate_ignores_fts_tables(app):
+    with db.engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={'include_object': include_object})
+        diff = compare_metadata(context, db.metadata)
+
+    assert not any('anime_fts' in repr(change) for change in diff)
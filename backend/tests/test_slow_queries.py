@@ -0,0 +1,34 @@
+import pytest
+
+from app.models import db
+from app.utils.slow_queries import REDACTED, init_slow_query_log
+
+
+@pytest.fixture
+def slow_queries(app):
+    app.config.update(SLOW_QUERY_LOG_ENABLED=True, SLOW_QUERY_THRESHOLD_MS=0)
+    init_slow_query_log(app, db)
+    return app.extensions['slow_queries']
+
+
+def test_write_parameters_are_redacted(app, client, slow_queries, caplog):
+    response = client.post('/api/users/register', json={
+        'username': 'john_doe', 'email': 'john@example.com', 'password': 'password123'
+    })
+    assert response.status_code == 201
+
+    inserts = [entry for entry in slow_queries.entries() if entry['statement'].lstrip().startswith('INSERT INTO user ')]
+    assert len(inserts) == 1
+    assert set(inserts[0]['parameters']) == {REDACTED}
+
+    password_hash = db.session.execute(db.text('SELECT password_hash FROM user')).scalar()
+    assert password_hash not in caplog.text
+    assert password_hash not in str(slow_queries.entries())
+
+
+def test_select_parameters_are_kept(app, client, slow_queries, make_animes):
+    anime_id = make_animes(1)[0].id
+    assert client.get(f'/api/animes/{anime_id}?by=id').status_code == 200
+
+    selects = [entry for entry in slow_queries.entries() if entry['statement'].lstrip().upper().startswith('SELECT')]
+    assert any(anime_id in entry['parameters'] for entry in selects)
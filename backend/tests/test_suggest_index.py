@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+from sqlalchemy import event, insert
+
+from app.models import db, Anime, DiaryEntry
+from app.models.routing import RoutingSession
+from app.services.anime_service import AnimeService
+from app.services.suggest_index import TrigramIndex, get_suggest_index
+
+
+def _suggested_ids(client, query):
+    response = client.get('/api/animes/suggest', query_string={'q': query})
+    assert response.status_code == 200
+    return [suggestion['id'] for suggestion in response.json['suggestions']]
+
+
+def test_typo_ranks_the_intended_title_first(app, client):
+    titles = ['Shingeki no Kyojin', 'Shingeki no Kyojin Season 2', 'Shingeki no Bahamut', 'Kyoukai no Kanata']
+    db.session.execute(insert(Anime), [{'mal_id': i + 1, 'title': title} for i, title in enumerate(titles)])
+    db.session.commit()
+
+    response = client.get('/api/animes/suggest', query_string={'q': 'shingeki no kyojn'})
+
+    suggestions = response.json['suggestions']
+    assert [suggestion['title'] for suggestion in suggestions[:2]] == titles[:2]
+    assert suggestions[0]['similarity'] > suggestions[1]['similarity'] > suggestions[2]['similarity']
+
+
+def test_uncommitted_changes_do_not_reach_suggestions(app, client, make_animes):
+    anime_id = make_animes(1)[0].id
+    assert _suggested_ids(client, 'anime') == [anime_id]
+
+    def fail(session):
+        raise RuntimeError('commit failed')
+
+    # O título novo já foi enviado ao banco (flush) quando o commit falha
+    event.listen(RoutingSession, 'before_commit', fail)
+    try:
+        with pytest.raises(ValueError):
+            AnimeService().update_anime(anime_id, {'title': 'Cowboy Bebop'})
+    finally:
+        event.remove(RoutingSession, 'before_commit', fail)
+
+    assert _suggested_ids(client, 'cowboy') == []
+    assert _suggested_ids(client, 'anime') == [anime_id]
+
+    AnimeService().update_anime(anime_id, {'title': 'Cowboy Bebop'})
+    assert _suggested_ids(client, 'cowboy') == [anime_id]
+    assert _suggested_ids(client, 'anime') == []
+
+
+def test_failed_delete_keeps_suggestion(app, client, make_user, make_animes):
+    anime_id = make_animes(1)[0].id
+    db.session.add(DiaryEntry(user_id=make_user().id, anime_id=anime_id, user_score=8))
+    db.session.commit()
+    assert _suggested_ids(client, 'anime') == [anime_id]
+
+    assert AnimeService().delete_anime(anime_id) is False
+
+    assert _suggested_ids(client, 'anime') == [anime_id]
+
+
+def test_committed_changes_reach_suggestions(app, client, make_animes):
+    anime_id = make_animes(1)[0].id
+    assert _suggested_ids(client, 'anime') == [anime_id]
+
+    created = AnimeService().create_anime({'mal_id': 1, 'title': 'Cowboy Bebop'})
+    assert _suggested_ids(client, 'cowboy') == [created.id]
+
+    assert AnimeService().delete_anime(anime_id) is True
+    assert _suggested_ids(client, 'anime') == []
+
+
+def test_stale_index_is_rebuilt_by_a_single_thread(app, make_animes, monkeypatch):
+    anime_id = make_animes(1)[0].id
+    index = get_suggest_index()
+    app.config['SUGGEST_INDEX_REBUILD_INTERVAL'] = 1
+    index.built_at = 0.0
+
+    rebuilding = threading.Event()
+    release = threading.Event()
+    rebuilds = []
+    refresh = TrigramIndex._refresh
+
+    def slow_refresh(self, bulk):
+        # Só a carga completa do índice novo passa com bulk=True
+        if bulk:
+            rebuilds.append(self)
+            rebuilding.set()
+            release.wait(5)
+        refresh(self, bulk)
+
+    monkeypatch.setattr(TrigramIndex, '_refresh', slow_refresh)
+
+    def request():
+        with app.app_context():
+            get_suggest_index()
+
+    worker = threading.Thread(target=request)
+    worker.start()
+    try:
+        assert rebuilding.wait(5)
+
+        # Outra requisição segue no índice atual, sem esperar nem reconstruir de novo
+        assert get_suggest_index() is index
+        assert [suggestion['id'] for suggestion in index.suggest('anime')] == [anime_id]
+        assert len(rebuilds) == 1
+    finally:
+        release.set()
+        worker.join(5)
+
+    assert index.built_at > 0
+    assert [suggestion['id'] for suggestion in index.suggest('anime')] == [anime_id]
@@ -0,0 +1,124 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app.models import db, User
+from app.services.password_hasher import get_password_hasher, hash_method
+
+PASSWORD = 'password123'
+
+
+def _register(client, username='john_doe', password=PASSWORD):
+    response = client.post('/api/users/register', json={
+        'username': username, 'email': f'{username}@example.com', 'password': password
+    })
+    assert response.status_code == 201
+    return response.json['user']['id']
+
+
+def _login(client, username='john_doe', password=PASSWORD):
+    return client.post('/api/users/login', json={'username': username, 'password': password})
+
+
+def _stored_hash(user_id):
+    db.session.expire_all()
+    return db.session.get(User, user_id).password_hash
+
+
+@pytest.fixture
+def verify_calls(app, monkeypatch):
+    """Hashes verificados pelo hasher da aplicação"""
+    hasher = get_password_hasher()
+    calls = []
+    verify = hasher.verify
+
+    def spy(password_hash, password):
+        calls.append(password_hash)
+        return verify(password_hash, password)
+
+    monkeypatch.setattr(hasher, 'verify', spy)
+    return calls
+
+
+def test_login_with_valid_credentials(app, client):
+    user_id = _register(client)
+
+    response = _login(client)
+
+    assert response.status_code == 200
+    assert response.json['user']['id'] == user_id
+    assert 'password_hash' not in response.json['user']
+
+
+def test_login_with_wrong_password(app, client, verify_calls):
+    user_id = _register(client)
+
+    response = _login(client, password='wrong-password')
+
+    assert response.status_code == 401
+    assert response.json == {'error': 'Invalid username or password'}
+    assert verify_calls == [_stored_hash(user_id)]
+
+
+def test_login_with_unknown_user_verifies_a_dummy_hash(app, client, verify_calls):
+    _register(client)
+
+    response = _login(client, username='nobody')
+
+    # Mesma resposta e uma verificação de mesmo custo que uma senha errada
+    assert response.status_code == 401
+    assert response.json == {'error': 'Invalid username or password'}
+    assert len(verify_calls) == 1
+    assert hash_method(verify_calls[0]) == get_password_hasher().method
+
+
+def test_login_requires_username_and_password(app, client):
+    assert client.post('/api/users/login', json={'username': 'john_doe'}).status_code == 400
+
+
+def _user_with_hash(password_hash):
+    user = User(username='legacy', email='legacy@example.com', password_hash=password_hash)
+    db.session.add(user)
+    db.session.commit()
+    return user.id, user.updated_at
+
+
+def test_login_rehashes_a_hash_with_another_algorithm(app, client):
+    user_id, updated_at = _user_with_hash(generate_password_hash(PASSWORD, method='pbkdf2:sha256:1000'))
+
+    assert _login(client, 'legacy').status_code == 200
+
+    stored = db.session.get(User, user_id)
+    db.session.refresh(stored)
+    assert hash_method(stored.password_hash) == get_password_hasher().method
+    assert stored.updated_at == updated_at
+    # O novo hash continua válido
+    assert _login(client, 'legacy').status_code == 200
+
+
+def test_login_keeps_a_current_hash(app, client):
+    user_id = _register(client)
+    stored = _stored_hash(user_id)
+
+    assert _login(client).status_code == 200
+    assert _stored_hash(user_id) == stored
+
+
+def test_failed_login_does_not_rehash(app, client):
+    legacy_hash = generate_password_hash(PASSWORD, method='pbkdf2:sha256:1000')
+    user_id, _ = _user_with_hash(legacy_hash)
+
+    assert _login(client, 'legacy', 'wrong-password').status_code == 401
+    assert _stored_hash(user_id) == legacy_hash
+
+
+def test_failed_rehash_does_not_fail_the_login(app, client, monkeypatch):
+    legacy_hash = generate_password_hash(PASSWORD, method='pbkdf2:sha256:1000')
+    user_id, _ = _user_with_hash(legacy_hash)
+
+    def broken_hash(password):
+        raise RuntimeError('pool unavailable')
+
+    monkeypatch.setattr(get_password_hasher(), 'hash', broken_hash)
+
+    assert _login(client, 'legacy').status_code == 200
+    assert _stored_hash(user_id) == legacy_hash